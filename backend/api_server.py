@@ -4,11 +4,14 @@ Walrus Analytics Backend API
 Provides endpoints for reading data from Walrus storage
 """
 
-from flask import Flask, jsonify, request
+from flask import Flask, Response, jsonify, request, stream_with_context
 from flask_cors import CORS
 from flasgger import Swagger
 import os
 import importlib
+import signal
+import threading
+import time
 from dotenv import load_dotenv
 import json
 from datetime import datetime
@@ -16,6 +19,16 @@ from datetime import datetime
 # Import from lambda module using importlib (lambda is a reserved keyword)
 walrus_service_module = importlib.import_module('lambda.walrus_service')
 WalrusService = walrus_service_module.WalrusService
+http_session_module = importlib.import_module('lambda.http_session')
+metrics_module = importlib.import_module('lambda.metrics')
+dataset_profile_module = importlib.import_module('lambda.dataset_profile')
+prompt_sample_module = importlib.import_module('lambda.prompt_sample')
+data_digest_module = importlib.import_module('lambda.data_digest')
+job_queue_module = importlib.import_module('lambda.job_queue')
+ai_cache_module = importlib.import_module('lambda.ai_cache')
+json_findings_module = importlib.import_module('lambda.json_findings')
+ai_client_module = importlib.import_module('lambda.ai_client')
+JobQueue = job_queue_module.JobQueue
 
 # Load environment variables from root directory
 from pathlib import Path
@@ -61,6 +74,18 @@ swagger_template = {
         {
             "name": "Blob Operations",
             "description": "Read and write operations for Walrus blobs"
+        },
+        {
+            "name": "Cache",
+            "description": "Local blob cache statistics"
+        },
+        {
+            "name": "Jobs",
+            "description": "Queued analysis jobs"
+        },
+        {
+            "name": "Metrics",
+            "description": "Execution latency histograms"
         }
     ]
 }
@@ -74,6 +99,30 @@ walrus_service = WalrusService(
     walrus_cli_path=os.path.expanduser("~/.local/bin/walrus")
 )
 
+# Open pooled connections to Walrus in the background so the first
+# request does not pay for TCP + TLS setup
+if os.getenv('WALRUS_HTTP_WARMUP', '1') != '0':
+    threading.Thread(
+        target=http_session_module.warm_up_connections,
+        args=([walrus_service.publisher_url, walrus_service.aggregator_url],),
+        daemon=True
+    ).start()
+
+# Detect the AI provider and open its connection pool once, up front, so
+# the first analysis does not pay for client construction + TLS setup
+if os.getenv('AI_CLIENT_WARMUP', '1') != '0':
+    threading.Thread(target=ai_client_module.warm_up_ai_client, daemon=True).start()
+
+def reload_ai_credentials(signum=None, frame=None):
+    """Re-read .env and rebuild the AI client (SIGHUP; for key rotation)"""
+    load_dotenv(dotenv_path=dotenv_path, override=True)
+    ai_client_module.reload_ai_client()
+
+try:
+    signal.signal(signal.SIGHUP, reload_ai_credentials)
+except (AttributeError, ValueError):
+    pass  # no SIGHUP on Windows; signals can only be set from the main thread
+
 @app.route('/', methods=['GET'])
 def home():
     """Health check endpoint
@@ -199,6 +248,30 @@ def read_blob_as_csv(blob_id):
         type: string
         required: true
         description: Walrus blob ID containing CSV data
+      - name: offset
+        in: query
+        type: integer
+        required: false
+        default: 0
+        description: Number of data rows to skip
+      - name: limit
+        in: query
+        type: integer
+        required: false
+        description: Maximum rows to return (json format is capped at CSV_MAX_PAGE_ROWS)
+      - name: columns
+        in: query
+        type: string
+        required: false
+        description: Comma-separated list of columns to return
+        example: player_id,amount
+      - name: format
+        in: query
+        type: string
+        required: false
+        default: json
+        enum: [json, ndjson]
+        description: json returns one page; ndjson streams one row object per line
     responses:
       200:
         description: CSV data parsed successfully
@@ -221,20 +294,62 @@ def read_blob_as_csv(blob_id):
               type: integer
             column_count:
               type: integer
+            offset:
+              type: integer
+            limit:
+              type: integer
+            has_more:
+              type: boolean
+              description: True when more rows follow this page
             data:
               type: array
               items:
                 type: object
+            total_rows:
+              type: integer
+              description: Rows in the whole blob (only once the blob has been profiled)
+            column_stats:
+              type: object
+              description: Per-column type, null/unique counts and numeric min/max/mean (only once profiled)
       400:
-        description: Invalid CSV format
+        description: Invalid CSV format or query parameters
       500:
         description: Server error
     """
     try:
         print(f"📊 Reading CSV blob: {blob_id}")
 
-        # Use walrus_service to read and parse CSV
-        result = walrus_service.read_blob_as_csv(blob_id)
+        offset = request.args.get('offset', 0, type=int)
+        limit = request.args.get('limit', None, type=int)
+        columns_arg = request.args.get('columns', '')
+        columns = [c.strip() for c in columns_arg.split(',') if c.strip()] or None
+        output_format = request.args.get('format', 'json')
+
+        if offset < 0 or (limit is not None and limit < 1):
+            raise ValueError("offset must be >= 0 and limit must be >= 1")
+
+        if output_format == 'ndjson':
+            # Headers are parsed here so errors still get a proper status code
+            stream = walrus_service.open_csv(blob_id, offset=offset, limit=limit, columns=columns)
+
+            def generate():
+                for row in stream:
+                    yield json.dumps(row) + '\n'
+
+            return Response(
+                stream_with_context(generate()),
+                mimetype='application/x-ndjson',
+                headers={'X-CSV-Columns': ','.join(stream.columns)}
+            )
+
+        if output_format != 'json':
+            raise ValueError(f"Invalid format: {output_format}. Must be json/ndjson")
+
+        # Bound the size of a single JSON page; use ndjson for full exports
+        max_page_rows = int(os.getenv('CSV_MAX_PAGE_ROWS', '10000'))
+        limit = min(limit or max_page_rows, max_page_rows)
+
+        result = walrus_service.read_blob_as_csv(blob_id, offset=offset, limit=limit, columns=columns)
         return jsonify(result)
 
     except ValueError as e:
@@ -288,6 +403,154 @@ def get_blob_metadata(blob_id):
             "error": str(e)
         }), 500
 
+@app.route('/api/cache/stats', methods=['GET'])
+def get_cache_stats():
+    """Get local blob cache counters
+    ---
+    tags:
+      - Cache
+    responses:
+      200:
+        description: Cache statistics for this server process
+        schema:
+          type: object
+          properties:
+            success:
+              type: boolean
+              example: true
+            cache:
+              type: object
+              properties:
+                hits:
+                  type: integer
+                misses:
+                  type: integer
+                hit_rate:
+                  type: number
+                bytes_served:
+                  type: integer
+                  description: Bytes returned from disk instead of the aggregator
+                bytes_fetched:
+                  type: integer
+                  description: Bytes written to the cache
+                evictions:
+                  type: integer
+                expirations:
+                  type: integer
+                entries:
+                  type: integer
+                size_bytes:
+                  type: integer
+                max_bytes:
+                  type: integer
+    """
+    return jsonify({
+        "success": True,
+        "cache": walrus_service.cache.stats()
+    })
+
+@app.route('/api/ai/cache/stats', methods=['GET'])
+def get_ai_cache_stats():
+    """Get AI response cache counters and the provider cost it saved
+    ---
+    tags:
+      - Cache
+    responses:
+      200:
+        description: AI response cache statistics for this server process
+        schema:
+          type: object
+          properties:
+            success:
+              type: boolean
+              example: true
+            cache:
+              type: object
+              properties:
+                hits:
+                  type: integer
+                memory_hits:
+                  type: integer
+                misses:
+                  type: integer
+                bypassed:
+                  type: integer
+                hit_rate:
+                  type: number
+                saved_cost:
+                  type: number
+                  description: USD not spent on provider calls thanks to cache hits
+                saved_input_tokens:
+                  type: integer
+                saved_output_tokens:
+                  type: integer
+                entries:
+                  type: integer
+                memory_entries:
+                  type: integer
+    """
+    return jsonify({
+        "success": True,
+        "cache": ai_cache_module.get_ai_cache().stats()
+    })
+
+@app.route('/api/ai/providers', methods=['GET'])
+def get_ai_providers():
+    """Get per-provider latency, error rate, health and cost for AI routing
+    ---
+    tags:
+      - Metrics
+    responses:
+      200:
+        description: AI provider routing statistics for this server process
+        schema:
+          type: object
+          properties:
+            success:
+              type: boolean
+              example: true
+            provider:
+              type: string
+              example: anthropic+bedrock
+            routed:
+              type: boolean
+              description: Whether calls fail over (and hedge) across providers
+            hedge:
+              type: boolean
+            providers:
+              type: object
+              description: Per provider - calls, error_rate, p50_ms, p95_ms, healthy, consecutive_failures, hedge_wins, cost (USD, including hedge duplicates)
+    """
+    ai_client = ai_client_module.get_ai_client()
+    router = ai_client.client
+    stats = router.provider_stats() if hasattr(router, 'provider_stats') else {'hedge': False, 'providers': {}}
+    return jsonify({
+        "success": True,
+        "provider": ai_client.get_provider(),
+        "routed": hasattr(router, 'provider_stats'),
+        **stats
+    })
+
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    """Latency histograms and byte counters in Prometheus text format
+    ---
+    tags:
+      - Metrics
+    produces:
+      - text/plain
+    responses:
+      200:
+        description: |
+          walrus_ruleset_stage_seconds (histogram, labels rule_type and stage),
+          walrus_ruleset_stage_bytes_total, walrus_ruleset_execution_seconds
+          and walrus_ruleset_executions_total for this server process
+    """
+    return Response(
+        metrics_module.get_metrics().render(),
+        mimetype='text/plain; version=0.0.4'
+    )
+
 @app.route('/api/upload', methods=['POST'])
 def upload_blob():
     """Upload a file to Walrus storage
@@ -407,7 +670,65 @@ def upload_blob():
 
 @app.route('/api/execute', methods=['POST'])
 def execute_analysis():
-    """Execute AI analysis on uploaded data with configured template"""
+    """Queue an AI analysis of uploaded data with a configured template
+
+    With "stream": true (or Accept: text/event-stream) the analysis runs in
+    this request instead and the response is a Server-Sent Events stream:
+    start, delta (response text as it is generated), finding (each finding
+    once complete), then result (same object as a finished job) or error.
+    A budget event with the projected prompt tokens and cost precedes the
+    provider call.
+    ---
+    tags:
+      - Jobs
+    produces:
+      - application/json
+      - text/event-stream
+    parameters:
+      - name: body
+        in: body
+        required: true
+        schema:
+          type: object
+          required:
+            - config_blob_id
+            - data_blob_id
+            - template_id
+          properties:
+            config_blob_id:
+              type: string
+            data_blob_id:
+              type: string
+            template_id:
+              type: string
+            bypass_cache:
+              type: boolean
+              description: Call the AI provider even if this prompt has a cached response
+            stream:
+              type: boolean
+              description: Stream the analysis over Server-Sent Events instead of queueing a job
+    responses:
+      200:
+        description: Server-Sent Events stream (stream mode only)
+      202:
+        description: Job queued; poll status_url for the result
+        schema:
+          type: object
+          properties:
+            success:
+              type: boolean
+              example: true
+            job_id:
+              type: string
+            status:
+              type: string
+              example: queued
+            status_url:
+              type: string
+              example: /api/jobs/3f2c...
+      400:
+        description: Missing parameters
+    """
     try:
         data = request.get_json()
 
@@ -422,108 +743,408 @@ def execute_analysis():
                 "error": "Missing required parameters: config_blob_id, data_blob_id, template_id"
             }), 400
 
-        print(f"🚀 Executing analysis:")
-        print(f"   Template: {template_id}")
-        print(f"   Config: {config_blob_id}")
-        print(f"   Data: {data_blob_id}")
+        payload = {
+            'config_blob_id': config_blob_id,
+            'data_blob_id': data_blob_id,
+            'template_id': template_id,
+            'bypass_cache': bool(data.get('bypass_cache'))
+        }
+
+        # Streaming holds this request open and forwards tokens as they arrive
+        if data.get('stream') or request.accept_mimetypes.best == 'text/event-stream':
+            print(f"📡 Streaming analysis for {template_id}")
+            return Response(
+                stream_with_context(stream_analysis(payload)),
+                mimetype='text/event-stream',
+                headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+            )
+
+        job = job_queue.submit('analysis', payload)
+        print(f"📨 Queued analysis job {job['job_id']} (position {job.get('queue_position', 0)})")
+
+        return jsonify({
+            "success": True,
+            "job_id": job['job_id'],
+            "status": job['status'],
+            "queue_position": job.get('queue_position', 0),
+            "status_url": f"/api/jobs/{job['job_id']}"
+        }), 202
+
+    except Exception as e:
+        print(f"❌ Execute error: {e}")
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """Get the status of a queued analysis, and its result once finished
+    ---
+    tags:
+      - Jobs
+    parameters:
+      - name: job_id
+        in: path
+        type: string
+        required: true
+    responses:
+      200:
+        description: Job status
+        schema:
+          type: object
+          properties:
+            success:
+              type: boolean
+              example: true
+            job:
+              type: object
+              properties:
+                job_id:
+                  type: string
+                status:
+                  type: string
+                  enum: [queued, running, succeeded, failed]
+                queue_position:
+                  type: integer
+                  description: Jobs ahead of this one (queued jobs only)
+                result:
+                  type: object
+                  description: template, analysis, timings, ... (succeeded jobs only)
+                error:
+                  type: string
+                  description: Failed jobs only
+                wait_ms:
+                  type: integer
+                run_ms:
+                  type: integer
+      404:
+        description: Unknown job ID
+    """
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({
+            "success": False,
+            "error": f"Job not found: {job_id}"
+        }), 404
+
+    return jsonify({
+        "success": True,
+        "job": job
+    })
+
+@app.route('/api/jobs/stats', methods=['GET'])
+def get_job_stats():
+    """Get job counts by status
+    ---
+    tags:
+      - Jobs
+    responses:
+      200:
+        description: Queue depth for this server's job queue
+        schema:
+          type: object
+          properties:
+            success:
+              type: boolean
+              example: true
+            jobs:
+              type: object
+              properties:
+                workers:
+                  type: integer
+                queued:
+                  type: integer
+                running:
+                  type: integer
+                succeeded:
+                  type: integer
+                failed:
+                  type: integer
+                oldest_queued_age_ms:
+                  type: integer
+    """
+    return jsonify({
+        "success": True,
+        "jobs": job_queue.stats()
+    })
+
+def _prepare_analysis(payload, timer, budget):
+    """Fetch the template config and data from Walrus and build the analysis prompt
+
+    The prompt is fitted to budget (a PromptBudget); PromptBudgetError is
+    raised if it still does not fit.
+
+    Returns:
+        (config, analysis_prompt, projection)
+    """
+    config_blob_id = payload['config_blob_id']
+    data_blob_id = payload['data_blob_id']
+    template_id = payload['template_id']
 
-        # Download config from Walrus
-        print(f"📥 Downloading config from Walrus...")
+    print(f"🚀 Executing analysis:")
+    print(f"   Template: {template_id}")
+    print(f"   Config: {config_blob_id}")
+    print(f"   Data: {data_blob_id}")
+
+    # Download config from Walrus
+    print(f"📥 Downloading config from Walrus...")
+    with timer.stage('fetch_config'):
         config_result = walrus_service.read_blob(config_blob_id, format_type='json')
-        if not config_result['success']:
-            raise Exception(f"Failed to download config: {config_result.get('error')}")
+    if not config_result['success']:
+        raise Exception(f"Failed to download config: {config_result.get('error')}")
 
-        config = config_result['content']
-        print(f"✅ Config loaded: {config.get('name', 'Unknown')}")
+    config = config_result['content']
+    print(f"✅ Config loaded: {config.get('name', 'Unknown')}")
 
-        # Download data from Walrus
-        print(f"📥 Downloading data from Walrus...")
+    # Download data from Walrus
+    print(f"📥 Downloading data from Walrus...")
+    with timer.stage('fetch_data') as fetching:
         data_result = walrus_service.read_blob(data_blob_id, format_type='text')
-        if not data_result['success']:
-            raise Exception(f"Failed to download data: {data_result.get('error')}")
+        fetching.bytes = data_result.get('size_bytes', 0)
+    if not data_result['success']:
+        raise Exception(f"Failed to download data: {data_result.get('error')}")
 
-        user_data = data_result['content']
-        print(f"✅ Data loaded: {len(user_data)} bytes")
+    user_data = data_result['content']
+    print(f"✅ Data loaded: {len(user_data)} bytes")
 
-        # Execute AI analysis
-        print(f"🤖 Running AI analysis...")
-        ai_client_module = importlib.import_module('lambda.ai_client')
-        get_ai_client = ai_client_module.get_ai_client
+    with timer.stage('parse'):
+        df = dataset_profile_module.parse_text(user_data)
 
-        ai_client = get_ai_client()
+    # Column statistics over all rows, computed once per blob
+    with timer.stage('profile'):
+        profile = walrus_service.get_profile(data_blob_id, df)
 
-        # Create analysis prompt
-        analysis_prompt = f"""You are analyzing data using the "{template_id}" template.
+    # Everything but the dataset context, which is sized to the tokens left
+    header = f"""You are analyzing data using the "{template_id}" template.
 
 Template Configuration:
-{json.dumps(config.get('config', {}), indent=2)}
-
-User Data (first 2000 characters):
-{user_data[:2000]}
-
-Please analyze this data according to the template configuration and provide:
+{json.dumps(config.get('config', {}), indent=2)}"""
+    instructions = """Please analyze this data according to the template configuration and provide:
 1. Key findings and insights
 2. Anomalies or patterns detected
 3. Actionable recommendations
 4. Confidence scores for each finding
 
 Format your response as JSON with the following structure:
-{{
+{
   "summary": "Brief overview",
   "findings": [
-    {{"type": "...", "description": "...", "confidence": 0.0-1.0}}
+    {"type": "...", "description": "...", "confidence": 0.0-1.0}
   ],
   "recommendations": ["..."],
-  "metadata": {{"analyzed_records": 0, "flagged_items": 0}}
-}}
+  "metadata": {"analyzed_records": 0, "flagged_items": 0}
+}
 """
+    budget.spend(header, instructions, '\n\n', '\n\n')
 
-        # Call AI
-        ai_response = ai_client.generate_text(analysis_prompt)
-
-        # Try to parse as JSON, fallback to text
-        try:
-            # Extract JSON from response (might have markdown code blocks)
-            json_start = ai_response.find('{')
-            json_end = ai_response.rfind('}') + 1
-            if json_start >= 0 and json_end > json_start:
-                analysis_result = json.loads(ai_response[json_start:json_end])
-            else:
-                # Fallback: wrap text response
-                analysis_result = {
-                    "summary": "Analysis completed",
-                    "findings": [{"type": "analysis", "description": ai_response[:500], "confidence": 0.8}],
-                    "recommendations": ["Review full analysis results"],
-                    "metadata": {"analyzed_records": 0, "flagged_items": 0}
-                }
-        except json.JSONDecodeError:
+    # A digest of every row and/or representative rows (outliers, every
+    # category, the time range) within the prompt's token budget, as the
+    # config's prompt_context asks; unparseable content falls back to its
+    # first lines
+    context = data_digest_module.prompt_context(config.get('prompt_context'))
+    sample_tokens = config.get('sample_tokens') or prompt_sample_module.default_sample_tokens()
+    data_sections = []
+    if df is not None and len(df) > 0:
+        if context != 'sample':
+            with timer.stage('digest'):
+                digest = data_digest_module.digest_dataframe(
+                    df, config.get('entity_column'), config.get('measure_column')
+                )
+            data_sections.append(budget.fit(f"""Data Digest (all rows):
+{data_digest_module.format_digest(digest)}"""))
+        elif profile:
+            data_sections.append(budget.fit(f"""Dataset Profile (all rows):
+{dataset_profile_module.format_profile(profile)}"""))
+
+        # Leave room for the sample's heading line
+        sample_tokens = min(sample_tokens, budget.available - 50)
+        if context != 'digest' and sample_tokens > 0:
+            with timer.stage('sample'):
+                sample = prompt_sample_module.stratified_sample(df, sample_tokens)
+            data_sections.append(f"""Representative Sample ({prompt_sample_module.describe_sample(sample)}):
+{prompt_sample_module.format_sample(sample)}""")
+            budget.spend(data_sections[-1])
+    else:
+        data_sections.append(budget.fit(f"""User Data (first lines):
+{user_data}""", sample_tokens))
+    data_section = '\n\n'.join(data_sections)
+
+    # Create analysis prompt
+    with timer.stage('build_prompt') as building:
+        analysis_prompt = f"""{header}
+
+{data_section}
+
+{instructions}"""
+        building.bytes = len(analysis_prompt.encode('utf-8'))
+
+    # Projected size and cost before any provider call; oversize prompts stop here
+    projection = budget.check(analysis_prompt)
+    print(f"💰 Prompt ~{projection['input_tokens']} tokens, projected cost up to ${projection['max_cost']:.4f}")
+
+    return config, analysis_prompt, projection
+
+def _parse_analysis(ai_response):
+    """Parse the AI response into summary/findings/recommendations"""
+    # Try to parse as JSON, fallback to text
+    try:
+        # Extract JSON from response (might have markdown code blocks)
+        json_start = ai_response.find('{')
+        json_end = ai_response.rfind('}') + 1
+        if json_start >= 0 and json_end > json_start:
+            analysis_result = json.loads(ai_response[json_start:json_end])
+        else:
+            # Fallback: wrap text response
             analysis_result = {
                 "summary": "Analysis completed",
                 "findings": [{"type": "analysis", "description": ai_response[:500], "confidence": 0.8}],
                 "recommendations": ["Review full analysis results"],
                 "metadata": {"analyzed_records": 0, "flagged_items": 0}
             }
+    except json.JSONDecodeError:
+        analysis_result = {
+            "summary": "Analysis completed",
+            "findings": [{"type": "analysis", "description": ai_response[:500], "confidence": 0.8}],
+            "recommendations": ["Review full analysis results"],
+            "metadata": {"analyzed_records": 0, "flagged_items": 0}
+        }
+
+    return analysis_result
 
+def _analysis_result(payload, ai_result, projection, timer, **timings):
+    """Job result for a finished analysis"""
+    return {
+        "template": payload['template_id'],
+        "config_blob_id": payload['config_blob_id'],
+        "data_blob_id": payload['data_blob_id'],
+        "analysis": _parse_analysis(ai_result['text']),
+        "ai_cache": {
+            "cached": ai_result['cached'],
+            "saved_cost": ai_result.get('saved_cost', 0.0)
+        },
+        "usage": {
+            **ai_result.get('usage', {}),
+            "provider": ai_result.get('provider'),
+            "cost": ai_result.get('cost', 0.0),
+            "projected_input_tokens": projection['input_tokens'],
+            "projected_max_cost": projection['max_cost'],
+            **({"hedge": ai_result['hedge']} if 'hedge' in ai_result else {})
+        },
+        "timings": timer.to_dict(**timings),
+        "timestamp": datetime.now().isoformat()
+    }
+
+def run_analysis(payload):
+    """Run one template analysis (job handler behind /api/execute)"""
+    timer = metrics_module.StageTimer()
+    status = 'error'
+    try:
+        ai_client = ai_client_module.get_ai_client()
+        config, analysis_prompt, projection = _prepare_analysis(payload, timer, ai_client.budget())
+
+        # Execute AI analysis
+        print(f"🤖 Running AI analysis...")
+
+        # Call AI
+        # Identical prompts are answered from the AI response cache; templates
+        # can shorten its TTL with cache_ttl_seconds (0 = never cache)
+        with timer.stage('model_call') as calling:
+            ai_result = ai_client.analyze(
+                analysis_prompt,
+                cache_ttl=config.get('cache_ttl_seconds'),
+                bypass_cache=bool(payload.get('bypass_cache'))
+            )
+            calling.bytes = len(ai_result['text'].encode('utf-8'))
+        if ai_result['cached']:
+            print(f"♻️  AI response served from cache (saved ${ai_result['saved_cost']:.4f})")
+
+        result = _analysis_result(payload, ai_result, projection, timer)
         print(f"✅ Analysis complete!")
+        status = 'success'
 
-        # Return results
-        return jsonify({
-            "success": True,
-            "template": template_id,
-            "config_blob_id": config_blob_id,
-            "data_blob_id": data_blob_id,
-            "analysis": analysis_result,
-            "timestamp": datetime.now().isoformat()
-        })
+        return result
 
     except Exception as e:
-        print(f"❌ Execute error: {e}")
+        print(f"❌ Analysis error: {e}")
         import traceback
         traceback.print_exc()
-        return jsonify({
-            "success": False,
-            "error": str(e)
-        }), 500
+        raise
+
+    finally:
+        # Template analyses share one histogram series
+        timer.publish('template', status)
+
+def _sse(event, data):
+    """Format one Server-Sent Event"""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+def stream_analysis(payload):
+    """Run one template analysis in the request, yielding Server-Sent Events
+
+    Events:
+        start    - sent immediately, before anything is fetched
+        budget   - projected prompt tokens and cost, before the provider call
+        delta    - {"text"}: response text as the provider generates it
+        finding  - {"index", "finding"}: each element of "findings" as soon
+                   as the model has finished writing it
+        result   - the same result object a queued job produces
+        error    - {"error"}
+    """
+    timer = metrics_module.StageTimer()
+    status = 'error'
+    yield _sse('start', {'template': payload['template_id']})
+    try:
+        ai_client = ai_client_module.get_ai_client()
+        config, analysis_prompt, projection = _prepare_analysis(payload, timer, ai_client.budget())
+        yield _sse('budget', projection)
+
+        print(f"🤖 Streaming AI analysis...")
+        findings = json_findings_module.FindingsExtractor()
+
+        ai_result = None
+        first_token_ms = None
+        with timer.stage('model_call') as calling:
+            started = time.perf_counter()
+            for event in ai_client.stream(
+                analysis_prompt,
+                cache_ttl=config.get('cache_ttl_seconds'),
+                bypass_cache=bool(payload.get('bypass_cache'))
+            ):
+                if event['type'] == 'result':
+                    ai_result = event['result']
+                    continue
+
+                if first_token_ms is None:
+                    first_token_ms = int((time.perf_counter() - started) * 1000)
+                yield _sse('delta', {'text': event['text']})
+                for finding in findings.feed(event['text']):
+                    yield _sse('finding', {'index': findings.count - 1, 'finding': finding})
+            calling.bytes = len(ai_result['text'].encode('utf-8'))
+        if ai_result['cached']:
+            print(f"♻️  AI response served from cache (saved ${ai_result['saved_cost']:.4f})")
+
+        result = _analysis_result(payload, ai_result, projection, timer, first_token_ms=first_token_ms)
+        print(f"✅ Analysis complete!")
+        status = 'success'
+        yield _sse('result', result)
+
+    except Exception as e:
+        print(f"❌ Analysis error: {e}")
+        yield _sse('error', {'error': str(e)})
+
+    finally:
+        timer.publish('template', status)
+
+# Analyses run on a bounded worker pool so slow AI calls never hold a
+# request thread
+job_queue = JobQueue()
+job_queue.register('analysis', run_analysis)
+
+# The debug reloader also imports this module in a parent process that only
+# watches files; workers belong in the process that serves requests
+if __name__ != '__main__' or os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+    job_queue.start()
 
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 8000))
@@ -534,6 +1155,8 @@ if __name__ == '__main__':
 🔍 Health: http://localhost:{port}/
 📥 Read Blob: http://localhost:{port}/api/blob/<blob_id>
 📊 CSV Parse: http://localhost:{port}/api/blob/<blob_id>/csv
+🧵 Job Status: http://localhost:{port}/api/jobs/<job_id>
+📈 Metrics: http://localhost:{port}/metrics
 ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
 """)
     app.run(host='0.0.0.0', port=port, debug=True)
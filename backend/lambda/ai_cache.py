@@ -0,0 +1,225 @@
+"""
+AI Response Cache
+Prompt/response cache in front of the AI provider clients
+"""
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, Any, Optional, Iterator, Tuple
+
+try:
+    from .local_state import state_path
+    from .metrics import get_metrics
+except ImportError:
+    from local_state import state_path
+    from metrics import get_metrics
+
+
+class AIResponseCache:
+    """
+    Two-level cache of AIClient.analyze responses
+
+    A small in-memory LRU sits in front of a SQLite store that survives
+    restarts and is shared by every process using the same file. Entries
+    are keyed by everything that shapes a completion (provider, model,
+    prompt, max_tokens, temperature) and expire after a per-call TTL, so
+    templates whose answers should be fresh can use a short one.
+    """
+
+    def __init__(
+        self,
+        db_path: Optional[str] = None,
+        memory_entries: Optional[int] = None,
+        max_entries: Optional[int] = None,
+        default_ttl: Optional[float] = None
+    ):
+        self.db_path = db_path or os.getenv('AI_CACHE_PATH') or state_path('ai-cache.db')
+        self.memory_entries = memory_entries or int(os.getenv('AI_CACHE_MEMORY_ENTRIES', '256'))
+        self.max_entries = max_entries or int(os.getenv('AI_CACHE_MAX_ENTRIES', '10000'))
+        self.default_ttl = default_ttl if default_ttl is not None else float(os.getenv('AI_CACHE_TTL_SECONDS', '86400'))
+        self.enabled = os.getenv('AI_CACHE_ENABLED', '1') != '0'
+
+        # key -> (expires_at, response)
+        self._memory: 'OrderedDict[str, Tuple[float, Dict[str, Any]]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = {
+            'hits': 0,
+            'memory_hits': 0,
+            'misses': 0,
+            'bypassed': 0,
+            'saved_cost': 0.0,
+            'saved_input_tokens': 0,
+            'saved_output_tokens': 0
+        }
+
+        metrics = get_metrics()
+        self._lookups = metrics.counter('walrus_ai_cache_lookups_total', 'AI response cache lookups by result')
+        self._saved = metrics.counter('walrus_ai_cache_saved_cost_usd_total', 'Provider cost avoided by AI response cache hits')
+
+        with self._connect() as conn:
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    response TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_access REAL NOT NULL,
+                    expires_at REAL NOT NULL
+                )"""
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS responses_lru ON responses (last_access)")
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def key(provider: str, model: Optional[str], prompt: str, max_tokens: int, temperature: float) -> str:
+        """Cache key: SHA-256 over every input that shapes the completion"""
+        material = json.dumps([provider, model, prompt, max_tokens, float(temperature)], ensure_ascii=False)
+        return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+    def _count(self, **increments):
+        with self._lock:
+            for name, value in increments.items():
+                self._counters[name] += value
+
+    def _remember(self, key: str, expires_at: float, response: Dict[str, Any]):
+        with self._lock:
+            self._memory[key] = (expires_at, response)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the cached response, or None on a miss; hits count toward the savings"""
+        if not self.enabled:
+            return None
+
+        now = time.time()
+        response = None
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._memory.move_to_end(key)
+                    response = entry[1]
+                else:
+                    del self._memory[key]
+
+        if response is not None:
+            self._count(memory_hits=1)
+        else:
+            with self._connect() as conn:
+                row = conn.execute(
+                    "SELECT response, expires_at FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None and row[1] > now:
+                    conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+                    response = json.loads(row[0])
+                    self._remember(key, row[1], response)
+                elif row is not None:
+                    conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+
+        if response is None:
+            self._count(misses=1)
+            self._lookups.inc(result='miss')
+            return None
+
+        usage = response.get('usage') or {}
+        cost = float(response.get('cost') or 0)
+        self._count(
+            hits=1,
+            saved_cost=cost,
+            saved_input_tokens=int(usage.get('input_tokens') or 0),
+            saved_output_tokens=int(usage.get('output_tokens') or 0)
+        )
+        self._lookups.inc(result='hit')
+        self._saved.inc(cost)
+        return response
+
+    def put(self, key: str, response: Dict[str, Any], ttl: Optional[float] = None):
+        """Store a response for ttl seconds (default AI_CACHE_TTL_SECONDS; 0 = don't store)"""
+        ttl = self.default_ttl if ttl is None else float(ttl)
+        if not self.enabled or ttl <= 0:
+            return
+
+        now = time.time()
+        expires_at = now + ttl
+        self._remember(key, expires_at, response)
+        with self._connect() as conn:
+            conn.execute(
+                """INSERT OR REPLACE INTO responses (key, response, created_at, last_access, expires_at)
+                   VALUES (?, ?, ?, ?, ?)""",
+                (key, json.dumps(response), now, now, expires_at)
+            )
+            conn.execute("DELETE FROM responses WHERE expires_at <= ?", (now,))
+            conn.execute(
+                """DELETE FROM responses WHERE key IN (
+                       SELECT key FROM responses ORDER BY last_access DESC LIMIT -1 OFFSET ?
+                   )""",
+                (self.max_entries,)
+            )
+
+    def record_bypass(self):
+        """Count a call that skipped the lookup on request"""
+        self._count(bypassed=1)
+        self._lookups.inc(result='bypass')
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Return cache counters for this process plus the stored entry count
+
+        Returns:
+            {
+                'hits': int,                 # memory + disk
+                'memory_hits': int,
+                'misses': int,
+                'bypassed': int,
+                'hit_rate': float,
+                'saved_cost': float,         # USD, from the cached responses' 'cost'
+                'saved_input_tokens': int,
+                'saved_output_tokens': int,
+                'entries': int,
+                'memory_entries': int,
+                'enabled': bool
+            }
+        """
+        with self._lock:
+            counters = dict(self._counters)
+            memory_entries = len(self._memory)
+
+        with self._connect() as conn:
+            entries = conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+        lookups = counters['hits'] + counters['misses']
+        return {
+            **counters,
+            'hit_rate': counters['hits'] / lookups if lookups else 0.0,
+            'entries': entries,
+            'memory_entries': memory_entries,
+            'enabled': self.enabled
+        }
+
+
+_default_cache: Optional[AIResponseCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def get_ai_cache() -> AIResponseCache:
+    """Get the process-wide AI response cache"""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = AIResponseCache()
+        return _default_cache
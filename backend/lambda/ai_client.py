@@ -3,7 +3,19 @@ AI Client - Unified interface for Anthropic API or AWS Bedrock
 Automatically detects which credentials are available and uses the appropriate client.
 """
 import os
-from typing import Dict, Any, Optional
+import time
+import asyncio
+import threading
+from typing import Dict, Any, Iterator, List, Optional
+
+try:
+    from .ai_cache import AIResponseCache, get_ai_cache
+    from .ai_rate_limit import AIRateLimiter, get_ai_rate_limiter
+    from .token_budget import PromptBudget
+except ImportError:
+    from ai_cache import AIResponseCache, get_ai_cache
+    from ai_rate_limit import AIRateLimiter, get_ai_rate_limiter
+    from token_budget import PromptBudget
 
 class AIClient:
     """
@@ -11,34 +23,57 @@ class AIClient:
     - Anthropic API (if ANTHROPIC_API_KEY is set)
     - AWS Bedrock (if AWS credentials are set)
 
-    Priority: Anthropic API > AWS Bedrock (simpler setup)
+    Priority: Anthropic API > AWS Bedrock (simpler setup). With AI_ROUTER=1
+    and both configured, calls go through a ProviderRouter that fails over
+    between them (and hedges, with AI_HEDGE=1); by default only Anthropic
+    is used.
     """
 
-    def __init__(self):
+    def __init__(self, cache: Optional[AIResponseCache] = None):
         """Initialize the appropriate AI client based on available credentials"""
         self.client = None
         self.client_type = None
+        self.cache = cache or get_ai_cache()
+        providers = []
+        route = os.getenv('AI_ROUTER', '0') == '1'
+        stand_ins = os.getenv('AI_MOCK_PROVIDERS')
+
+        # Local stand-in providers with injected latency/failures, for
+        # exercising failover and hedging without real credentials
+        if stand_ins:
+            from .mock_ai_client import MockAIClient
+            for spec in stand_ins.split(','):
+                name, *options = spec.strip().split(':')
+                providers.append((name, MockAIClient(*(float(option) for option in options))))
+            print(f"⚠️  Using Mock AI stand-ins: {', '.join(name for name, _ in providers)}")
 
         # Try Anthropic API first (simpler, faster setup)
-        if os.getenv('ANTHROPIC_API_KEY'):
+        if not stand_ins and os.getenv('ANTHROPIC_API_KEY'):
             try:
                 from .anthropic_client import AnthropicClient
-                self.client = AnthropicClient()
-                self.client_type = 'anthropic'
+                providers.append(('anthropic', AnthropicClient()))
                 print("✅ Using Anthropic API")
             except Exception as e:
                 print(f"⚠️ Anthropic API initialization failed: {e}")
 
-        # Fallback to AWS Bedrock
-        if not self.client and os.getenv('AWS_ACCESS_KEY_ID'):
+        # AWS Bedrock: the fallback, or a second provider to route to
+        if not stand_ins and (not providers or route) and os.getenv('AWS_ACCESS_KEY_ID'):
             try:
                 from .bedrock_client import BedrockClient
-                self.client = BedrockClient()
-                self.client_type = 'bedrock'
+                providers.append(('bedrock', BedrockClient()))
                 print("✅ Using AWS Bedrock")
             except Exception as e:
                 print(f"⚠️ AWS Bedrock initialization failed: {e}")
 
+        if len(providers) > 1 and route:
+            from .ai_router import ProviderRouter
+            self.client = ProviderRouter(providers)
+            self.client_type = '+'.join(name for name, _ in providers)
+            print(f"🔀 Routing AI calls across {self.client_type}"
+                  f"{' with hedging' if self.client.hedge else ''}")
+        elif providers:
+            self.client_type, self.client = providers[0]
+
         # Fallback to Mock AI (for demo/testing)
         if not self.client:
             try:
@@ -58,15 +93,25 @@ class AIClient:
         self,
         prompt: str,
         max_tokens: int = 2000,
-        temperature: float = 1.0
+        temperature: float = 1.0,
+        cache_ttl: Optional[float] = None,
+        bypass_cache: bool = False
     ) -> Dict[str, Any]:
         """
         Run AI analysis using the configured client
 
+        Identical requests (same provider, model, prompt, max_tokens and
+        temperature) are answered from the AI response cache. Prompts over
+        AI_MAX_PROMPT_TOKENS raise PromptBudgetError before any provider call.
+
         Args:
             prompt: Analysis prompt
             max_tokens: Maximum response length
             temperature: Sampling temperature (0.0-1.0)
+            cache_ttl: Seconds to keep this response (default
+                AI_CACHE_TTL_SECONDS; 0 = don't cache), e.g. per template
+            bypass_cache: Skip the lookup and call the provider; the fresh
+                response still replaces the cached one
 
         Returns:
             {
@@ -75,28 +120,236 @@ class AIClient:
                     'input_tokens': int,
                     'output_tokens': int
                 },
-                'cost': float,            # Estimated cost in USD
-                'provider': str           # 'anthropic' or 'bedrock'
+                'cost': float,            # Estimated cost in USD (0 when cached)
+                'provider': str,          # 'anthropic' or 'bedrock' (the one that answered)
+                'cached': bool,
+                'saved_cost': float       # when cached: cost of the original call
             }
         """
+        key = self.cache_key(prompt, max_tokens, temperature)
+
+        if bypass_cache:
+            self.cache.record_bypass()
+        else:
+            cached = self.cached_response(key)
+            if cached is not None:
+                return cached
+
+        result = self.call_provider(prompt, max_tokens, temperature)
+        self.cache.put(key, result, cache_ttl)
+
+        return {**result, 'cached': False}
+
+    def stream(
+        self,
+        prompt: str,
+        max_tokens: int = 2000,
+        temperature: float = 1.0,
+        cache_ttl: Optional[float] = None,
+        bypass_cache: bool = False
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Run AI analysis, yielding the response text as the provider generates it
+
+        Takes the same arguments as analyze(). A cached response arrives as a
+        single delta; providers without streaming support are called with
+        analyze() and also produce one delta.
+
+        Yields:
+            {'type': 'delta', 'text': str} for each chunk of text, then
+            {'type': 'result', 'result': <same dict as analyze()>}
+        """
+        key = self.cache_key(prompt, max_tokens, temperature)
+
+        if bypass_cache:
+            self.cache.record_bypass()
+        else:
+            cached = self.cached_response(key)
+            if cached is not None:
+                yield {'type': 'delta', 'text': cached['text']}
+                yield {'type': 'result', 'result': cached}
+                return
+
+        if not self.client:
+            raise RuntimeError("AI client not initialized")
+
+        if not hasattr(self.client, 'stream'):
+            result = self.call_provider(prompt, max_tokens, temperature)
+            yield {'type': 'delta', 'text': result['text']}
+        else:
+            self.budget().check(prompt, max_tokens)
+            result = None
+            for event in self.client.stream(prompt, max_tokens, temperature):
+                if event['type'] == 'result':
+                    result = event['result']
+                else:
+                    yield event
+            result.setdefault('provider', self.client_type)
+
+        self.cache.put(key, result, cache_ttl)
+        yield {'type': 'result', 'result': {**result, 'cached': False}}
+
+    def cache_key(self, prompt: str, max_tokens: int, temperature: float) -> str:
+        """AI response cache key for this provider and model"""
+        model = getattr(self.client, 'model', None) or getattr(self.client, 'model_id', None)
+        return self.cache.key(self.client_type, model, prompt, max_tokens, temperature)
+
+    def cached_response(self, key: str) -> Optional[Dict[str, Any]]:
+        """Cached analyze() result for key (cost 0, cached=True), or None"""
+        cached = self.cache.get(key)
+        if cached is None:
+            return None
+        return {**cached, 'cost': 0.0, 'cached': True, 'saved_cost': cached.get('cost', 0.0)}
+
+    def budget(self) -> PromptBudget:
+        """
+        Prompt budget (AI_MAX_PROMPT_TOKENS) priced for this provider
+
+        A routed client ('anthropic+bedrock') is priced as Bedrock, the
+        dearer of the two, since either may answer.
+        """
+        return PromptBudget(provider=self.client_type)
+
+    def call_provider(self, prompt: str, max_tokens: int = 2000, temperature: float = 1.0) -> Dict[str, Any]:
+        """
+        One blocking call to the configured provider, bypassing the cache
+
+        Raises PromptBudgetError, without calling the provider, when the
+        prompt is over AI_MAX_PROMPT_TOKENS.
+        """
         if not self.client:
             raise RuntimeError("AI client not initialized")
 
+        self.budget().check(prompt, max_tokens)
         result = self.client.analyze(prompt, max_tokens, temperature)
-        result['provider'] = self.client_type
-
+        result.setdefault('provider', self.client_type)
         return result
 
     def get_provider(self) -> str:
         """Get the current AI provider name"""
         return self.client_type
 
+    def warm_up(self) -> Dict[str, Any]:
+        """Open the provider's connection pool ahead of the first call"""
+        start_time = time.time()
+        details = self.client.warm_up() if hasattr(self.client, 'warm_up') else {}
+        return {
+            'provider': self.client_type,
+            **details,
+            'elapsed_ms': (time.time() - start_time) * 1000
+        }
+
     def is_available(self) -> bool:
         """Check if AI client is available and working"""
         return self.client is not None
 
 
-# Convenience function for quick usage
+class AsyncAIClient:
+    """
+    asyncio variant of AIClient for batch work
+
+    Provider calls go through the process-wide AIRateLimiter, so any number
+    of concurrent analyze() calls (from any event loop or thread) share one
+    bounded pool and one requests/min + tokens/min budget and queue when it
+    runs out instead of failing on provider rate limits. Cache hits skip
+    the limiter entirely.
+    """
+
+    def __init__(self, client: Optional[AIClient] = None, limiter: Optional[AIRateLimiter] = None):
+        self.client = client or get_ai_client()
+        self.limiter = limiter or get_ai_rate_limiter()
+
+    async def analyze(
+        self,
+        prompt: str,
+        max_tokens: int = 2000,
+        temperature: float = 1.0,
+        cache_ttl: Optional[float] = None,
+        bypass_cache: bool = False
+    ) -> Dict[str, Any]:
+        """Same arguments and result as AIClient.analyze"""
+        loop = asyncio.get_running_loop()
+        cache = self.client.cache
+        key = self.client.cache_key(prompt, max_tokens, temperature)
+
+        if bypass_cache:
+            cache.record_bypass()
+        else:
+            cached = await loop.run_in_executor(None, self.client.cached_response, key)
+            if cached is not None:
+                return cached
+
+        result = await self.limiter.submit(
+            self.client.call_provider, prompt, max_tokens, temperature,
+            estimated_tokens=self.limiter.estimate_tokens(prompt, max_tokens),
+            usage=lambda r: r.get('usage')
+        )
+        await loop.run_in_executor(None, cache.put, key, result, cache_ttl)
+
+        return {**result, 'cached': False}
+
+    async def analyze_many(self, prompts: List[str], **kwargs) -> List[Any]:
+        """
+        Analyze prompts concurrently, in order
+
+        Returns:
+            One analyze() result per prompt; a prompt that still fails after
+            retries yields its exception instead of aborting the batch
+        """
+        return await asyncio.gather(
+            *(self.analyze(prompt, **kwargs) for prompt in prompts),
+            return_exceptions=True
+        )
+
+    def get_provider(self) -> str:
+        """Get the current AI provider name"""
+        return self.client.get_provider()
+
+
+_default_client: Optional[AIClient] = None
+_default_client_lock = threading.Lock()
+
+
 def get_ai_client() -> AIClient:
-    """Get a configured AI client instance"""
-    return AIClient()
+    """
+    Get the process-wide AI client
+
+    Provider detection and client construction (SDK setup, connection
+    pools) happen once; every request and thread shares the result.
+    Module-level state also survives between warm AWS Lambda invocations.
+    """
+    global _default_client
+    client = _default_client
+    if client is None:
+        with _default_client_lock:
+            if _default_client is None:
+                _default_client = AIClient()
+            client = _default_client
+    return client
+
+
+def reload_ai_client() -> AIClient:
+    """
+    Rebuild the process-wide AI client from the current environment
+
+    For key rotation: provider detection and credentials are re-read.
+    Calls already running finish on the previous client.
+    """
+    global _default_client
+    client = AIClient()
+    with _default_client_lock:
+        _default_client = client
+    print(f"🔄 AI client reloaded ({client.get_provider()})")
+    return client
+
+
+def warm_up_ai_client() -> Dict[str, Any]:
+    """Build the process-wide AI client and open its connections"""
+    try:
+        result = get_ai_client().warm_up()
+    except Exception as e:
+        print(f"⚠️ AI client warm-up failed: {e}")
+        return {'error': str(e)}
+
+    print(f"🔥 AI client warmed up ({result['provider']}, {result['elapsed_ms']:.0f}ms)")
+    return result
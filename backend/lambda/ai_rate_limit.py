@@ -0,0 +1,281 @@
+"""
+AI Rate Limiter
+Shared concurrency pool and request/token shaping for AI provider calls
+"""
+
+import os
+import time
+import random
+import asyncio
+import threading
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import parsedate_to_datetime
+from typing import Dict, Any, Callable, Iterator, Optional
+
+try:
+    from .metrics import get_metrics
+    from .token_budget import estimate_tokens
+except ImportError:
+    from metrics import get_metrics
+    from token_budget import estimate_tokens
+
+
+# HTTP statuses worth retrying: timeouts, conflicts, rate limits, overload (529)
+RETRYABLE_STATUS = frozenset([408, 409, 429, 500, 502, 503, 504, 529])
+
+# Bedrock (botocore ClientError) error codes worth retrying
+RETRYABLE_CODES = frozenset([
+    'ThrottlingException',
+    'TooManyRequestsException',
+    'ServiceUnavailableException',
+    'ModelNotReadyException',
+    'InternalServerException'
+])
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket refilled continuously at rate_per_minute
+
+    reserve() always succeeds and returns how long the caller must wait
+    before its reservation is covered, so the level can go negative; later
+    callers queue behind that debt. Nothing here is tied to an event loop,
+    which lets every loop and thread in the process share one bucket.
+    """
+
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity or rate_per_minute
+        self._level = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.rate > 0
+
+    def _refill(self, now: float):
+        self._level = min(self.capacity, self._level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self, amount: float) -> float:
+        """Take amount from the bucket; return seconds until it is covered"""
+        if not self.enabled:
+            return 0.0
+        with self._lock:
+            self._refill(time.monotonic())
+            self._level -= amount
+            return 0.0 if self._level >= 0 else -self._level / self.rate
+
+    def adjust(self, amount: float):
+        """Give back (amount > 0) or charge more (amount < 0) once real usage is known"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._refill(time.monotonic())
+            self._level = min(self.capacity, self._level + amount)
+
+
+def _exception_chain(exc: BaseException) -> Iterator[BaseException]:
+    """exc and the exceptions it wraps (the provider clients re-raise as Exception)"""
+    seen = set()
+    while exc is not None and id(exc) not in seen:
+        seen.add(id(exc))
+        yield exc
+        exc = exc.__cause__ or exc.__context__
+
+
+def _headers(exc: BaseException) -> Dict[str, str]:
+    response = getattr(exc, 'response', None)
+    if isinstance(response, dict):  # botocore ClientError
+        headers = response.get('ResponseMetadata', {}).get('HTTPHeaders') or {}
+    else:  # anthropic APIStatusError (httpx.Response)
+        headers = getattr(response, 'headers', None) or {}
+    return {str(k).lower(): v for k, v in dict(headers).items()}
+
+
+def retry_hint(exc: BaseException) -> Optional[float]:
+    """Seconds the provider asked us to wait (retry-after-ms / retry-after), if any"""
+    for error in _exception_chain(exc):
+        headers = _headers(error)
+        try:
+            if headers.get('retry-after-ms'):
+                return max(0.0, float(headers['retry-after-ms']) / 1000)
+            if headers.get('retry-after'):
+                value = headers['retry-after']
+                try:
+                    return max(0.0, float(value))
+                except ValueError:
+                    return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            continue
+    return None
+
+
+def is_retryable(exc: BaseException) -> bool:
+    """Whether exc is a rate limit, overload, timeout or connection failure"""
+    for error in _exception_chain(exc):
+        if getattr(error, 'status_code', None) in RETRYABLE_STATUS:
+            return True
+        response = getattr(error, 'response', None)
+        if isinstance(response, dict):
+            if response.get('Error', {}).get('Code') in RETRYABLE_CODES:
+                return True
+            if response.get('ResponseMetadata', {}).get('HTTPStatusCode') in RETRYABLE_STATUS:
+                return True
+        name = type(error).__name__
+        if 'Timeout' in name or 'Connection' in name:
+            return True
+    return False
+
+
+class AIRateLimiter:
+    """
+    Process-wide gate in front of blocking AI provider calls
+
+    Calls run on a bounded thread pool (AI_MAX_CONCURRENCY) after taking a
+    request from the requests/min bucket and an estimate of their tokens
+    from the tokens/min bucket. Once the call returns, the estimate is
+    corrected with the 'usage' it reports. Retryable failures back off with
+    jitter, or for exactly as long as the provider's retry hint says; a
+    hint also pauses every other caller, since they share the same quota.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: Optional[int] = None,
+        requests_per_minute: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None,
+        max_retries: Optional[int] = None
+    ):
+        self.max_concurrency = max_concurrency or int(os.getenv('AI_MAX_CONCURRENCY', '4'))
+        self.requests = TokenBucket(
+            requests_per_minute if requests_per_minute is not None else float(os.getenv('AI_REQUESTS_PER_MINUTE', '50'))
+        )
+        self.tokens = TokenBucket(
+            tokens_per_minute if tokens_per_minute is not None else float(os.getenv('AI_TOKENS_PER_MINUTE', '40000'))
+        )
+        self.max_retries = max_retries if max_retries is not None else int(os.getenv('AI_MAX_RETRIES', '4'))
+        self.base_delay = float(os.getenv('AI_RETRY_BASE_DELAY', '1.0'))
+        self.max_delay = float(os.getenv('AI_RETRY_MAX_DELAY', '60'))
+
+        self._executor = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix='ai-call')
+        self._lock = threading.Lock()
+        self._paused_until = 0.0
+        self._inflight = 0
+        self._output_tokens: Optional[float] = None  # moving average of completions
+
+        metrics = get_metrics()
+        self._wait = metrics.histogram('walrus_ai_throttle_wait_seconds', 'Time AI calls wait for rate limit budget')
+        self._retries = metrics.counter('walrus_ai_retries_total', 'AI provider calls retried, by reason')
+        self._inflight_gauge = metrics.gauge('walrus_ai_inflight', 'AI provider calls currently running')
+
+    def estimate_tokens(self, prompt: str, max_tokens: int) -> int:
+        """Tokens a call will use: the prompt plus the typical completion so far"""
+        with self._lock:
+            output = self._output_tokens
+        expected_output = max_tokens if output is None else min(max_tokens, output)
+        return int(estimate_tokens(prompt) + expected_output)
+
+    def _observe_output(self, output_tokens: int):
+        with self._lock:
+            if self._output_tokens is None:
+                self._output_tokens = float(output_tokens)
+            else:
+                self._output_tokens += 0.2 * (output_tokens - self._output_tokens)
+
+    def pause(self, seconds: float):
+        """Hold every caller for seconds (a provider retry hint)"""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def _backoff(self, attempt: int, hint: Optional[float]) -> float:
+        if hint is not None:
+            self.pause(hint)
+            return hint
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    async def _wait_turn(self, estimated_tokens: int):
+        started = time.monotonic()
+        with self._lock:
+            paused = self._paused_until - started
+        if paused > 0:
+            await asyncio.sleep(paused)
+
+        delay = max(self.requests.reserve(1), self.tokens.reserve(estimated_tokens))
+        if delay > 0:
+            await asyncio.sleep(delay)
+        self._wait.observe(time.monotonic() - started)
+
+    def _run(self, fn: Callable[..., Any]) -> Any:
+        with self._lock:
+            self._inflight += 1
+            self._inflight_gauge.set(self._inflight)
+        try:
+            return fn()
+        finally:
+            with self._lock:
+                self._inflight -= 1
+                self._inflight_gauge.set(self._inflight)
+
+    async def submit(
+        self,
+        fn: Callable[..., Any],
+        *args,
+        estimated_tokens: int = 0,
+        usage: Optional[Callable[[Any], Optional[Dict[str, int]]]] = None,
+        **kwargs
+    ) -> Any:
+        """
+        Run the blocking provider call fn(*args, **kwargs) under the limits
+
+        Args:
+            fn: Provider call, e.g. AIClient.call_provider
+            estimated_tokens: Tokens to reserve up front (see estimate_tokens)
+            usage: Extracts {'input_tokens', 'output_tokens'} from fn's result
+                to settle the reservation; without it the estimate stands
+
+        Returns:
+            fn's result; the last error is raised once retries run out
+        """
+        loop = asyncio.get_running_loop()
+        call = functools.partial(self._run, functools.partial(fn, *args, **kwargs))
+
+        attempt = 0
+        while True:
+            await self._wait_turn(estimated_tokens)
+            try:
+                result = await loop.run_in_executor(self._executor, call)
+            except Exception as e:
+                self.tokens.adjust(estimated_tokens)  # rejected calls don't use tokens
+                if attempt >= self.max_retries or not is_retryable(e):
+                    raise
+                hint = retry_hint(e)
+                delay = self._backoff(attempt, hint)
+                self._retries.inc(reason='retry_after' if hint is not None else 'backoff')
+                print(f"⏳ AI call failed ({e}); retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+                attempt += 1
+                continue
+
+            used = usage(result) if usage else None
+            if used:
+                output_tokens = int(used.get('output_tokens') or 0)
+                actual = int(used.get('input_tokens') or 0) + output_tokens
+                self.tokens.adjust(estimated_tokens - actual)
+                self._observe_output(output_tokens)
+            return result
+
+
+_default_limiter: Optional[AIRateLimiter] = None
+_default_limiter_lock = threading.Lock()
+
+
+def get_ai_rate_limiter() -> AIRateLimiter:
+    """Get the process-wide AI rate limiter"""
+    global _default_limiter
+    with _default_limiter_lock:
+        if _default_limiter is None:
+            _default_limiter = AIRateLimiter()
+        return _default_limiter
@@ -0,0 +1,384 @@
+"""
+AI Provider Router
+Failover and hedged requests across the configured AI providers
+"""
+
+import os
+import time
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, Future, wait
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+
+try:
+    from .ai_rate_limit import AIRateLimiter, get_ai_rate_limiter
+    from .metrics import get_metrics
+    from .token_budget import estimate_tokens, token_cost
+except ImportError:
+    from ai_rate_limit import AIRateLimiter, get_ai_rate_limiter
+    from metrics import get_metrics
+    from token_budget import estimate_tokens, token_cost
+
+
+class ProviderStats:
+    """
+    Rolling latency and error record for one provider
+
+    Keeps the last `window` calls. A provider that fails `max_failures`
+    times in a row, or whose error rate over the window passes
+    `error_threshold`, is skipped for `cooldown` seconds and then tried
+    again.
+    """
+
+    def __init__(self, window: int, max_failures: int, error_threshold: float, cooldown: float):
+        self.max_failures = max_failures
+        self.error_threshold = error_threshold
+        self.cooldown = cooldown
+        self._calls: deque = deque(maxlen=window)  # (seconds, ok)
+        self._lock = threading.Lock()
+        self.consecutive_failures = 0
+        self.unhealthy_until = 0.0
+        self.cost = 0.0
+        self.hedge_wins = 0
+
+    def record(self, seconds: float, ok: bool, cost: float = 0.0):
+        with self._lock:
+            self._calls.append((seconds, ok))
+            self.cost += cost
+            if ok:
+                self.consecutive_failures = 0
+                return
+            self.consecutive_failures += 1
+            if self.consecutive_failures >= self.max_failures or self._error_rate() > self.error_threshold:
+                self.unhealthy_until = time.monotonic() + self.cooldown
+
+    def won_hedge(self):
+        with self._lock:
+            self.hedge_wins += 1
+
+    def _error_rate(self) -> float:
+        # Too few calls to judge a rate; consecutive failures still count
+        if len(self._calls) < 5:
+            return 0.0
+        return sum(1 for _, ok in self._calls if not ok) / len(self._calls)
+
+    def healthy(self) -> bool:
+        return time.monotonic() >= self.unhealthy_until
+
+    def latency_percentile(self, percentile: float, min_samples: int) -> Optional[float]:
+        """Latency of successful calls at percentile (0-100), or None with too few samples"""
+        with self._lock:
+            latencies = sorted(seconds for seconds, ok in self._calls if ok)
+        if len(latencies) < min_samples:
+            return None
+        return latencies[min(len(latencies) - 1, int(len(latencies) * percentile / 100))]
+
+    def snapshot(self) -> Dict[str, Any]:
+        p50 = self.latency_percentile(50, 1)
+        p95 = self.latency_percentile(95, 1)
+        with self._lock:
+            calls = len(self._calls)
+            errors = sum(1 for _, ok in self._calls if not ok)
+            cost = self.cost
+            hedge_wins = self.hedge_wins
+        return {
+            'calls': calls,
+            'error_rate': errors / calls if calls else 0.0,
+            'p50_ms': int(p50 * 1000) if p50 is not None else None,
+            'p95_ms': int(p95 * 1000) if p95 is not None else None,
+            'healthy': self.healthy(),
+            'consecutive_failures': self.consecutive_failures,
+            'hedge_wins': hedge_wins,
+            'cost': cost
+        }
+
+
+class ProviderRouter:
+    """
+    Provider client that spreads calls over several providers
+
+    Has the same analyze()/stream() interface as the provider clients, so
+    AIClient uses it in place of a single one. Providers are tried in
+    priority order, skipping those in cooldown; a failed call fails over to
+    the next. With hedging on (AI_HEDGE), a call that has not finished
+    within the first provider's p95 latency is also sent to the second, and
+    whichever answers first wins. Both calls are paid for: the returned
+    cost includes the duplicate (estimated if it is still running), and the
+    per-provider cost in stats() and the metrics is updated with the actual
+    figure when it completes.
+
+    A duplicate takes one request and its estimated tokens from the shared
+    AIRateLimiter budget (AI_REQUESTS_PER_MINUTE / AI_TOKENS_PER_MINUTE),
+    settled with its actual usage, and is not sent when that budget is
+    exhausted. It runs on the router's own threads (AI_ROUTER_WORKERS), so
+    hedged calls can exceed AI_MAX_CONCURRENCY by one each.
+    """
+
+    def __init__(
+        self,
+        providers: List[Tuple[str, Any]],
+        hedge: Optional[bool] = None,
+        limiter: Optional[AIRateLimiter] = None
+    ):
+        """
+        Args:
+            providers: (name, client) pairs, most preferred first
+            hedge: Send duplicate requests to the next provider (default AI_HEDGE)
+            limiter: Budget hedge duplicates are charged to (default the
+                process-wide AIRateLimiter)
+        """
+        if not providers:
+            raise ValueError("ProviderRouter needs at least one provider")
+
+        self.providers = providers
+        self.hedge = hedge if hedge is not None else os.getenv('AI_HEDGE', '0') == '1'
+        self.limiter = limiter or get_ai_rate_limiter()
+        self.hedge_percentile = float(os.getenv('AI_HEDGE_PERCENTILE', '95'))
+        self.hedge_min_delay = float(os.getenv('AI_HEDGE_MIN_DELAY', '2.0'))
+        self.hedge_min_samples = int(os.getenv('AI_HEDGE_MIN_SAMPLES', '20'))
+
+        self.stats = {
+            name: ProviderStats(
+                window=int(os.getenv('AI_ROUTER_WINDOW', '100')),
+                max_failures=int(os.getenv('AI_ROUTER_MAX_FAILURES', '3')),
+                error_threshold=float(os.getenv('AI_ROUTER_ERROR_THRESHOLD', '0.5')),
+                cooldown=float(os.getenv('AI_ROUTER_COOLDOWN', '30'))
+            )
+            for name, _ in providers
+        }
+        self.model = '|'.join(
+            f"{name}:{getattr(client, 'model', None) or getattr(client, 'model_id', None)}"
+            for name, client in providers
+        )
+        self._executor = ThreadPoolExecutor(
+            max_workers=int(os.getenv('AI_ROUTER_WORKERS', '16')),
+            thread_name_prefix='ai-hedge'
+        )
+
+        metrics = get_metrics()
+        self._seconds = metrics.histogram('walrus_ai_provider_seconds', 'AI provider call latency by provider and outcome')
+        self._failovers = metrics.counter('walrus_ai_failovers_total', 'AI calls moved to another provider after a failure')
+        self._hedges = metrics.counter('walrus_ai_hedges_total', 'Hedged AI calls by the provider that answered first')
+        self._hedges_skipped = metrics.counter(
+            'walrus_ai_hedges_skipped_total', 'Hedges not sent because the AI rate limit budget was exhausted'
+        )
+        self._cost = metrics.counter('walrus_ai_cost_usd_total', 'AI provider cost by provider, including hedge duplicates')
+
+    def _order(self) -> List[Tuple[str, Any]]:
+        """Providers to try: healthy ones in priority order, then the rest"""
+        healthy = [p for p in self.providers if self.stats[p[0]].healthy()]
+        return healthy + [p for p in self.providers if p not in healthy]
+
+    def _record(self, name: str, seconds: float, result: Optional[Dict[str, Any]]):
+        cost = float(result.get('cost') or 0) if result else 0.0
+        self.stats[name].record(seconds, result is not None, cost)
+        self._seconds.observe(seconds, provider=name, status='success' if result is not None else 'error')
+        if cost:
+            self._cost.inc(cost, provider=name)
+
+    def _call(self, name: str, client: Any, prompt: str, max_tokens: int, temperature: float) -> Dict[str, Any]:
+        start = time.perf_counter()
+        try:
+            result = client.analyze(prompt, max_tokens, temperature)
+        except Exception:
+            self._record(name, time.perf_counter() - start, None)
+            raise
+        self._record(name, time.perf_counter() - start, result)
+        return {**result, 'provider': name}
+
+    def hedge_delay(self, name: str) -> float:
+        """How long to wait on name before sending the duplicate"""
+        p95 = self.stats[name].latency_percentile(self.hedge_percentile, self.hedge_min_samples)
+        return max(self.hedge_min_delay, p95 or 0.0)
+
+    def analyze(self, prompt: str, max_tokens: int = 2000, temperature: float = 1.0) -> Dict[str, Any]:
+        """
+        Call the best available provider, failing over on errors
+
+        Returns:
+            The provider's result plus 'provider' (who answered) and, for
+            hedged calls, 'hedge': {'providers', 'winner', 'duplicate_cost',
+            'duplicate_cost_estimated'}
+        """
+        order = self._order()
+        if self.hedge and len(order) > 1:
+            return self._hedged(order, prompt, max_tokens, temperature)
+        return self._failover(order, prompt, max_tokens, temperature)
+
+    def _failed_over(self, name: str, error: Exception, order, index: int):
+        if index + 1 < len(order):
+            print(f"⚠️ AI provider {name} failed ({error}); failing over to {order[index + 1][0]}")
+            self._failovers.inc(source=name, target=order[index + 1][0])
+
+    def _failover(self, order, prompt: str, max_tokens: int, temperature: float) -> Dict[str, Any]:
+        last_error = None
+        for index, (name, client) in enumerate(order):
+            try:
+                return self._call(name, client, prompt, max_tokens, temperature)
+            except Exception as e:
+                last_error = e
+                self._failed_over(name, e, order, index)
+        raise last_error
+
+    def _hedged(self, order, prompt: str, max_tokens: int, temperature: float) -> Dict[str, Any]:
+        (first, first_client), (second, second_client) = order[0], order[1]
+        futures: Dict[Future, str] = {
+            self._executor.submit(self._call, first, first_client, prompt, max_tokens, temperature): first
+        }
+
+        done, _ = wait(futures, timeout=self.hedge_delay(first))
+        if done:
+            future = next(iter(done))
+            if future.exception() is None:
+                return future.result()
+            # Failed before the hedge was due: plain failover
+            self._failed_over(first, future.exception(), order, 0)
+            return self._failover(order[1:], prompt, max_tokens, temperature)
+
+        # Slower than its p95: race the next provider, if the budget allows
+        reserved = self._reserve_duplicate(prompt, max_tokens)
+        if reserved is None:
+            self._hedges_skipped.inc(provider=second)
+            future = next(iter(futures))
+            try:
+                return future.result()
+            except Exception as e:
+                self._failed_over(first, e, order, 0)
+                return self._failover(order[1:], prompt, max_tokens, temperature)
+
+        futures[self._executor.submit(
+            self._call_duplicate, second, second_client, prompt, max_tokens, temperature, reserved
+        )] = second
+
+        pending = set(futures)
+        errors: List[Exception] = []
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is not None:
+                    errors.append(future.exception())
+                    continue
+
+                winner = futures[future]
+                self.stats[winner].won_hedge()
+                self._hedges.inc(winner=winner)
+                return self._with_duplicate_cost(future.result(), winner, futures, prompt)
+
+        # Both raced providers failed; fall back to any others in order
+        rest = order[2:]
+        if not rest:
+            raise errors[-1]
+        self._failed_over(second, errors[-1], order, 1)
+        return self._failover(rest, prompt, max_tokens, temperature)
+
+    def _reserve_duplicate(self, prompt: str, max_tokens: int) -> Optional[int]:
+        """Charge a duplicate call to the rate limiter; its token estimate, or None if over budget"""
+        estimated = self.limiter.estimate_tokens(prompt, max_tokens)
+        request_wait = self.limiter.requests.reserve(1)
+        token_wait = self.limiter.tokens.reserve(estimated)
+        if request_wait > 0 or token_wait > 0:
+            # A duplicate that has to queue would arrive too late to help
+            self.limiter.requests.adjust(1)
+            self.limiter.tokens.adjust(estimated)
+            return None
+        return estimated
+
+    def _call_duplicate(
+        self,
+        name: str,
+        client: Any,
+        prompt: str,
+        max_tokens: int,
+        temperature: float,
+        reserved: int
+    ) -> Dict[str, Any]:
+        """_call for a hedge duplicate, settling its token reservation"""
+        try:
+            result = self._call(name, client, prompt, max_tokens, temperature)
+        except Exception:
+            self.limiter.tokens.adjust(reserved)  # rejected calls don't use tokens
+            raise
+        usage = result.get('usage') or {}
+        if usage:
+            actual = int(usage.get('input_tokens') or 0) + int(usage.get('output_tokens') or 0)
+            self.limiter.tokens.adjust(reserved - actual)
+        return result
+
+    def _with_duplicate_cost(self, result: Dict[str, Any], winner: str, futures: Dict[Future, str], prompt: str) -> Dict[str, Any]:
+        """Add the losing request's cost (actual if finished, else estimated) to result"""
+        loser_future, loser = next((f, name) for f, name in futures.items() if name != winner)
+
+        if loser_future.done():
+            estimated = False
+            duplicate_cost = float(loser_future.result().get('cost') or 0) if loser_future.exception() is None else 0.0
+        else:
+            # Still generating; it will be billed about what the winner was.
+            # The actual cost lands in stats() and the metrics when it finishes.
+            estimated = True
+            output_tokens = int((result.get('usage') or {}).get('output_tokens') or 0)
+            duplicate_cost = token_cost(loser, estimate_tokens(prompt), output_tokens)
+
+        return {
+            **result,
+            'cost': float(result.get('cost') or 0) + duplicate_cost,
+            'hedge': {
+                'providers': [winner, loser],
+                'winner': winner,
+                'duplicate_cost': duplicate_cost,
+                'duplicate_cost_estimated': estimated
+            }
+        }
+
+    def stream(self, prompt: str, max_tokens: int = 2000, temperature: float = 1.0) -> Iterator[Dict[str, Any]]:
+        """
+        Stream from the best available provider
+
+        Fails over only until the first chunk arrives; after that the
+        response cannot move to another provider. Streams are not hedged.
+        """
+        order = self._order()
+        last_error = None
+        for index, (name, client) in enumerate(order):
+            start = time.perf_counter()
+            started = False
+            try:
+                for event in self._events(client, prompt, max_tokens, temperature):
+                    if event['type'] == 'result':
+                        result = {**event['result'], 'provider': name}
+                        self._record(name, time.perf_counter() - start, result)
+                        yield {'type': 'result', 'result': result}
+                    else:
+                        started = True
+                        yield event
+                return
+            except Exception as e:
+                self._record(name, time.perf_counter() - start, None)
+                if started:
+                    raise
+                last_error = e
+                self._failed_over(name, e, order, index)
+        raise last_error
+
+    def _events(self, client: Any, prompt: str, max_tokens: int, temperature: float) -> Iterator[Dict[str, Any]]:
+        if hasattr(client, 'stream'):
+            yield from client.stream(prompt, max_tokens, temperature)
+        else:
+            result = client.analyze(prompt, max_tokens, temperature)
+            yield {'type': 'delta', 'text': result['text']}
+            yield {'type': 'result', 'result': result}
+
+    def warm_up(self) -> Dict[str, Any]:
+        """Warm every provider"""
+        return {
+            'providers': {
+                name: client.warm_up() if hasattr(client, 'warm_up') else {}
+                for name, client in self.providers
+            }
+        }
+
+    def provider_stats(self) -> Dict[str, Any]:
+        """Per-provider calls, error rate, latency percentiles, health and cost"""
+        return {
+            'hedge': self.hedge,
+            'providers': {name: self.stats[name].snapshot() for name, _ in self.providers}
+        }
@@ -3,8 +3,14 @@ Anthropic API Direct Client
 Simpler and faster alternative to AWS Bedrock
 """
 import os
+import time
 from anthropic import Anthropic
-from typing import Dict, Any
+from typing import Dict, Any, Iterator
+
+try:
+    from .token_budget import token_cost
+except ImportError:
+    from token_budget import token_cost
 
 class AnthropicClient:
     """Anthropic API client for Claude 3.5"""
@@ -15,9 +21,30 @@ class AnthropicClient:
         if not api_key:
             raise ValueError("ANTHROPIC_API_KEY environment variable not set")
 
+        # Thread-safe, with its own keep-alive connection pool; AIClient
+        # shares one instance for the life of the process
         self.client = Anthropic(api_key=api_key)
         self.model = os.getenv('ANTHROPIC_MODEL', 'claude-3-haiku-20240307')
 
+    def warm_up(self) -> Dict[str, Any]:
+        """
+        Open a pooled TLS connection to the API ahead of the first call
+
+        Listing one model is free and also checks the API key. SDKs without
+        models.list skip the request.
+        """
+        start_time = time.time()
+        status = None
+        if hasattr(self.client, 'models'):
+            try:
+                self.client.with_options(timeout=5, max_retries=0).models.list(limit=1)
+                status = 200
+            except Exception as e:
+                print(f"⚠️ Anthropic API warm-up failed: {e}")
+                status = getattr(e, 'status_code', 0)
+
+        return {'status': status, 'elapsed_ms': (time.time() - start_time) * 1000}
+
     def analyze(
         self,
         prompt: str,
@@ -48,19 +75,48 @@ class AnthropicClient:
                 messages=[{"role": "user", "content": prompt}]
             )
 
-            # Calculate cost
-            # Claude 3 Haiku pricing: $0.25/MTok input, $1.25/MTok output
-            input_cost = message.usage.input_tokens * 0.00025 / 1000
-            output_cost = message.usage.output_tokens * 0.00125 / 1000
-
-            return {
-                'text': message.content[0].text,
-                'usage': {
-                    'input_tokens': message.usage.input_tokens,
-                    'output_tokens': message.usage.output_tokens
-                },
-                'cost': input_cost + output_cost
-            }
+            return self._result(message.content[0].text, message.usage)
 
         except Exception as e:
             raise Exception(f"Anthropic API error: {str(e)}")
+
+    def stream(
+        self,
+        prompt: str,
+        max_tokens: int = 2000,
+        temperature: float = 1.0
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Call Claude and yield the response as it is generated
+
+        Yields:
+            {'type': 'delta', 'text': str} for each chunk of text, then
+            {'type': 'result', 'result': <same dict as analyze()>}
+        """
+        try:
+            with self.client.messages.stream(
+                model=self.model,
+                max_tokens=max_tokens,
+                temperature=temperature,
+                messages=[{"role": "user", "content": prompt}]
+            ) as stream:
+                for text in stream.text_stream:
+                    yield {'type': 'delta', 'text': text}
+                message = stream.get_final_message()
+
+            text = ''.join(block.text for block in message.content if getattr(block, 'type', None) == 'text')
+            yield {'type': 'result', 'result': self._result(text, message.usage)}
+
+        except Exception as e:
+            raise Exception(f"Anthropic API error: {str(e)}")
+
+    def _result(self, text: str, usage) -> Dict[str, Any]:
+        return {
+            'text': text,
+            'usage': {
+                'input_tokens': usage.input_tokens,
+                'output_tokens': usage.output_tokens
+            },
+            # Claude 3 Haiku pricing: $0.25/MTok input, $1.25/MTok output
+            'cost': token_cost('anthropic', usage.input_tokens, usage.output_tokens)
+        }
@@ -5,10 +5,15 @@ Analyzes player behavior patterns using Claude 3.5 Sonnet
 
 import json
 import os
+import asyncio
 import boto3
-from typing import Dict, List, Any
+import pandas as pd
+from typing import Dict, List, Any, Optional, Tuple
 from datetime import datetime
 import hashlib
+from data_digest import digest_dataframe, format_digest
+from ai_rate_limit import AIRateLimiter, get_ai_rate_limiter
+from token_budget import PromptBudget
 
 
 class BedrockAnalyzer:
@@ -23,6 +28,7 @@ class BedrockAnalyzer:
             'BEDROCK_MODEL_ID',
             'anthropic.claude-3-5-sonnet-20241022-v2:0'
         )
+        self.max_tokens = 2000
 
     def analyze_player(self, player_data: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -46,13 +52,7 @@ class BedrockAnalyzer:
                 'recommendations': List[str]
             }
         """
-        # Calculate aggregate metrics
-        transactions = player_data.get('transactions', [])
-        total_spend = sum(t.get('amount', 0) for t in transactions)
-        avg_transaction = total_spend / len(transactions) if transactions else 0
-
-        # Build AI prompt
-        prompt = self._build_analysis_prompt(player_data, total_spend, avg_transaction)
+        prompt, total_spend = self._prepare(player_data)
 
         # Call Bedrock
         response = self._invoke_bedrock(prompt)
@@ -62,6 +62,61 @@ class BedrockAnalyzer:
 
         return analysis
 
+    async def analyze_player_async(
+        self,
+        player_data: Dict[str, Any],
+        limiter: Optional[AIRateLimiter] = None
+    ) -> Dict[str, Any]:
+        """
+        analyze_player for batch runs
+
+        The Bedrock call goes through the shared AIRateLimiter (bounded
+        concurrency, requests/min and tokens/min budgets, retry-after aware
+        backoff), so many players can be analyzed at once without tripping
+        Bedrock throttling.
+        """
+        limiter = limiter or get_ai_rate_limiter()
+        prompt, total_spend = self._prepare(player_data)
+
+        response_body = await limiter.submit(
+            self._invoke_bedrock_body, prompt,
+            estimated_tokens=limiter.estimate_tokens(prompt, self.max_tokens),
+            usage=lambda body: body.get('usage')
+        )
+
+        return self._parse_ai_response(response_body['content'][0]['text'], player_data, total_spend)
+
+    def analyze_players(self, players: List[Dict[str, Any]]) -> List[Any]:
+        """
+        Analyze many players concurrently
+
+        Returns:
+            One analysis per player, in order; a player whose analysis still
+            fails after retries yields its exception instead
+        """
+        async def run():
+            return await asyncio.gather(
+                *(self.analyze_player_async(player) for player in players),
+                return_exceptions=True
+            )
+
+        return asyncio.run(run())
+
+    def _prepare(self, player_data: Dict[str, Any]) -> Tuple[str, float]:
+        """
+        Aggregate the transactions and build the prompt; returns (prompt, total_spend)
+
+        Raises PromptBudgetError, before any Bedrock call, when the prompt
+        is over AI_MAX_PROMPT_TOKENS.
+        """
+        transactions = player_data.get('transactions', [])
+        total_spend = sum(t.get('amount', 0) for t in transactions)
+        avg_transaction = total_spend / len(transactions) if transactions else 0
+
+        prompt = self._build_analysis_prompt(player_data, total_spend, avg_transaction)
+        PromptBudget(provider='bedrock').check(prompt, self.max_tokens)
+        return prompt, total_spend
+
     def _build_analysis_prompt(
         self,
         player_data: Dict[str, Any],
@@ -73,6 +128,11 @@ class BedrockAnalyzer:
         transactions = player_data.get('transactions', [])
         period_days = player_data.get('period_days', 30)
 
+        # The whole history as statistics (amount spread, repeated amounts,
+        # busiest hours, max per hour) plus a few rows to show the fields
+        history = format_digest(digest_dataframe(pd.DataFrame(transactions))) if transactions else 'No transactions'
+        examples = '\n'.join(json.dumps(t, separators=(',', ':'), default=str) for t in transactions[:3])
+
         return f"""Analyze this game player's spending behavior and provide insights in JSON format.
 
 Player Data:
@@ -82,8 +142,11 @@ Player Data:
 - Total Spend: ${total_spend:.2f}
 - Average Transaction: ${avg_transaction:.2f}
 
-Transaction History (recent 10):
-{json.dumps(transactions[:10], indent=2)}
+Transaction Digest (all {len(transactions)} transactions):
+{history}
+
+Example Transactions:
+{examples}
 
 Provide analysis in this exact JSON structure:
 {{
@@ -125,10 +188,14 @@ Return ONLY valid JSON, no markdown formatting."""
 
     def _invoke_bedrock(self, prompt: str) -> str:
         """Call AWS Bedrock API with Claude 3.5 Sonnet"""
+        return self._invoke_bedrock_body(prompt)['content'][0]['text']
+
+    def _invoke_bedrock_body(self, prompt: str) -> Dict[str, Any]:
+        """Call AWS Bedrock API; returns the full response body including 'usage'"""
 
         body = json.dumps({
             "anthropic_version": "bedrock-2023-05-31",
-            "max_tokens": 2000,
+            "max_tokens": self.max_tokens,
             "messages": [
                 {
                     "role": "user",
@@ -147,10 +214,7 @@ Return ONLY valid JSON, no markdown formatting."""
                 accept='application/json'
             )
 
-            response_body = json.loads(response['body'].read())
-            ai_response = response_body['content'][0]['text']
-
-            return ai_response
+            return json.loads(response['body'].read())
 
         except Exception as e:
             print(f"Bedrock API error: {str(e)}")
@@ -215,10 +279,13 @@ def lambda_handler(event, context):
         "period_days": 30
     }
 
+    or, for a batch: {"players": [<player event>, ...]}
+
     Returns:
     {
         "statusCode": 200,
-        "body": JSON string of analysis
+        "body": JSON string of analysis (batch: {"results": [...]}, with
+                {"player_id", "error"} for players that failed)
     }
     """
 
@@ -229,10 +296,13 @@ def lambda_handler(event, context):
         else:
             body = event
 
+        batch = isinstance(body.get('players'), list)
+        players = body['players'] if batch else [body]
+
         # Validate input
         required_fields = ['player_id', 'transactions']
         for field in required_fields:
-            if field not in body:
+            if any(field not in player for player in players):
                 return {
                     'statusCode': 400,
                     'body': json.dumps({
@@ -242,7 +312,16 @@ def lambda_handler(event, context):
 
         # Analyze
         analyzer = BedrockAnalyzer()
-        analysis = analyzer.analyze_player(body)
+        if batch:
+            analysis = {
+                'results': [
+                    {'player_id': player.get('player_id'), 'error': str(result)}
+                    if isinstance(result, Exception) else result
+                    for player, result in zip(players, analyzer.analyze_players(players))
+                ]
+            }
+        else:
+            analysis = analyzer.analyze_player(body)
 
         return {
             'statusCode': 200,
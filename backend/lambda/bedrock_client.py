@@ -5,7 +5,13 @@ Enterprise-grade alternative with AWS integration
 import os
 import json
 import boto3
-from typing import Dict, Any
+from botocore.config import Config
+from typing import Dict, Any, Iterator
+
+try:
+    from .token_budget import token_cost
+except ImportError:
+    from token_budget import token_cost
 
 class BedrockClient:
     """AWS Bedrock API client for Claude 3.5"""
@@ -23,11 +29,27 @@ class BedrockClient:
             service_name='bedrock-runtime',
             region_name=region,
             aws_access_key_id=access_key,
-            aws_secret_access_key=secret_key
+            aws_secret_access_key=secret_key,
+            # Thread-safe and shared by every AIClient call; size the pool
+            # for concurrent analyses and keep idle connections open
+            config=Config(
+                max_pool_connections=int(os.getenv('AI_HTTP_POOL_MAXSIZE', '16')),
+                tcp_keepalive=True
+            )
         )
 
         self.model_id = os.getenv('BEDROCK_MODEL_ID', 'us.anthropic.claude-3-5-sonnet-20241022-v2:0')
 
+    def warm_up(self) -> Dict[str, Any]:
+        """
+        Nothing to do beyond construction
+
+        Building the boto3 client (service model, credentials, endpoint) is
+        most of the first-call overhead, and bedrock-runtime has no free
+        request to open a connection with.
+        """
+        return {'endpoint': self.client.meta.endpoint_url, 'elapsed_ms': 0.0}
+
     def analyze(
         self,
         prompt: str,
@@ -50,33 +72,76 @@ class BedrockClient:
             }
         """
         try:
-            # Prepare request body
-            body = json.dumps({
-                "anthropic_version": "bedrock-2023-05-31",
-                "max_tokens": max_tokens,
-                "temperature": temperature,
-                "messages": [{"role": "user", "content": prompt}]
-            })
-
             # Call Bedrock
             response = self.client.invoke_model(
                 modelId=self.model_id,
-                body=body
+                body=self._request_body(prompt, max_tokens, temperature)
             )
 
             # Parse response
             result = json.loads(response['body'].read())
 
-            # Calculate cost (same as Anthropic API)
-            # Claude 3.5 Sonnet pricing: $3/MTok input, $15/MTok output
-            input_cost = result['usage']['input_tokens'] * 0.003 / 1000
-            output_cost = result['usage']['output_tokens'] * 0.015 / 1000
+            return self._result(result['content'][0]['text'], result['usage'])
 
-            return {
-                'text': result['content'][0]['text'],
-                'usage': result['usage'],
-                'cost': input_cost + output_cost
-            }
+        except Exception as e:
+            raise Exception(f"AWS Bedrock error: {str(e)}")
+
+    def stream(
+        self,
+        prompt: str,
+        max_tokens: int = 2000,
+        temperature: float = 1.0
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Call Claude via Bedrock and yield the response as it is generated
+
+        Yields:
+            {'type': 'delta', 'text': str} for each chunk of text, then
+            {'type': 'result', 'result': <same dict as analyze()>}
+        """
+        try:
+            response = self.client.invoke_model_with_response_stream(
+                modelId=self.model_id,
+                body=self._request_body(prompt, max_tokens, temperature)
+            )
+
+            parts = []
+            usage = {'input_tokens': 0, 'output_tokens': 0}
+            for event in response['body']:
+                chunk = event.get('chunk')
+                if not chunk:
+                    continue
+                message = json.loads(chunk['bytes'])
+
+                # Anthropic messages stream: usage arrives in message_start
+                # (input) and message_delta (output)
+                if message.get('type') == 'message_start':
+                    usage['input_tokens'] = message['message'].get('usage', {}).get('input_tokens', 0)
+                elif message.get('type') == 'message_delta':
+                    usage['output_tokens'] = message.get('usage', {}).get('output_tokens', usage['output_tokens'])
+                elif message.get('type') == 'content_block_delta':
+                    text = message.get('delta', {}).get('text')
+                    if text:
+                        parts.append(text)
+                        yield {'type': 'delta', 'text': text}
+
+            yield {'type': 'result', 'result': self._result(''.join(parts), usage)}
 
         except Exception as e:
             raise Exception(f"AWS Bedrock error: {str(e)}")
+
+    def _request_body(self, prompt: str, max_tokens: int, temperature: float) -> str:
+        return json.dumps({
+            "anthropic_version": "bedrock-2023-05-31",
+            "max_tokens": max_tokens,
+            "temperature": temperature,
+            "messages": [{"role": "user", "content": prompt}]
+        })
+
+    def _result(self, text: str, usage: Dict[str, int]) -> Dict[str, Any]:
+        return {
+            'text': text,
+            'usage': usage,
+            # Claude 3.5 Sonnet pricing: $3/MTok input, $15/MTok output
+            'cost': token_cost('bedrock', usage['input_tokens'], usage['output_tokens'])
+        }
@@ -0,0 +1,371 @@
+"""
+Walrus Blob Cache
+Read-through on-disk cache for immutable Walrus blobs, keyed by blob_id
+"""
+
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+from contextlib import contextmanager
+from typing import Dict, Any, Optional, Callable, Iterator
+
+try:
+    from .local_state import state_path
+    from .http_session import http_timeout
+except ImportError:
+    from local_state import state_path
+    from http_session import http_timeout
+
+
+class BlobCache:
+    """
+    Content-addressed blob cache shared by WalrusService and WalrusUploader
+
+    Blob IDs are derived from blob content, so a cached copy never goes stale.
+    Entries expire when their storage epochs run out (the aggregator would
+    stop serving them) and the least recently used ones are evicted once the
+    cache grows past max_bytes. Blobs whose lifetime is unknown (downloads,
+    or uploads of a blob that was already stored) are kept for
+    unknown_ttl_seconds only.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Optional[str] = None,
+        max_bytes: Optional[int] = None,
+        epoch_seconds: Optional[int] = None,
+        unknown_ttl_seconds: Optional[float] = None
+    ):
+        self.cache_dir = cache_dir or os.getenv('WALRUS_CACHE_DIR') or state_path('blob-cache')
+        self.max_bytes = max_bytes or int(os.getenv('WALRUS_CACHE_MAX_BYTES', str(512 * 1024 * 1024)))
+        # Walrus testnet epochs last one day (mainnet: two weeks)
+        self.epoch_seconds = epoch_seconds or int(os.getenv('WALRUS_EPOCH_SECONDS', '86400'))
+        self.unknown_ttl_seconds = unknown_ttl_seconds or float(os.getenv('WALRUS_CACHE_UNKNOWN_TTL_SECONDS', '3600'))
+        self.enabled = os.getenv('WALRUS_CACHE_ENABLED', '1') != '0'
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._index_path = os.path.join(self.cache_dir, 'index.db')
+        self._lock = threading.Lock()
+        self._counters = {
+            'hits': 0,
+            'misses': 0,
+            'bytes_served': 0,
+            'bytes_fetched': 0,
+            'evictions': 0,
+            'expirations': 0
+        }
+
+        with self._connect() as conn:
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS blobs (
+                    blob_id TEXT PRIMARY KEY,
+                    filename TEXT NOT NULL,
+                    size_bytes INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_access REAL NOT NULL,
+                    expires_at REAL NOT NULL
+                )"""
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS blobs_lru ON blobs (last_access)")
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self._index_path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _file_for(self, blob_id: str) -> str:
+        # Hash the ID so arbitrary blob IDs are always safe filenames
+        return os.path.join(self.cache_dir, hashlib.sha256(blob_id.encode('utf-8')).hexdigest() + '.blob')
+
+    def _count(self, **increments: int):
+        with self._lock:
+            for key, value in increments.items():
+                self._counters[key] += value
+
+    def path(self, blob_id: str) -> Optional[str]:
+        """
+        Return the local file holding a cached blob, or None on a miss
+
+        Counts as a hit and refreshes the entry's LRU position.
+        """
+        if not self.enabled:
+            return None
+
+        now = time.time()
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT filename, size_bytes, expires_at FROM blobs WHERE blob_id = ?",
+                (blob_id,)
+            ).fetchone()
+
+            if row is None:
+                self._count(misses=1)
+                return None
+
+            filename, size_bytes, expires_at = row
+            if expires_at <= now or not os.path.exists(filename):
+                conn.execute("DELETE FROM blobs WHERE blob_id = ?", (blob_id,))
+                self._remove_file(filename)
+                self._count(misses=1, expirations=1)
+                return None
+
+            conn.execute("UPDATE blobs SET last_access = ? WHERE blob_id = ?", (now, blob_id))
+
+        self._count(hits=1, bytes_served=size_bytes)
+        return filename
+
+    def get(self, blob_id: str) -> Optional[bytes]:
+        """Return cached blob content, or None on a miss"""
+        filename = self.path(blob_id)
+        if filename is None:
+            return None
+        try:
+            with open(filename, 'rb') as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def expires_at(self, epochs: Optional[int], now: Optional[float] = None) -> float:
+        """
+        Latest time a blob stored for `epochs` more epochs is sure to be served
+
+        The current epoch is already partly over, so only epochs - 1 whole
+        epochs are guaranteed. Unknown lifetimes (None) and single-epoch
+        blobs get unknown_ttl_seconds.
+        """
+        now = time.time() if now is None else now
+        if epochs and epochs > 1:
+            return now + (epochs - 1) * self.epoch_seconds
+        return now + self.unknown_ttl_seconds
+
+    def put(self, blob_id: str, content: bytes, epochs: Optional[int] = None) -> None:
+        """
+        Store blob content that was just fetched or uploaded
+
+        Args:
+            epochs: Storage epochs the blob has left (see stored_epochs), or
+                None when unknown, as for downloads
+        """
+        if not self.enabled or len(content) > self.max_bytes:
+            return
+
+        tmp_filename = self.temp_file_for(blob_id)
+        with open(tmp_filename, 'wb') as f:
+            f.write(content)
+        self.commit_file(blob_id, tmp_filename, epochs)
+
+    def commit_file(self, blob_id: str, tmp_filename: str, epochs: Optional[int] = None) -> None:
+        """
+        Move a fully written temp file into the cache
+
+        Lets callers stream a blob to disk without holding it in memory.
+        """
+        size_bytes = os.path.getsize(tmp_filename)
+        if not self.enabled or size_bytes > self.max_bytes:
+            self._remove_file(tmp_filename)
+            return
+
+        filename = self._file_for(blob_id)
+        os.replace(tmp_filename, filename)
+
+        now = time.time()
+        expires_at = self.expires_at(epochs, now)
+        with self._connect() as conn:
+            conn.execute(
+                """INSERT OR REPLACE INTO blobs
+                   (blob_id, filename, size_bytes, created_at, last_access, expires_at)
+                   VALUES (?, ?, ?, ?, ?, ?)""",
+                (blob_id, filename, size_bytes, now, now, expires_at)
+            )
+        self._count(bytes_fetched=size_bytes)
+        self._evict()
+
+    def temp_file_for(self, blob_id: str) -> str:
+        """Return a temp path to stream a blob into before commit_file()"""
+        return f"{self._file_for(blob_id)}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+    def get_or_fetch(
+        self,
+        blob_id: str,
+        fetch: Callable[[], bytes],
+        epochs: Optional[int] = None
+    ) -> bytes:
+        """
+        Read-through lookup: serve from disk, otherwise call fetch() and store
+
+        Args:
+            blob_id: Walrus blob ID
+            fetch: Callable downloading the blob content on a miss
+            epochs: Storage epochs the blob has left, if known
+
+        Returns:
+            Blob content as bytes
+        """
+        content = self.get(blob_id)
+        if content is not None:
+            return content
+
+        content = fetch()
+        self.put(blob_id, content, epochs)
+        return content
+
+    def invalidate(self, blob_id: str) -> None:
+        """Drop a single blob from the cache"""
+        with self._connect() as conn:
+            row = conn.execute("SELECT filename FROM blobs WHERE blob_id = ?", (blob_id,)).fetchone()
+            conn.execute("DELETE FROM blobs WHERE blob_id = ?", (blob_id,))
+        if row:
+            self._remove_file(row[0])
+
+    def _evict(self) -> None:
+        """Remove expired entries, then LRU entries until under max_bytes"""
+        now = time.time()
+        removed = []
+        expired = 0
+
+        with self._connect() as conn:
+            for blob_id, filename in conn.execute(
+                "SELECT blob_id, filename FROM blobs WHERE expires_at <= ?", (now,)
+            ).fetchall():
+                removed.append((blob_id, filename))
+                expired += 1
+
+            total = conn.execute(
+                "SELECT COALESCE(SUM(size_bytes), 0) FROM blobs WHERE expires_at > ?", (now,)
+            ).fetchone()[0]
+
+            if total > self.max_bytes:
+                for blob_id, filename, size_bytes in conn.execute(
+                    "SELECT blob_id, filename, size_bytes FROM blobs WHERE expires_at > ? ORDER BY last_access ASC",
+                    (now,)
+                ):
+                    if total <= self.max_bytes:
+                        break
+                    removed.append((blob_id, filename))
+                    total -= size_bytes
+
+            conn.executemany("DELETE FROM blobs WHERE blob_id = ?", [(b,) for b, _ in removed])
+
+        for _, filename in removed:
+            self._remove_file(filename)
+        if removed:
+            self._count(evictions=len(removed) - expired, expirations=expired)
+
+    def _remove_file(self, filename: str) -> None:
+        try:
+            os.remove(filename)
+        except OSError:
+            pass
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Return cache counters for this process plus current disk usage
+
+        Returns:
+            {
+                'hits': int,
+                'misses': int,
+                'hit_rate': float,
+                'bytes_served': int,
+                'bytes_fetched': int,
+                'evictions': int,
+                'expirations': int,
+                'entries': int,
+                'size_bytes': int,
+                'max_bytes': int
+            }
+        """
+        with self._lock:
+            counters = dict(self._counters)
+
+        with self._connect() as conn:
+            entries, size_bytes = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size_bytes), 0) FROM blobs"
+            ).fetchone()
+
+        lookups = counters['hits'] + counters['misses']
+        return {
+            **counters,
+            'hit_rate': counters['hits'] / lookups if lookups else 0.0,
+            'entries': entries,
+            'size_bytes': size_bytes,
+            'max_bytes': self.max_bytes,
+            'enabled': self.enabled
+        }
+
+
+def iter_cached_blob(
+    cache: BlobCache,
+    session: Any,
+    blob_url: str,
+    blob_id: str,
+    chunk_size: int = 64 * 1024
+) -> Iterator[bytes]:
+    """
+    Yield blob content in chunks without buffering the whole blob
+
+    Streaming counterpart of BlobCache.get_or_fetch, used by WalrusService
+    and WalrusUploader: serves the cached copy when there is one; otherwise
+    streams blob_url through session while writing a copy to the cache,
+    which is only committed once the blob has been read to the end.
+    Raises requests.RequestException on download errors.
+    """
+    cached_path = cache.path(blob_id)
+    if cached_path is not None:
+        with open(cached_path, 'rb') as f:
+            while True:
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    return
+                yield chunk
+
+    tmp_filename = cache.temp_file_for(blob_id) if cache.enabled else None
+    completed = False
+    try:
+        with session.get(blob_url, timeout=http_timeout(), stream=True) as response:
+            response.raise_for_status()
+            with open(tmp_filename or os.devnull, 'wb') as tmp_file:
+                for chunk in response.iter_content(chunk_size=chunk_size):
+                    tmp_file.write(chunk)
+                    yield chunk
+        completed = True
+    finally:
+        if tmp_filename:
+            if completed:
+                cache.commit_file(blob_id, tmp_filename)
+            elif os.path.exists(tmp_filename):
+                os.remove(tmp_filename)
+
+
+def stored_epochs(store_response: Dict[str, Any]) -> Optional[int]:
+    """
+    Epochs a blob has left, from a publisher /v1/store response
+
+    Only a newly created blob reports both its start and end epoch; an
+    'alreadyCertified' blob may have been stored by someone else for a
+    shorter time than requested, so its lifetime is unknown (None).
+    """
+    storage = (store_response.get('newlyCreated') or {}).get('blobObject', {}).get('storage') or {}
+    start, end = storage.get('startEpoch'), storage.get('endEpoch')
+    if isinstance(start, int) and isinstance(end, int) and end > start:
+        return end - start
+    return None
+
+
+_default_cache: Optional[BlobCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def get_blob_cache() -> BlobCache:
+    """Get the process-wide blob cache"""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = BlobCache()
+        return _default_cache
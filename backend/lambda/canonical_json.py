@@ -0,0 +1,146 @@
+"""
+Canonical JSON
+Compact, deterministic encoding of the blobs uploaded to Walrus
+"""
+
+import json
+import math
+from typing import Any, List
+
+import numpy as np
+
+try:
+    import orjson
+except ImportError:  # optional: the stdlib fallback produces the same bytes
+    orjson = None
+
+
+# Encoding tag recorded with every upload ('encoding' in upload results)
+ENCODING_CANONICAL = 'json-c1'
+
+# What blobs uploaded before json-c1 used: json.dumps(indent=2, sort_keys=True).
+# Upload results and memoized responses without an 'encoding' field are in it.
+ENCODING_LEGACY = 'json-indent2'
+
+if orjson is not None:
+    _ORJSON_OPTIONS = orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS
+
+
+def _default(value: Any) -> Any:
+    """numpy values as the equivalent Python values"""
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def format_float(value: float) -> str:
+    """
+    A float the way json-c1 writes it
+
+    The shortest digits that round-trip (as repr), laid out like ryu:
+    plain decimals with at least one fractional digit from 1e-5 up to
+    (not including) 1e16, otherwise `d.ddde<exp>` without a '+' or
+    zero-padding. NaN and Infinity are null.
+    """
+    if not math.isfinite(value):
+        return 'null'
+    sign = '-' if math.copysign(1.0, value) < 0 else ''
+    if value == 0:
+        return sign + '0.0'
+
+    mantissa, _, exponent = repr(abs(value)).partition('e')
+    whole, _, fraction = mantissa.partition('.')
+    digits = whole + fraction
+    # value == 0.<digits> * 10**point
+    point = len(whole) + int(exponent or 0)
+    significant = digits.lstrip('0')
+    point -= len(digits) - len(significant)
+    digits = significant.rstrip('0')
+
+    if len(digits) <= point <= 16:
+        text = digits + '0' * (point - len(digits)) + '.0'
+    elif 0 < point <= 16:
+        text = digits[:point] + '.' + digits[point:]
+    elif -5 < point <= 0:
+        text = '0.' + '0' * -point + digits
+    elif len(digits) == 1:
+        text = f"{digits}e{point - 1}"
+    else:
+        text = f"{digits[0]}.{digits[1:]}e{point - 1}"
+    return sign + text
+
+
+def _key(key: Any) -> str:
+    if isinstance(key, str):
+        return key
+    if key is None or isinstance(key, bool):
+        return json.dumps(key)
+    if isinstance(key, int):
+        return str(int(key))
+    if isinstance(key, float):
+        return format_float(key)
+    raise TypeError(f"Dict key must be str, int, float, bool or None, not {type(key).__name__}")
+
+
+def _encode(value: Any, out: List[str]):
+    if isinstance(value, str):
+        out.append(json.encoder.encode_basestring(value))
+    elif value is None or isinstance(value, bool):
+        out.append(json.dumps(value))
+    elif isinstance(value, int) and not isinstance(value, np.generic):
+        out.append(str(int(value)))
+    elif isinstance(value, float) and not isinstance(value, np.generic):
+        out.append(format_float(value))
+    elif isinstance(value, dict):
+        out.append('{')
+        for index, (key, item) in enumerate(sorted(((_key(k), v) for k, v in value.items()), key=lambda kv: kv[0])):
+            if index:
+                out.append(',')
+            out.append(json.encoder.encode_basestring(key))
+            out.append(':')
+            _encode(item, out)
+        out.append('}')
+    elif isinstance(value, (list, tuple)):
+        out.append('[')
+        for index, item in enumerate(value):
+            if index:
+                out.append(',')
+            _encode(item, out)
+        out.append(']')
+    else:
+        _encode(_default(value), out)
+
+
+def dumps_fallback(data: Any) -> bytes:
+    """json-c1 without orjson; byte-for-byte what dumps_canonical gives with it"""
+    out: List[str] = []
+    _encode(data, out)
+    return ''.join(out).encode('utf-8')
+
+
+def dumps_canonical(data: Any) -> bytes:
+    """
+    Encode data as json-c1
+
+    json-c1 is UTF-8 JSON with object keys sorted, no insignificant
+    whitespace, non-ASCII characters unescaped and NaN/Infinity written as
+    null (they are not valid JSON). Floats are written by format_float;
+    int, float, bool and None keys become strings the same way; numpy
+    values are encoded as the equivalent Python values. orjson produces
+    this directly; integers beyond 64 bits (which it rejects) and hosts
+    without orjson go through dumps_fallback, which gives the same bytes.
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(data, default=_default, option=_ORJSON_OPTIONS)
+        except orjson.JSONEncodeError:
+            pass  # e.g. integers beyond 64 bits
+
+    return dumps_fallback(data)
+
+
+def dumps_legacy(data: Any) -> bytes:
+    """Encode data the way blobs were uploaded before json-c1"""
+    return json.dumps(data, indent=2, sort_keys=True).encode('utf-8')
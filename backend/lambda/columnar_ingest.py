@@ -0,0 +1,200 @@
+"""
+Columnar Dataset Ingest
+Decode DataUploader blobs straight into typed columns with DuckDB
+"""
+
+import os
+import re
+import json
+import tempfile
+from typing import Dict, Any, Optional, Tuple
+
+import pandas as pd
+
+
+# pandas dtype recorded by DataUploader._generate_schema -> DuckDB column type
+SCHEMA_TYPES = {
+    'int64': 'BIGINT',
+    'int32': 'BIGINT',
+    'float64': 'DOUBLE',
+    'float32': 'DOUBLE',
+    'bool': 'BOOLEAN',
+    'str': 'VARCHAR',
+    'string': 'VARCHAR',
+    # pandas < 2 strings, or mixed/nested values: strings are extracted by
+    # DuckDB, anything else is decoded from its JSON text afterwards
+    'object': 'JSON'
+}
+
+_DATA_START = re.compile(rb'\A\s*\{\s*"data"\s*:\s*\[')
+_TRAILER_KEY = re.compile(r'\]\s*,\s*(")')
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+# How far from the end of the blob to look for the fields after 'data'
+# (metadata, row_count, schema, validation)
+TRAILER_SEARCH_BYTES = 4 * 1024 * 1024
+
+_scan_once = json.JSONDecoder().scan_once
+
+
+def _parse_trailer(text: str, pos: int) -> Optional[Dict[str, Any]]:
+    """Parse '"key": value, ...}' up to the end of text, or return None"""
+    fields = {}
+    try:
+        while True:
+            key, pos = _scan_once(text, pos)
+            pos = _WHITESPACE.match(text, pos).end()
+            if not isinstance(key, str) or text[pos:pos + 1] != ':':
+                return None
+            pos = _WHITESPACE.match(text, pos + 1).end()
+            fields[key], pos = _scan_once(text, pos)
+            pos = _WHITESPACE.match(text, pos).end()
+
+            if text[pos:pos + 1] == ',':
+                pos = _WHITESPACE.match(text, pos + 1).end()
+                continue
+            if text[pos:pos + 1] == '}':
+                pos = _WHITESPACE.match(text, pos + 1).end()
+                return fields if pos == len(text) else None
+            return None
+    except (StopIteration, ValueError):
+        return None
+
+
+def split_wrapped_dataset(raw: bytes) -> Optional[Tuple[int, int, Dict[str, Any]]]:
+    """
+    Locate the 'data' array in a {"data": [...], ...} blob without parsing it
+
+    upload_blob serializes with sorted keys, so 'data' comes first and the
+    other fields follow the array. Candidate array ends are tried from the
+    right; only the real one is followed by fields that close the object.
+
+    Returns:
+        (array start, array end, trailing fields) as byte offsets, or None
+        if the blob does not have that layout
+    """
+    start = _DATA_START.match(raw)
+    if start is None:
+        return None
+
+    # Start the search window on a UTF-8 character boundary
+    window_start = max(start.end(), len(raw) - TRAILER_SEARCH_BYTES)
+    while window_start < len(raw) and raw[window_start] & 0xC0 == 0x80:
+        window_start += 1
+    try:
+        window = raw[window_start:].decode('utf-8')
+    except UnicodeDecodeError:
+        return None
+
+    for match in reversed(list(_TRAILER_KEY.finditer(window))):
+        fields = _parse_trailer(window, match.start(1))
+        if fields is not None:
+            array_end = window_start + len(window[:match.start() + 1].encode('utf-8'))
+            return start.end() - 1, array_end, fields
+
+    return None
+
+
+def read_wrapped_dataset(raw: bytes) -> Optional[pd.DataFrame]:
+    """
+    Build a DataFrame from a DataUploader blob using its stored schema
+
+    The row array is handed to DuckDB's JSON reader with every column type
+    declared up front, so no per-row dicts are created and no type
+    inference runs. Returns None when the fast path does not apply (no
+    schema, unknown dtypes, DuckDB missing); callers then fall back to
+    json.loads + pd.DataFrame.
+    """
+    located = split_wrapped_dataset(raw)
+    if located is None:
+        return None
+
+    array_start, array_end, fields = located
+    schema = fields.get('schema') or {}
+    columns = schema.get('columns')
+    if not isinstance(columns, dict) or not columns:
+        return None
+
+    column_types = {}
+    for name, info in columns.items():
+        duckdb_type = SCHEMA_TYPES.get(str(info.get('type')))
+        if duckdb_type is None:
+            return None
+        column_types[name] = duckdb_type
+
+    try:
+        import duckdb
+    except ImportError:
+        return None
+
+    fd, path = tempfile.mkstemp(suffix='.json', prefix='ingest-')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(memoryview(raw)[array_start:array_end])
+
+        # json.dumps writes missing values as a bare NaN token, which a VARCHAR
+        # column would read as the string "NaN"; when the blob has any, string
+        # columns are read as JSON and only real JSON strings are kept. (A
+        # string merely containing "NaN" just selects the slower path.)
+        has_nan = raw.find(b'NaN', array_start, array_end) >= 0
+        read_types = {}
+        select = []
+        for index, (name, duckdb_type) in enumerate(column_types.items()):
+            if duckdb_type == 'JSON' or (duckdb_type == 'VARCHAR' and has_nan):
+                read_types[name] = 'JSON'
+                select.append(
+                    f"CASE WHEN json_type({_quote(name)}) = 'VARCHAR' "
+                    f"THEN {_quote(name)} ->> '$' END AS {_quote(name)}"
+                )
+            else:
+                read_types[name] = duckdb_type
+                select.append(_quote(name))
+            if duckdb_type == 'JSON':
+                # Object columns (every string column before pandas 2) are
+                # mostly strings; only the other values are left to decode
+                select.append(
+                    f"CASE WHEN json_type({_quote(name)}) <> 'VARCHAR' "
+                    f"THEN {_quote(name)} END AS {_quote(_other_column(index))}"
+                )
+
+        conn = duckdb.connect(':memory:')
+        try:
+            df = conn.execute(
+                f"SELECT {', '.join(select)} FROM read_json(?, columns = ?, format = 'array')",
+                [path, read_types]
+            ).df()
+        finally:
+            conn.close()
+    except duckdb.Error as e:
+        print(f"Columnar ingest failed, falling back: {str(e)}")
+        return None
+    finally:
+        os.remove(path)
+
+    expected_rows = fields.get('row_count', schema.get('row_count'))
+    if expected_rows is not None and len(df) != expected_rows:
+        return None
+
+    for index, (name, duckdb_type) in enumerate(column_types.items()):
+        if duckdb_type == 'JSON':
+            others = df.pop(_other_column(index))
+            if others.notna().any():
+                df[name] = _merge_json_values(df[name], others)
+
+    return df
+
+
+def _quote(identifier: str) -> str:
+    return '"' + str(identifier).replace('"', '""') + '"'
+
+
+def _other_column(index: int) -> str:
+    return f'__json_{index}'
+
+
+def _merge_json_values(strings: pd.Series, others: pd.Series) -> pd.Series:
+    """Put the decoded non-string JSON values back among the strings, inferring the dtype like pd.DataFrame"""
+    values = strings.to_numpy(dtype=object, na_value=None)
+    for position in others.notna().to_numpy().nonzero()[0]:
+        values[position] = json.loads(others.iat[position])
+    return pd.Series(values.tolist(), index=strings.index, name=strings.name)
@@ -0,0 +1,403 @@
+"""
+Dataset Digests
+Compact statistics over every row of a dataset, used as AI prompt context
+"""
+
+import os
+import re
+from typing import Dict, Any, List, Optional
+
+import numpy as np
+import pandas as pd
+
+try:
+    from .numeric_summary import NumericSummary
+    from .prompt_sample import time_columns, TIME_BUCKETS
+except ImportError:
+    from numeric_summary import NumericSummary
+    from prompt_sample import time_columns, TIME_BUCKETS
+
+
+# What AI prompts carry about the data: the digest, a row sample, or both
+PROMPT_CONTEXTS = ('digest', 'sample', 'both')
+
+# Most frequent values reported per column
+TOP_K = 5
+
+# Distinct values counted per column before it is treated as high-cardinality
+VALUE_LIMIT = 10000
+
+# Entities tracked per ID column before it is treated as a row key
+ENTITY_LIMIT = 200000
+
+# Extreme values kept per numeric column as outlier examples
+EXTREMES = 3
+
+QUANTILES = (0.01, 0.25, 0.5, 0.75, 0.99)
+
+_ENTITY_NAME = re.compile(r'(^|_)id$|[a-z]Id$')
+_MEASURE_HINTS = ('amount', 'spend', 'price', 'value', 'revenue', 'total', 'cost', 'payment')
+
+
+def default_prompt_context() -> str:
+    return os.getenv('AI_PROMPT_CONTEXT', 'digest')
+
+
+def prompt_context(value: Optional[str]) -> str:
+    """Validate a ruleset/config 'prompt_context' value, falling back to the default"""
+    context = value or default_prompt_context()
+    if context not in PROMPT_CONTEXTS:
+        raise ValueError(f"Invalid prompt_context: {context} (expected one of {', '.join(PROMPT_CONTEXTS)})")
+    return context
+
+
+def _plain(value: Any) -> Any:
+    """numpy/pandas scalars as JSON-friendly Python values"""
+    if isinstance(value, pd.Timestamp):
+        return value.isoformat()
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def _merge_counts(old: Optional[pd.Series], new: pd.Series) -> pd.Series:
+    return new if old is None else old.add(new, fill_value=0)
+
+
+class DigestBuilder:
+    """
+    Build a dataset digest chunk by chunk
+
+    Every update() is a handful of vectorized operations per column:
+    describe-style running statistics, value counts, per-entity group
+    sums and hourly time counts, all of which merge across chunks.
+    Quantiles and outlier counts come from NumericSummary's per-column
+    sample, so they are exact while a column has at most `sample_size`
+    values. Memory is bounded by VALUE_LIMIT, ENTITY_LIMIT and the sample
+    size, not by the number of rows.
+    """
+
+    def __init__(
+        self,
+        entity_column: Optional[str] = None,
+        measure_column: Optional[str] = None,
+        sample_size: int = 100000,
+        seed: int = 0
+    ):
+        self.entity_column = entity_column
+        self.measure_column = measure_column
+        self.numeric = NumericSummary(sample_size, seed)
+        self.row_count = 0
+
+        self._nulls: Optional[pd.Series] = None
+        self._values: Dict[str, pd.Series] = {}
+        self._saturated = set()                             # columns past VALUE_LIMIT
+        self._extremes: Dict[str, np.ndarray] = {}
+        self._hours: Dict[str, pd.Series] = {}              # time column -> events per clock hour
+        self._entities: Dict[str, pd.DataFrame] = {}        # ID column -> rows/sum/max per entity
+        self._entity_keys = set()                           # ID columns past ENTITY_LIMIT
+        self._unhashable = set()
+
+    def update(self, df: pd.DataFrame):
+        """Fold one chunk into the digest"""
+        self.row_count += len(df)
+        self.numeric.update(df)
+        self._nulls = _merge_counts(self._nulls, df.isna().sum())
+        if len(df) == 0:
+            return
+
+        times = time_columns(df)
+        for name, parsed in times.items():
+            hours = parsed.dropna().dt.floor('h').value_counts()
+            self._hours[name] = _merge_counts(self._hours.get(name), hours)
+
+        numeric = df.select_dtypes(include='number')
+        for name in numeric.columns:
+            values = numeric[name].dropna().to_numpy(dtype=float)
+            if len(values) == 0:
+                continue
+            lows = np.partition(values, min(EXTREMES, len(values)) - 1)[:EXTREMES]
+            highs = -np.partition(-values, min(EXTREMES, len(values)) - 1)[:EXTREMES]
+            self._extremes[name] = np.concatenate([self._extremes.get(name, np.empty(0)), lows, highs])
+
+        distinct = {}
+        for name in df.columns:
+            if name in times or name in self._saturated or name in self._unhashable:
+                continue
+            try:
+                counts = df[name].value_counts()
+            except TypeError:
+                self._unhashable.add(name)  # nested (list/dict) values
+                continue
+            distinct[name] = len(counts)
+            merged = _merge_counts(self._values.get(name), counts)
+            if len(merged) > VALUE_LIMIT:
+                self._saturated.add(name)
+                self._values.pop(name, None)
+            else:
+                self._values[name] = merged
+
+        measure = self._measure(numeric)
+        for name in self._entity_columns(df, numeric):
+            if len(df) > 1 and distinct.get(name) == len(df):
+                self._entity_keys.add(name)  # unique per row: a row key, not an entity
+                self._entities.pop(name, None)
+                continue
+            grouped = df.groupby(name, sort=False)
+            part = pd.DataFrame({'rows': grouped.size()})
+            if measure is not None:
+                part['sum'] = grouped[measure].sum()
+                part['max'] = grouped[measure].max()
+            if name in self._entities:
+                part = pd.concat([self._entities[name], part]).groupby(level=0, sort=False).agg(
+                    {column: 'max' if column == 'max' else 'sum' for column in part.columns}
+                )
+            if len(part) > ENTITY_LIMIT:
+                self._entity_keys.add(name)
+                self._entities.pop(name, None)
+            else:
+                self._entities[name] = part
+
+    def _entity_columns(self, df: pd.DataFrame, numeric: pd.DataFrame) -> List[str]:
+        """ID-like columns to aggregate per entity (the configured one, or every candidate)"""
+        if self.entity_column is not None:
+            return [self.entity_column] if self.entity_column in df.columns else []
+        return [
+            name for name in df.columns
+            if _ENTITY_NAME.search(str(name))
+            and name not in self._entity_keys
+            and name not in self._unhashable
+            and not pd.api.types.is_float_dtype(df[name])
+        ]
+
+    def _measure(self, numeric: pd.DataFrame) -> Optional[str]:
+        """The numeric column summed per entity: configured, name-hinted, or the first"""
+        if self.measure_column is None:
+            candidates = [name for name in numeric.columns if not _ENTITY_NAME.search(str(name))]
+            hinted = [name for name in candidates if any(hint in str(name).lower() for hint in _MEASURE_HINTS)]
+            self.measure_column = (hinted or candidates or [None])[0]
+        return self.measure_column if self.measure_column in numeric.columns else None
+
+    def result(self) -> Dict[str, Any]:
+        """
+        The digest
+
+        Returns:
+            {
+                'row_count': int,
+                'columns': [str],
+                'nulls': {name: int},                  # columns with nulls only
+                'numeric': {name: {'count', 'mean', 'std', 'min', 'p1', 'p25',
+                                   'p50', 'p75', 'p99', 'max',
+                                   'outliers': {'low', 'high', 'count', 'examples'},
+                                   'top_values': [[value, count]]}},  # repeated values only
+                'categories': {name: {'unique': int | None, 'top': [[value, count]]}},
+                'entity': {'column', 'measure', 'entities', 'rows': {...},
+                           'measure_sum': {...}, 'top': [{...}]} | None,
+                'time': {name: {'start', 'end', 'bucket_seconds', 'counts',
+                                'busiest_hours': [[hour, count]], 'max_per_hour'}}
+            }
+        """
+        summary = self.numeric.numeric_summary()
+        entity = self._entity_digest()
+        entity_column = entity['column'] if entity else None
+
+        numeric = {}
+        for name, described in summary.items():
+            if described['count'] == 0:
+                continue
+            numeric[name] = self._numeric_digest(name, described)
+
+        categories = {}
+        for name, counts in self._values.items():
+            if name in summary or name == entity_column:
+                continue
+            categories[name] = {
+                'unique': len(counts),
+                'top': [[_plain(value), int(count)] for value, count in counts.nlargest(TOP_K).items()]
+            }
+        for name in self._saturated:
+            if name not in summary and name != entity_column:
+                categories[name] = {'unique': None, 'top': []}
+
+        return {
+            'row_count': self.row_count,
+            'columns': self.numeric.columns,
+            'nulls': {
+                name: int(count)
+                for name, count in (self._nulls if self._nulls is not None else pd.Series(dtype=int)).items()
+                if count
+            },
+            'numeric': numeric,
+            'categories': categories,
+            'entity': entity,
+            'time': {name: self._time_digest(hours) for name, hours in self._hours.items() if len(hours)}
+        }
+
+    def _numeric_digest(self, name: str, described: Dict[str, float]) -> Dict[str, Any]:
+        sample = self.numeric.sample(name)
+        p1, p25, p50, p75, p99 = np.quantile(sample, QUANTILES)
+
+        # Tukey fences; the share of sampled values outside them scales to the full count
+        low, high = p25 - 1.5 * (p75 - p25), p75 + 1.5 * (p75 - p25)
+        outside = float(((sample < low) | (sample > high)).mean())
+        extremes = np.unique(self._extremes.get(name, np.empty(0)))
+        examples = [float(v) for v in extremes if v < low or v > high]
+
+        digest = {
+            'count': int(described['count']),
+            'mean': described['mean'],
+            'std': None if np.isnan(described['std']) else described['std'],
+            'min': described['min'],
+            'p1': float(p1),
+            'p25': float(p25),
+            'p50': float(p50),
+            'p75': float(p75),
+            'p99': float(p99),
+            'max': described['max'],
+            'outliers': {
+                'low': float(low),
+                'high': float(high),
+                'count': int(round(outside * described['count'])),
+                'examples': examples
+            }
+        }
+
+        counts = self._values.get(name)
+        if counts is not None:
+            repeated = counts[counts > 1].nlargest(TOP_K)
+            if len(repeated):
+                digest['top_values'] = [[_plain(value), int(count)] for value, count in repeated.items()]
+        return digest
+
+    def _entity_digest(self) -> Optional[Dict[str, Any]]:
+        # Prefer the first ID column whose entities repeat (skip per-row keys)
+        for name, part in self._entities.items():
+            if len(part) == 0 or len(part) == self.row_count:
+                continue
+
+            digest = {
+                'column': name,
+                'measure': self.measure_column if 'sum' in part.columns else None,
+                'entities': len(part),
+                'rows': self._spread(part['rows'])
+            }
+            rank = 'sum' if 'sum' in part.columns else 'rows'
+            if 'sum' in part.columns:
+                digest['measure_sum'] = self._spread(part['sum'])
+            digest['top'] = [
+                {'id': _plain(entity), **{column: _plain(value) for column, value in row.items()}}
+                for entity, row in part.nlargest(TOP_K, rank).to_dict('index').items()
+            ]
+            return digest
+        return None
+
+    @staticmethod
+    def _spread(values: pd.Series) -> Dict[str, float]:
+        p50, p90 = np.quantile(values.to_numpy(dtype=float), [0.5, 0.9])
+        return {'p50': float(p50), 'p90': float(p90), 'max': float(values.max())}
+
+    @staticmethod
+    def _time_digest(hours: pd.Series) -> Dict[str, Any]:
+        hours = hours.sort_index()
+        start, end = hours.index[0], hours.index[-1]
+        # Index unit varies (ns on pandas 1.x, often s/us on 2+); compare in ns
+        nanos = hours.index.to_numpy(dtype='datetime64[ns]').view('i8')
+        hour = 3600 * 10**9
+        # Counts are per clock hour, so buckets are never narrower than an hour
+        buckets = int(min(TIME_BUCKETS, (nanos[-1] - nanos[0]) // hour + 1))
+        bins = np.linspace(nanos[0], nanos[-1] + hour, buckets + 1)
+        counts, _ = np.histogram(nanos, bins=bins, weights=hours.to_numpy())
+        by_hour = hours.groupby(hours.index.hour).sum()
+        return {
+            'start': start.isoformat(),
+            'end': (end + pd.Timedelta(hours=1)).isoformat(),
+            'bucket_seconds': int((bins[1] - bins[0]) / 10**9),
+            'counts': [int(c) for c in counts],
+            'busiest_hours': [[int(hour), int(count)] for hour, count in by_hour.nlargest(3).items()],
+            'max_per_hour': int(hours.max())
+        }
+
+
+def digest_dataframe(
+    df: pd.DataFrame,
+    entity_column: Optional[str] = None,
+    measure_column: Optional[str] = None
+) -> Dict[str, Any]:
+    """Digest an in-memory dataset in one pass (quantiles are exact)"""
+    builder = DigestBuilder(entity_column, measure_column, sample_size=max(len(df), 1))
+    builder.update(df)
+    return builder.result()
+
+
+def _num(value: Optional[float]) -> str:
+    return 'n/a' if value is None else f"{value:.6g}"
+
+
+def _duration(seconds: int) -> str:
+    for unit, size in (('d', 86400), ('h', 3600), ('m', 60)):
+        if seconds >= size:
+            return f"{seconds / size:.3g}{unit}"
+    return f"{seconds}s"
+
+
+def format_digest(digest: Dict[str, Any]) -> str:
+    """Render a digest as compact prompt text"""
+    lines = [f"Rows: {digest['row_count']}"]
+
+    if digest['numeric']:
+        lines.append("Numeric columns (min / p1 / p25 / median / p75 / p99 / max; mean ± std):")
+        for name, stats in digest['numeric'].items():
+            line = (
+                f"- {name}: " + ' / '.join(_num(stats[key]) for key in ('min', 'p1', 'p25', 'p50', 'p75', 'p99', 'max'))
+                + f"; mean {_num(stats['mean'])} ± {_num(stats['std'])}"
+            )
+            outliers = stats['outliers']
+            if outliers['count']:
+                line += f"; {outliers['count']} outliers outside [{_num(outliers['low'])}, {_num(outliers['high'])}]"
+                if outliers['examples']:
+                    line += f" e.g. {', '.join(_num(v) for v in outliers['examples'])}"
+            if stats.get('top_values'):
+                line += "; most repeated: " + ', '.join(f"{_num(v)} ×{c}" for v, c in stats['top_values'])
+            lines.append(line)
+
+    if digest['categories']:
+        lines.append("Categorical columns (top values with row counts):")
+        for name, stats in digest['categories'].items():
+            if stats['unique'] is None:
+                lines.append(f"- {name}: more than {VALUE_LIMIT} distinct values")
+                continue
+            top = ', '.join(f"{value} {count}" for value, count in stats['top'])
+            lines.append(f"- {name} ({stats['unique']} distinct): {top}")
+
+    entity = digest.get('entity')
+    if entity:
+        lines.append(f"Per {entity['column']} ({entity['entities']} entities):")
+        rows = entity['rows']
+        lines.append(f"- rows each: median {_num(rows['p50'])}, p90 {_num(rows['p90'])}, max {_num(rows['max'])}")
+        if entity.get('measure_sum'):
+            spend = entity['measure_sum']
+            lines.append(
+                f"- {entity['measure']} total each: median {_num(spend['p50'])}, "
+                f"p90 {_num(spend['p90'])}, max {_num(spend['max'])}"
+            )
+        top = []
+        for row in entity['top']:
+            text = f"{row['id']} ({row['rows']} rows"
+            if 'sum' in row:
+                text += f", {entity['measure']} {_num(row['sum'])}, max {_num(row['max'])}"
+            top.append(text + ")")
+        lines.append(f"- top: {'; '.join(top)}")
+
+    for name, stats in digest['time'].items():
+        lines.append(
+            f"Time ({name}): {stats['start']} to {stats['end']}, rows per "
+            f"{_duration(stats['bucket_seconds'])}: {' '.join(str(c) for c in stats['counts'])}; "
+            f"busiest hours of day: {', '.join(f'{h}:00 ×{c}' for h, c in stats['busiest_hours'])}; "
+            f"max {stats['max_per_hour']} in one hour"
+        )
+
+    if digest['nulls']:
+        lines.append("Nulls: " + ', '.join(f"{name} {count}" for name, count in digest['nulls'].items()))
+
+    return '\n'.join(lines)
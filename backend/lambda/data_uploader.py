@@ -4,12 +4,14 @@ Validates and uploads CSV/JSON data to Walrus
 """
 
 import json
+import os
 import csv
 import hashlib
 import pandas as pd
 from typing import Dict, Any, List
 from io import StringIO
 from walrus_uploader import WalrusUploader
+from dataset_profile import profile_dataframe, get_profile_store
 
 
 class DataUploader:
@@ -17,6 +19,8 @@ class DataUploader:
 
     def __init__(self):
         self.walrus = WalrusUploader()
+        # Larger datasets are meant for chunked execution; 0 disables the limit
+        self.max_rows = int(os.getenv('DATA_MAX_ROWS', '100000'))
 
     def upload_data(
         self,
@@ -34,6 +38,7 @@ class DataUploader:
             {
                 'blob_id': str,
                 'content_hash': str,
+                'encoding': str,
                 'row_count': int,
                 'schema': Dict,
                 'validation': Dict
@@ -50,8 +55,9 @@ class DataUploader:
                     'validation': validation
                 }
 
-            # 2. Generate schema
-            schema = self._generate_schema(df)
+            # 2. Generate schema (from the profile that executors reuse later)
+            profile = profile_dataframe(df)
+            schema = self._generate_schema(df, profile)
 
             # 3. Prepare for upload
             upload_data = {
@@ -65,9 +71,13 @@ class DataUploader:
             # 4. Upload to Walrus
             upload_result = self.walrus.upload_blob(upload_data)
 
+            # 5. Keep the profile so executions skip re-profiling this blob
+            get_profile_store().put(upload_result['blob_id'], profile)
+
             return {
                 'blob_id': upload_result['blob_id'],
                 'content_hash': upload_result['content_hash'],
+                'encoding': upload_result['encoding'],
                 'aggregator_url': upload_result['aggregator_url'],
                 'row_count': len(df),
                 'column_count': len(df.columns),
@@ -131,10 +141,9 @@ class DataUploader:
                 validation['checks']['has_columns'] = True
 
             # Check 3: Row limit (prevent abuse)
-            MAX_ROWS = 100000
-            if len(df) > MAX_ROWS:
+            if self.max_rows and len(df) > self.max_rows:
                 validation['is_valid'] = False
-                validation['errors'].append(f'Too many rows (max {MAX_ROWS})')
+                validation['errors'].append(f'Too many rows (max {self.max_rows})')
             else:
                 validation['checks']['within_row_limit'] = True
 
@@ -154,31 +163,17 @@ class DataUploader:
             validation['errors'].append(f'Parsing error: {str(e)}')
             return None, validation
 
-    def _generate_schema(self, df: pd.DataFrame) -> Dict[str, Any]:
-        """Generate schema from DataFrame"""
+    def _generate_schema(self, df: pd.DataFrame, profile: Dict[str, Any] = None) -> Dict[str, Any]:
+        """Generate schema from DataFrame (types, null/unique counts, numeric min/max/mean)"""
+
+        profile = profile or profile_dataframe(df)
 
-        schema = {
-            'columns': {},
+        return {
+            'columns': profile['column_stats'],
             'row_count': len(df),
             'column_count': len(df.columns)
         }
 
-        for col in df.columns:
-            dtype = str(df[col].dtype)
-            schema['columns'][col] = {
-                'type': dtype,
-                'null_count': int(df[col].isnull().sum()),
-                'unique_count': int(df[col].nunique()),
-            }
-
-            # Add stats for numeric columns
-            if df[col].dtype in ['int64', 'float64']:
-                schema['columns'][col]['min'] = float(df[col].min())
-                schema['columns'][col]['max'] = float(df[col].max())
-                schema['columns'][col]['mean'] = float(df[col].mean())
-
-        return schema
-
     def _detect_pii(self, df: pd.DataFrame) -> List[str]:
         """Detect potential PII in column names"""
 
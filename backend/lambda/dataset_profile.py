@@ -0,0 +1,205 @@
+"""
+Dataset Profiles
+Column statistics computed once per data blob and reused by every reader
+"""
+
+import os
+import json
+import time
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Dict, Any, Callable, Iterator, List, Optional
+
+import pandas as pd
+
+try:
+    from .local_state import state_path
+    from .csv_stream import CsvStream
+except ImportError:
+    from local_state import state_path
+    from csv_stream import CsvStream
+
+
+# Bump when the profile layout changes so older entries are recomputed
+PROFILE_VERSION = '1'
+
+
+def profile_dataframe(df: pd.DataFrame) -> Dict[str, Any]:
+    """
+    Compute the profile of a dataset
+
+    One describe() call feeds both the numeric summary and the per-column
+    min/max/mean, and null/unique counts are computed for all columns at once.
+
+    Returns:
+        {
+            'row_count': int,
+            'column_count': int,
+            'columns': [str],
+            'column_stats': {name: {'type', 'null_count', 'unique_count',
+                                    'min', 'max', 'mean'}},  # DataUploader schema layout
+            'numeric_summary': {name: {...}}                 # DataFrame.describe() layout
+        }
+    """
+    numeric_summary = {}
+    if len(df.select_dtypes(include='number').columns) > 0:
+        numeric_summary = df.describe().to_dict()
+
+    null_counts = df.isnull().sum()
+    unique_counts = _unique_counts(df)
+
+    column_stats = {}
+    for name in df.columns:
+        dtype = df[name].dtype
+        stats = {
+            'type': str(dtype),
+            'null_count': int(null_counts[name]),
+            'unique_count': int(unique_counts[name])
+        }
+        if dtype in ['int64', 'float64']:
+            described = numeric_summary[name]
+            stats['min'] = float(described['min'])
+            stats['max'] = float(described['max'])
+            stats['mean'] = float(described['mean'])
+        column_stats[name] = stats
+
+    return {
+        'row_count': len(df),
+        'column_count': len(df.columns),
+        'columns': list(df.columns),
+        'column_stats': column_stats,
+        'numeric_summary': numeric_summary
+    }
+
+
+def _unique_counts(df: pd.DataFrame) -> Dict[str, int]:
+    try:
+        return df.nunique().to_dict()
+    except TypeError:
+        # Nested values (lists, dicts) are unhashable; count them by their JSON text
+        counts = {}
+        for name in df.columns:
+            try:
+                counts[name] = df[name].nunique()
+            except TypeError:
+                counts[name] = df[name].dropna().map(lambda v: json.dumps(v, sort_keys=True, default=str)).nunique()
+        return counts
+
+
+def csv_rows_frame(rows: List[Dict[str, str]]) -> pd.DataFrame:
+    """Build a DataFrame from parsed CSV rows, making columns whose values all parse as numbers numeric"""
+    df = pd.DataFrame(rows)
+    for name in df.columns:
+        values = df[name].mask(df[name] == '')
+        converted = pd.to_numeric(values, errors='coerce')
+        if converted.notna().sum() == values.notna().sum():
+            df[name] = converted
+    return df
+
+
+def profile_csv_rows(rows: List[Dict[str, str]]) -> Dict[str, Any]:
+    """Profile parsed CSV rows (see csv_rows_frame for typing)"""
+    return profile_dataframe(csv_rows_frame(rows))
+
+
+def parse_text(content: str) -> Optional[pd.DataFrame]:
+    """Parse a blob's text as JSON rows or CSV; None if it is neither"""
+    stripped = content.lstrip()
+    try:
+        if stripped.startswith('[') or stripped.startswith('{'):
+            data = json.loads(content)
+            if isinstance(data, dict):
+                data = data['data'] if isinstance(data.get('data'), list) else [data]
+            return pd.DataFrame(data)
+
+        return csv_rows_frame(list(CsvStream([content.encode('utf-8')])))
+    except (ValueError, TypeError):
+        return None
+
+
+def format_profile(profile: Dict[str, Any]) -> str:
+    """Render a profile as compact prompt text: one line per column"""
+    lines = [f"- Rows: {profile['row_count']}"]
+    column_stats = profile.get('column_stats', {})
+    for name in profile['columns']:
+        stats = column_stats.get(name)
+        if stats is None:
+            lines.append(f"- {name}")
+            continue
+        line = f"- {name} ({stats['type']}): {stats['null_count']} nulls, {stats['unique_count']} unique"
+        if 'mean' in stats:
+            line += f", min {stats['min']:g}, max {stats['max']:g}, mean {stats['mean']:g}"
+        lines.append(line)
+    return '\n'.join(lines)
+
+
+class DatasetProfileStore:
+    """
+    Persistent map from data blob ID to its profile
+
+    Walrus blobs are immutable, so a profile never goes stale; it is
+    written when DataUploader uploads a dataset, or by the first reader
+    that has the parsed data at hand.
+    """
+
+    def __init__(self, db_path: Optional[str] = None):
+        self.db_path = db_path or os.getenv('DATASET_PROFILE_PATH') or state_path('dataset-profiles.db')
+
+        with self._connect() as conn:
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS profiles (
+                    blob_id TEXT NOT NULL,
+                    version TEXT NOT NULL,
+                    profile TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    PRIMARY KEY (blob_id, version)
+                )"""
+            )
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def get(self, blob_id: str) -> Optional[Dict[str, Any]]:
+        """Return the stored profile, or None"""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT profile FROM profiles WHERE blob_id = ? AND version = ?",
+                (blob_id, PROFILE_VERSION)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put(self, blob_id: str, profile: Dict[str, Any]) -> None:
+        """Store a profile (see profile_dataframe for the layout)"""
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO profiles (blob_id, version, profile, created_at) VALUES (?, ?, ?, ?)",
+                (blob_id, PROFILE_VERSION, json.dumps(profile, default=str), time.time())
+            )
+
+    def get_or_compute(self, blob_id: str, compute: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+        """Return the stored profile, computing and storing it on a miss"""
+        profile = self.get(blob_id)
+        if profile is None:
+            profile = compute()
+            self.put(blob_id, profile)
+        return profile
+
+
+_default_store: Optional[DatasetProfileStore] = None
+_default_store_lock = threading.Lock()
+
+
+def get_profile_store() -> DatasetProfileStore:
+    """Get the process-wide dataset profile store"""
+    global _default_store
+    with _default_store_lock:
+        if _default_store is None:
+            _default_store = DatasetProfileStore()
+        return _default_store
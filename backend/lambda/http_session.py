@@ -0,0 +1,101 @@
+"""
+Shared HTTP Session
+Pooled keep-alive connections for Walrus publisher/aggregator traffic
+"""
+
+import os
+import time
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from typing import Dict, List, Optional, Tuple
+
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+
+def _build_session() -> requests.Session:
+    """Build a session with per-host connection pools"""
+    pool_connections = int(os.getenv('WALRUS_HTTP_POOL_CONNECTIONS', '4'))
+    pool_maxsize = int(os.getenv('WALRUS_HTTP_POOL_MAXSIZE', '32'))
+
+    # Retry only idempotent reads; a retried PUT would store the blob twice
+    retry = Retry(
+        total=int(os.getenv('WALRUS_HTTP_RETRIES', '2')),
+        backoff_factor=0.2,
+        status_forcelist=[502, 503, 504],
+        allowed_methods=frozenset(['GET', 'HEAD'])
+    )
+
+    adapter = HTTPAdapter(
+        pool_connections=pool_connections,
+        pool_maxsize=pool_maxsize,
+        max_retries=retry,
+        pool_block=False
+    )
+
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    session.headers.update({'Connection': 'keep-alive'})
+    return session
+
+
+def get_http_session() -> requests.Session:
+    """
+    Get the process-wide HTTP session
+
+    Module-level state survives between warm AWS Lambda invocations, so
+    handlers reuse open connections as long as the container lives.
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = _build_session()
+        return _session
+
+
+def http_timeout(read_timeout: Optional[float] = None) -> Tuple[float, float]:
+    """
+    Return a (connect, read) timeout tuple
+
+    Connect fails fast so a dead host does not hold a pool slot; the read
+    timeout can be raised for large uploads.
+    """
+    connect_timeout = float(os.getenv('WALRUS_HTTP_CONNECT_TIMEOUT', '3.05'))
+    if read_timeout is None:
+        read_timeout = float(os.getenv('WALRUS_HTTP_READ_TIMEOUT', '30'))
+    return (connect_timeout, read_timeout)
+
+
+def warm_up_connections(urls: List[str]) -> Dict[str, Dict[str, float]]:
+    """
+    Open pooled connections to each host ahead of the first real request
+
+    Args:
+        urls: Base URLs (publisher, aggregator) to connect to
+
+    Returns:
+        {url: {'status': int, 'elapsed_ms': float}} (status 0 on failure)
+    """
+    session = get_http_session()
+    results = {}
+
+    for url in urls:
+        start_time = time.time()
+        try:
+            # Any response (even 404) leaves a TLS connection in the pool
+            response = session.head(url, timeout=http_timeout(5), allow_redirects=False)
+            status = response.status_code
+        except requests.RequestException as e:
+            print(f"⚠️ Connection warm-up failed for {url}: {e}")
+            status = 0
+
+        results[url] = {
+            'status': status,
+            'elapsed_ms': (time.time() - start_time) * 1000
+        }
+
+    return results
@@ -0,0 +1,339 @@
+"""
+Job Queue
+Persistent background job queue with a bounded worker pool
+"""
+
+import os
+import json
+import time
+import uuid
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Dict, Any, Callable, Iterator, List, Optional
+
+try:
+    from .local_state import state_path
+    from .metrics import get_metrics
+except ImportError:
+    from local_state import state_path
+    from metrics import get_metrics
+
+
+JobHandler = Callable[[Dict[str, Any]], Dict[str, Any]]
+
+STATUS_QUEUED = 'queued'
+STATUS_RUNNING = 'running'
+STATUS_SUCCEEDED = 'succeeded'
+STATUS_FAILED = 'failed'
+
+
+class JobQueue:
+    """
+    SQLite-backed job queue processed by a fixed number of worker threads
+
+    Jobs are stored before submit() returns, so queued work survives a
+    restart; jobs that were running when the process died are queued again
+    on start(), so one queue file should be served by one process at a time.
+    A job that has already been started max_attempts times (e.g. one that
+    crashes the process) is failed instead of being queued again.
+    """
+
+    def __init__(
+        self,
+        db_path: Optional[str] = None,
+        workers: Optional[int] = None,
+        retention_seconds: Optional[float] = None,
+        max_attempts: Optional[int] = None
+    ):
+        self.db_path = db_path or os.getenv('JOB_QUEUE_PATH') or state_path('jobs.db')
+        self.workers = workers or int(os.getenv('JOB_WORKERS', '4'))
+        # Finished jobs are kept this long so clients can still fetch results
+        self.retention_seconds = retention_seconds or float(os.getenv('JOB_RETENTION_SECONDS', str(7 * 24 * 3600)))
+        self.max_attempts = max_attempts or int(os.getenv('JOB_MAX_ATTEMPTS', '3'))
+
+        self._handlers: Dict[str, JobHandler] = {}
+        self._wakeup = threading.Condition()
+        self._threads: List[threading.Thread] = []
+        self._stopping = False
+
+        metrics = get_metrics()
+        self._depth = metrics.gauge('walrus_job_queue_depth', 'Jobs by status')
+        self._wait = metrics.histogram('walrus_job_wait_seconds', 'Time jobs spend queued before a worker picks them up')
+        self._run = metrics.histogram('walrus_job_run_seconds', 'Time workers spend running jobs')
+
+        with self._connect() as conn:
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    kind TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    result TEXT,
+                    error TEXT,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    created_at REAL NOT NULL,
+                    started_at REAL,
+                    finished_at REAL
+                )"""
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_status_created ON jobs (status, created_at)")
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def register(self, kind: str, handler: JobHandler) -> None:
+        """Set the function that runs jobs of a kind; it returns the job result"""
+        self._handlers[kind] = handler
+
+    def start(self) -> None:
+        """Requeue interrupted jobs and start the workers (idempotent)"""
+        with self._wakeup:
+            if self._threads:
+                return
+
+            self._recover()
+
+            self._stopping = False
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._work, name=f"job-worker-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+        self._update_depth()
+
+    def _recover(self) -> None:
+        """Requeue jobs left running by a dead process (failing those out of attempts) and drop expired ones"""
+        with self._connect() as conn:
+            abandoned = conn.execute(
+                """UPDATE jobs SET status = ?, error = ?, finished_at = ?
+                   WHERE status = ? AND attempts >= ?""",
+                (
+                    STATUS_FAILED,
+                    f"Interrupted {self.max_attempts} times; not retried (JOB_MAX_ATTEMPTS)",
+                    time.time(),
+                    STATUS_RUNNING,
+                    self.max_attempts
+                )
+            ).rowcount
+            requeued = conn.execute(
+                "UPDATE jobs SET status = ?, started_at = NULL WHERE status = ?",
+                (STATUS_QUEUED, STATUS_RUNNING)
+            ).rowcount
+            conn.execute(
+                "DELETE FROM jobs WHERE finished_at IS NOT NULL AND finished_at < ?",
+                (time.time() - self.retention_seconds,)
+            )
+        if requeued:
+            print(f"Requeued {requeued} interrupted job(s)")
+        if abandoned:
+            print(f"⚠️ Failed {abandoned} job(s) interrupted {self.max_attempts} times")
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Stop the workers after their current jobs; queued jobs stay queued"""
+        with self._wakeup:
+            self._stopping = True
+            self._wakeup.notify_all()
+            threads, self._threads = self._threads, []
+        for thread in threads:
+            thread.join(timeout)
+
+    def submit(self, kind: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Queue a job
+
+        Returns:
+            The job record (see get)
+        """
+        if kind not in self._handlers:
+            raise ValueError(f"Unknown job kind: {kind}")
+
+        job_id = uuid.uuid4().hex
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, kind, payload, status, created_at) VALUES (?, ?, ?, ?, ?)",
+                (job_id, kind, json.dumps(payload), STATUS_QUEUED, time.time())
+            )
+
+        with self._wakeup:
+            self._wakeup.notify()
+        self._update_depth()
+        return self.get(job_id)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a job
+
+        Returns:
+            {
+                'job_id': str,
+                'kind': str,
+                'status': 'queued' | 'running' | 'succeeded' | 'failed',
+                'queue_position': int,       # while queued; 0 = next
+                'result': Dict,              # when succeeded
+                'error': str,                # when failed
+                'attempts': int,             # times a worker has started it
+                'created_at': float,         # unix time
+                'started_at': float,
+                'finished_at': float,
+                'wait_ms': int,              # once started
+                'run_ms': int                # once finished
+            }
+            or None if there is no such job
+        """
+        with self._connect() as conn:
+            row = conn.execute(
+                """SELECT id, kind, status, result, error, attempts, created_at, started_at, finished_at
+                   FROM jobs WHERE id = ?""",
+                (job_id,)
+            ).fetchone()
+            if row is None:
+                return None
+
+            job_id, kind, status, result, error, attempts, created_at, started_at, finished_at = row
+            job = {
+                'job_id': job_id,
+                'kind': kind,
+                'status': status,
+                'attempts': attempts,
+                'created_at': created_at,
+                'started_at': started_at,
+                'finished_at': finished_at
+            }
+
+            if status == STATUS_QUEUED:
+                job['queue_position'] = conn.execute(
+                    "SELECT COUNT(*) FROM jobs WHERE status = ? AND created_at < ?",
+                    (STATUS_QUEUED, created_at)
+                ).fetchone()[0]
+
+        if started_at is not None:
+            job['wait_ms'] = int((started_at - created_at) * 1000)
+        if finished_at is not None:
+            job['run_ms'] = int((finished_at - started_at) * 1000)
+        if result is not None:
+            job['result'] = json.loads(result)
+        if error is not None:
+            job['error'] = error
+        return job
+
+    def stats(self) -> Dict[str, Any]:
+        """Job counts by status and the age of the oldest queued job"""
+        with self._connect() as conn:
+            counts = dict(conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+            oldest = conn.execute(
+                "SELECT MIN(created_at) FROM jobs WHERE status = ?", (STATUS_QUEUED,)
+            ).fetchone()[0]
+
+        return {
+            'workers': self.workers,
+            **{status: counts.get(status, 0) for status in (STATUS_QUEUED, STATUS_RUNNING, STATUS_SUCCEEDED, STATUS_FAILED)},
+            'oldest_queued_age_ms': int((time.time() - oldest) * 1000) if oldest is not None else 0
+        }
+
+    def _update_depth(self) -> None:
+        counts = self.stats()
+        for status in (STATUS_QUEUED, STATUS_RUNNING):
+            self._depth.set(counts[status], status=status)
+
+    def _claim(self) -> Optional[Dict[str, Any]]:
+        """Atomically move the oldest queued job to running"""
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute(
+                    """SELECT id, kind, payload, created_at FROM jobs
+                       WHERE status = ? ORDER BY created_at LIMIT 1""",
+                    (STATUS_QUEUED,)
+                ).fetchone()
+                if row is None:
+                    conn.execute("COMMIT")
+                    return None
+
+                started_at = time.time()
+                conn.execute(
+                    "UPDATE jobs SET status = ?, started_at = ?, attempts = attempts + 1 WHERE id = ?",
+                    (STATUS_RUNNING, started_at, row[0])
+                )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+        job_id, kind, payload, created_at = row
+        return {
+            'job_id': job_id,
+            'kind': kind,
+            'payload': json.loads(payload),
+            'created_at': created_at,
+            'started_at': started_at
+        }
+
+    def _finish(self, job_id: str, result: Optional[Dict[str, Any]], error: Optional[str]) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ? WHERE id = ?",
+                (
+                    STATUS_FAILED if error is not None else STATUS_SUCCEEDED,
+                    json.dumps(result) if result is not None else None,
+                    error,
+                    time.time(),
+                    job_id
+                )
+            )
+
+    def _work(self) -> None:
+        """Worker loop: claim, run, record; sleep until notified when idle"""
+        # Other processes sharing the file cannot notify us, so poll as well
+        poll_seconds = float(os.getenv('JOB_POLL_SECONDS', '1'))
+
+        while True:
+            with self._wakeup:
+                if self._stopping:
+                    return
+
+            try:
+                job = self._claim()
+            except sqlite3.Error as e:
+                print(f"Job queue error: {str(e)}")
+                job = None
+
+            if job is None:
+                with self._wakeup:
+                    if not self._stopping:
+                        self._wakeup.wait(poll_seconds)
+                continue
+
+            self._run_job(job)
+
+    def _run_job(self, job: Dict[str, Any]) -> None:
+        kind = job['kind']
+        self._wait.observe(job['started_at'] - job['created_at'], kind=kind)
+        try:
+            self._update_depth()
+        except sqlite3.Error as e:
+            print(f"Job queue error: {str(e)}")
+
+        result, error = None, None
+        try:
+            handler = self._handlers.get(kind)
+            if handler is None:
+                raise ValueError(f"Unknown job kind: {kind}")
+            result = handler(job['payload'])
+        except Exception as e:
+            print(f"Job {job['job_id']} failed: {str(e)}")
+            error = str(e) or type(e).__name__
+
+        status = STATUS_FAILED if error is not None else STATUS_SUCCEEDED
+        self._run.observe(time.time() - job['started_at'], kind=kind, status=status)
+        # A job left 'running' here is requeued the next time the queue starts
+        try:
+            self._finish(job['job_id'], result, error)
+            self._update_depth()
+        except sqlite3.Error as e:
+            print(f"Job queue error: {str(e)}")
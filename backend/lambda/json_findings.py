@@ -0,0 +1,112 @@
+"""
+Streaming JSON Findings
+Pull complete elements out of a JSON array while the model is still writing it
+"""
+
+import re
+import json
+from typing import Any, List, Optional
+
+
+class FindingsExtractor:
+    """
+    Incremental extractor for one array in a JSON document fed as text deltas
+
+    feed() takes each streamed chunk of the AI response and returns the
+    array elements (by default of "findings") that became complete with it,
+    so a client can show the first finding while the rest is still being
+    generated. Text before the array (markdown fences, the summary) is
+    skipped; elements that are not valid JSON on their own are dropped.
+    """
+
+    # How far back to re-scan for the key when it straddles two chunks
+    _KEY_OVERLAP = 64
+
+    def __init__(self, key: str = 'findings'):
+        self._key = re.compile(r'"%s"\s*:\s*\[' % re.escape(key))
+        self._buffer = ''
+        self._pos = 0
+        self._in_array = False
+        self._done = False
+
+        # Scanner state inside the array
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._start: Optional[int] = None
+        self.count = 0
+
+    @property
+    def done(self) -> bool:
+        """Whether the array has been closed"""
+        return self._done
+
+    def feed(self, text: str) -> List[Any]:
+        """Add a chunk of the response; return the elements it completed"""
+        if self._done or not text:
+            return []
+
+        self._buffer += text
+        if not self._in_array:
+            match = self._key.search(self._buffer, self._pos)
+            if match is None:
+                self._pos = max(0, len(self._buffer) - self._KEY_OVERLAP)
+                return []
+            self._in_array = True
+            self._pos = match.end()
+
+        return self._scan()
+
+    def _emit(self, end: int, items: List[Any]):
+        try:
+            items.append(json.loads(self._buffer[self._start:end]))
+            self.count += 1
+        except json.JSONDecodeError:
+            pass
+        self._start = None
+
+    def _scan(self) -> List[Any]:
+        items: List[Any] = []
+        buffer = self._buffer
+        i = self._pos
+        while i < len(buffer):
+            c = buffer[i]
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif c == '\\':
+                    self._escaped = True
+                elif c == '"':
+                    self._in_string = False
+                    if self._depth == 0:
+                        self._emit(i + 1, items)
+            elif c == '"':
+                self._in_string = True
+                if self._start is None:
+                    self._start = i
+            elif c in '{[':
+                if self._start is None:
+                    self._start = i
+                self._depth += 1
+            elif c in '}]' and self._depth > 0:
+                self._depth -= 1
+                if self._depth == 0:
+                    self._emit(i + 1, items)
+            elif self._depth == 0 and c in '],':
+                # End of a scalar element, or of the array itself
+                if self._start is not None:
+                    self._emit(i, items)
+                if c == ']':
+                    self._done = True
+                    break
+            elif not c.isspace() and self._start is None:
+                self._start = i
+            i += 1
+
+        # Drop what has been consumed, keeping an open element intact
+        keep = self._start if self._start is not None else i
+        self._buffer = buffer[keep:]
+        if self._start is not None:
+            self._start = 0
+        self._pos = i - keep
+        return items
@@ -0,0 +1,164 @@
+"""
+Streaming JSON Rows
+Incrementally extract data rows from a JSON blob without loading it whole
+"""
+
+import re
+import json
+import codecs
+from typing import Any, Dict, Iterable, Iterator, List
+
+import pandas as pd
+
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+_SEPARATOR = re.compile(r'[ \t\n\r]*([,\]])[ \t\n\r]*')
+
+
+class _JsonReader:
+    """Buffered reader that decodes one JSON value at a time from byte chunks"""
+
+    READ_SIZE = 64 * 1024
+
+    def __init__(self, chunks: Iterable[bytes]):
+        self._chunks = iter(chunks)
+        self._utf8 = codecs.getincrementaldecoder('utf-8-sig')()
+        self._decoder = json.JSONDecoder()
+        self._buffer = ''
+        self._pos = 0
+        self._eof = False
+
+    def _fill(self) -> bool:
+        """Append at least READ_SIZE more characters to the buffer; False at end of input"""
+        if self._pos:
+            self._buffer = self._buffer[self._pos:]
+            self._pos = 0
+
+        # Reading in large steps keeps re-scans of a partial value rare
+        parts = []
+        size = 0
+        for chunk in self._chunks:
+            text = self._utf8.decode(chunk)
+            parts.append(text)
+            size += len(text)
+            if size >= self.READ_SIZE:
+                break
+        else:
+            if not self._eof:
+                self._eof = True
+                parts.append(self._utf8.decode(b'', final=True))
+
+        added = ''.join(parts)
+        self._buffer += added
+        return bool(added)
+
+    def peek(self) -> str:
+        """Return the next non-whitespace character without consuming it ('' at end)"""
+        while True:
+            self._pos = _WHITESPACE.match(self._buffer, self._pos).end()
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not self._fill():
+                return ''
+
+    def expect(self, char: str):
+        if self.peek() != char:
+            raise ValueError(f"Malformed JSON data: expected '{char}'")
+        self._pos += 1
+
+    def value(self) -> Any:
+        """Decode the next complete JSON value"""
+        self.peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError:
+                if self._fill():
+                    continue
+                raise ValueError("Malformed or truncated JSON data")
+
+            # A number ending exactly at the buffer edge may continue in the next chunk
+            if end == len(self._buffer) and not self._eof and self._fill():
+                continue
+
+            self._pos = end
+            return value
+
+    def array_items(self) -> Iterator[Any]:
+        """Decode the elements of the array starting at the current position"""
+        self.expect('[')
+        if self.peek() == ']':
+            self._pos += 1
+            return
+
+        # Hot loop: one C scanner call and one regex match per element
+        scan_once = self._decoder.scan_once
+        while True:
+            buffer, pos = self._buffer, self._pos
+            try:
+                value, end = scan_once(buffer, pos)
+                separator = _SEPARATOR.match(buffer, end)
+            except (StopIteration, json.JSONDecodeError):
+                separator = None
+            if separator is None or (separator.end() == len(buffer) and not self._eof):
+                # Element or separator continues in the next chunk
+                if self._fill():
+                    continue
+                if separator is None:
+                    raise ValueError("Malformed or truncated JSON data")
+
+            self._pos = separator.end()
+            yield value
+            if separator.group(1) == ']':
+                return
+
+
+def iter_json_rows(chunks: Iterable[bytes]) -> Iterator[Any]:
+    """
+    Yield the data rows of a JSON blob one at a time
+
+    Accepts the same layouts as RulesetExecutor._parse_data: a top-level
+    array of rows, an object with a 'data' array (DataUploader's format),
+    or a single row object. Only one row is decoded at a time, so memory
+    does not grow with the blob size.
+
+    Raises:
+        ValueError: For CSV-string blobs or malformed JSON
+    """
+    reader = _JsonReader(chunks)
+    first = reader.peek()
+
+    if first == '[':
+        yield from reader.array_items()
+        return
+
+    if first != '{':
+        raise ValueError("Chunked execution needs JSON row data (an array or {'data': [...]})")
+
+    # Walk the top-level object; small fields are kept in case there is no 'data'
+    reader.expect('{')
+    fields: Dict[str, Any] = {}
+    while reader.peek() != '}':
+        key = reader.value()
+        reader.expect(':')
+        if key == 'data' and reader.peek() == '[':
+            yield from reader.array_items()
+            return
+        fields[key] = reader.value()
+        if reader.peek() == ',':
+            reader.expect(',')
+
+    # No 'data' array: the object is a single row
+    yield fields
+
+
+def iter_row_batches(rows: Iterable[Any], batch_rows: int) -> Iterator[pd.DataFrame]:
+    """Group rows into DataFrames of at most batch_rows rows"""
+    batch: List[Any] = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_rows:
+            yield pd.DataFrame(batch)
+            batch = []
+    if batch:
+        yield pd.DataFrame(batch)
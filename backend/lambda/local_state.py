@@ -0,0 +1,23 @@
+"""
+Local State Directory
+Resolves where caches and indexes are kept on the local filesystem
+"""
+
+import os
+import tempfile
+
+
+def state_path(*parts: str) -> str:
+    """
+    Return a path inside the local state directory, creating parent dirs
+
+    Uses WALRUS_STATE_DIR when set, otherwise a folder under the system temp
+    dir (the only writable location on AWS Lambda).
+    """
+    base_dir = os.getenv(
+        'WALRUS_STATE_DIR',
+        os.path.join(tempfile.gettempdir(), 'walrus-insight')
+    )
+    path = os.path.join(base_dir, *parts)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return path
@@ -0,0 +1,269 @@
+"""
+Execution Metrics
+Per-stage timers for a single run and process-wide Prometheus histograms
+"""
+
+import time
+import threading
+import contextvars
+from contextlib import contextmanager
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+
+
+# Latency buckets in seconds: sub-millisecond parsing up to multi-minute model calls
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Optional[Dict[str, Any]]) -> LabelKey:
+    return tuple(sorted((str(k), str(v)) for k, v in (labels or {}).items()))
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(key: LabelKey, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(key) + ([extra] if extra else [])
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class Counter:
+    """Monotonic counter with labels"""
+
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help_text = help_text
+        self._values: Dict[LabelKey, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, value: float = 1, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(key)} {_format_value(value)}")
+        return lines
+
+
+class Gauge:
+    """Value that can go up and down, with labels"""
+
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help_text = help_text
+        self._values: Dict[LabelKey, float] = {}
+        self._lock = threading.Lock()
+
+    def set(self, value: float, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} gauge"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(key)} {_format_value(value)}")
+        return lines
+
+
+class Histogram:
+    """Cumulative-bucket histogram with labels, in the Prometheus layout"""
+
+    def __init__(self, name: str, help_text: str, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(sorted(buckets))
+        # label key -> [per-bucket counts..., +Inf count], sum
+        self._series: Dict[LabelKey, Tuple[List[int], List[float]]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            counts, total = self._series.setdefault(key, ([0] * (len(self.buckets) + 1), [0.0]))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            else:
+                counts[-1] += 1
+            total[0] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, (counts, total) in sorted(self._series.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets, counts):
+                    cumulative += count
+                    lines.append(f"{self.name}_bucket{_format_labels(key, ('le', _format_value(bound)))} {cumulative}")
+                cumulative += counts[-1]
+                lines.append(f"{self.name}_bucket{_format_labels(key, ('le', '+Inf'))} {cumulative}")
+                lines.append(f"{self.name}_sum{_format_labels(key)} {_format_value(total[0])}")
+                lines.append(f"{self.name}_count{_format_labels(key)} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """Named counters and histograms for this process"""
+
+    def __init__(self):
+        self._metrics: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def counter(self, name: str, help_text: str) -> Counter:
+        with self._lock:
+            return self._metrics.setdefault(name, Counter(name, help_text))
+
+    def gauge(self, name: str, help_text: str) -> Gauge:
+        with self._lock:
+            return self._metrics.setdefault(name, Gauge(name, help_text))
+
+    def histogram(self, name: str, help_text: str, buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        with self._lock:
+            return self._metrics.setdefault(name, Histogram(name, help_text, buckets))
+
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)"""
+        with self._lock:
+            metrics = [self._metrics[name] for name in sorted(self._metrics)]
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+_registry = MetricsRegistry()
+
+
+def get_metrics() -> MetricsRegistry:
+    """Get the process-wide metrics registry"""
+    return _registry
+
+
+class _Stage:
+    """Handle yielded by StageTimer.stage; set .bytes to record a byte count"""
+
+    def __init__(self):
+        self.bytes: Optional[int] = None
+
+
+class StageTimer:
+    """
+    Wall-clock time and byte counts for the stages of one execution
+
+    Stages can be timed with the stage() context manager or recorded
+    directly (e.g. for work done on another thread). Repeated stages add up.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        # name -> {'seconds': float, 'bytes': int (only for stages that move data)}
+        self.stages: Dict[str, Dict[str, float]] = {}
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[_Stage]:
+        handle = _Stage()
+        start = time.perf_counter()
+        try:
+            yield handle
+        finally:
+            self.record(name, time.perf_counter() - start, handle.bytes)
+
+    def record(self, name: str, seconds: float, nbytes: Optional[int] = None):
+        entry = self.stages.setdefault(name, {'seconds': 0.0})
+        entry['seconds'] += seconds
+        if nbytes is not None:
+            entry['bytes'] = entry.get('bytes', 0) + int(nbytes)
+
+    def merge(self, other: 'StageTimer'):
+        """Add the stages timed by other (e.g. on another thread) to this timer"""
+        for name, entry in other.stages.items():
+            self.record(name, entry['seconds'], entry.get('bytes'))
+
+    def copy(self) -> 'StageTimer':
+        other = StageTimer()
+        other.started = self.started
+        other.stages = {name: dict(entry) for name, entry in self.stages.items()}
+        return other
+
+    def to_dict(self, **extra: int) -> Dict[str, Any]:
+        stages = {}
+        for name, entry in self.stages.items():
+            stages[name] = {'ms': int(round(entry['seconds'] * 1000))}
+            if 'bytes' in entry:
+                stages[name]['bytes'] = entry['bytes']
+        return {
+            'stages': stages,
+            **extra,
+            'total_ms': int((time.perf_counter() - self.started) * 1000)
+        }
+
+    def publish(self, rule_type: str, status: str = 'success', registry: Optional[MetricsRegistry] = None):
+        """Add this run to the per-rule-type latency histograms and byte counters"""
+        registry = registry or get_metrics()
+        stage_seconds = registry.histogram(
+            'walrus_ruleset_stage_seconds',
+            'Time spent in each ruleset execution stage'
+        )
+        stage_bytes = registry.counter(
+            'walrus_ruleset_stage_bytes_total',
+            'Bytes moved by each ruleset execution stage'
+        )
+        for name, entry in self.stages.items():
+            stage_seconds.observe(entry['seconds'], rule_type=rule_type, stage=name)
+            if 'bytes' in entry:
+                stage_bytes.inc(entry['bytes'], rule_type=rule_type, stage=name)
+
+        registry.histogram(
+            'walrus_ruleset_execution_seconds',
+            'End-to-end ruleset execution time'
+        ).observe(time.perf_counter() - self.started, rule_type=rule_type, status=status)
+        registry.counter(
+            'walrus_ruleset_executions_total',
+            'Ruleset executions by outcome'
+        ).inc(rule_type=rule_type, status=status)
+
+
+_current_timer: contextvars.ContextVar[Optional[StageTimer]] = contextvars.ContextVar('stage_timer', default=None)
+
+
+@contextmanager
+def use_timer(timer: StageTimer) -> Iterator[StageTimer]:
+    """Make `timer` the target of stage() for the current thread/context"""
+    token = _current_timer.set(timer)
+    try:
+        yield timer
+    finally:
+        _current_timer.reset(token)
+
+
+@contextmanager
+def stage(name: str) -> Iterator[_Stage]:
+    """Time a stage into the current StageTimer (no-op outside use_timer)"""
+    timer = _current_timer.get()
+    if timer is None:
+        yield _Stage()
+        return
+    with timer.stage(name) as handle:
+        yield handle
+
+
+def record_stage(name: str, seconds: float, nbytes: Optional[int] = None):
+    """Record a stage timed elsewhere (e.g. on a worker thread) into the current StageTimer"""
+    timer = _current_timer.get()
+    if timer is not None:
+        timer.record(name, seconds, nbytes)
@@ -0,0 +1,128 @@
+"""
+Mergeable Numeric Summary
+DataFrame.describe()-style statistics computed chunk by chunk
+"""
+
+from typing import Dict, Any, List
+
+import numpy as np
+import pandas as pd
+
+
+class _ColumnStats:
+    """Running statistics for one column, updated chunk by chunk"""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0  # sum of squared deviations from the mean
+        self.min = np.inf
+        self.max = -np.inf
+        # Bottom-k sample by random priority: mergeable and exact while count <= k
+        self.sample = np.empty(0)
+        self.priorities = np.empty(0)
+
+    def update(self, values: np.ndarray, priorities: np.ndarray, sample_size: int):
+        n = len(values)
+        if n == 0:
+            return
+
+        mean = float(values.mean())
+        m2 = float(((values - mean) ** 2).sum())
+
+        # Chan et al. parallel variance update
+        total = self.count + n
+        delta = mean - self.mean
+        self.m2 += m2 + delta * delta * self.count * n / total
+        self.mean += delta * n / total
+        self.count = total
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+
+        sample = np.concatenate([self.sample, values])
+        keys = np.concatenate([self.priorities, priorities])
+        if len(sample) > sample_size:
+            keep = np.argpartition(keys, sample_size)[:sample_size]
+            sample, keys = sample[keep], keys[keep]
+        self.sample, self.priorities = sample, keys
+
+    def to_dict(self) -> Dict[str, float]:
+        if self.count == 0:
+            return {'count': 0.0, 'mean': np.nan, 'std': np.nan, 'min': np.nan,
+                    '25%': np.nan, '50%': np.nan, '75%': np.nan, 'max': np.nan}
+
+        q25, q50, q75 = np.quantile(self.sample, [0.25, 0.5, 0.75])
+        return {
+            'count': float(self.count),
+            'mean': self.mean,
+            'std': float(np.sqrt(self.m2 / (self.count - 1))) if self.count > 1 else np.nan,
+            'min': self.min,
+            '25%': float(q25),
+            '50%': float(q50),
+            '75%': float(q75),
+            'max': self.max
+        }
+
+
+class NumericSummary:
+    """
+    Accumulate the column list and numeric summary of a dataset in chunks
+
+    Count, mean, std, min and max are exact. Quartiles come from a bounded
+    random sample per column, so they are exact up to `sample_size` values
+    and approximate beyond that. Memory depends on the number of columns and
+    the sample size, not on the number of rows.
+    """
+
+    def __init__(self, sample_size: int = 100000, seed: int = 0):
+        self.sample_size = sample_size
+        self.row_count = 0
+        self._columns: Dict[str, None] = {}
+        self._stats: Dict[str, _ColumnStats] = {}
+        self._non_numeric = set()
+        self._rng = np.random.default_rng(seed)
+
+    def update(self, df: pd.DataFrame):
+        """Fold one chunk into the summary"""
+        self.row_count += len(df)
+        for name in df.columns:
+            self._columns.setdefault(name, None)
+
+        numeric = set(df.select_dtypes(include='number').columns)
+        for name in df.columns:
+            series = df[name]
+            if name not in numeric:
+                # An all-null chunk says nothing about the column's type
+                if series.notna().any():
+                    self._non_numeric.add(name)
+                continue
+
+            values = series.to_numpy(dtype=float, na_value=np.nan)
+            values = values[~np.isnan(values)]
+            stats = self._stats.setdefault(name, _ColumnStats())
+            stats.update(values, self._rng.random(len(values)), self.sample_size)
+
+    @property
+    def columns(self) -> List[str]:
+        return list(self._columns)
+
+    def sample(self, name: str) -> np.ndarray:
+        """The retained values of a numeric column (all of them while count <= sample_size)"""
+        stats = self._stats.get(name)
+        return stats.sample if stats is not None else np.empty(0)
+
+    def numeric_summary(self) -> Dict[str, Dict[str, float]]:
+        """Statistics in the layout of DataFrame.describe().to_dict()"""
+        return {
+            name: self._stats[name].to_dict()
+            for name in self._columns
+            if name in self._stats and name not in self._non_numeric
+        }
+
+    def profile(self) -> Dict[str, Any]:
+        """Profile in the format of RulesetExecutor._profile_data"""
+        return {
+            'columns': self.columns,
+            'numeric_summary': self.numeric_summary(),
+            'row_count': self.row_count
+        }
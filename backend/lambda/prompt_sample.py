@@ -0,0 +1,236 @@
+"""
+Representative Prompt Samples
+Token-budgeted stratified row samples for AI rule prompts
+"""
+
+import os
+import json
+from typing import Dict, Any, List, Optional
+
+import numpy as np
+import pandas as pd
+
+try:
+    from .token_budget import estimate_tokens
+except ImportError:
+    from token_budget import estimate_tokens
+
+# Columns with at most this many distinct values are treated as categories
+MAX_CATEGORIES = 20
+
+# Extreme rows kept per numeric column (lowest and highest), plus the rows
+# that are most unusual across all numeric columns together
+OUTLIERS_PER_COLUMN = 1
+MULTIVARIATE_OUTLIERS = 3
+
+# Buckets the time range is split into; one row is kept per bucket
+TIME_BUCKETS = 12
+
+_TIME_NAME_HINTS = ('time', 'date', '_at', 'timestamp')
+
+STRATA = ('outliers', 'categories', 'time', 'random')
+
+
+def default_sample_tokens() -> int:
+    return int(os.getenv('AI_SAMPLE_TOKENS', '1500'))
+
+
+def time_columns(df: pd.DataFrame) -> Dict[str, pd.Series]:
+    """Datetime columns, plus text columns named like timestamps that parse as dates"""
+    found = {}
+    for name in df.columns:
+        series = df[name]
+        if pd.api.types.is_datetime64_any_dtype(series):
+            found[name] = series
+        elif (
+            not pd.api.types.is_numeric_dtype(series)
+            and any(hint in str(name).lower() for hint in _TIME_NAME_HINTS)
+        ):
+            parsed = pd.to_datetime(series, errors='coerce', utc=True)
+            if parsed.notna().sum() >= 0.9 * series.notna().sum() > 0:
+                found[name] = parsed
+    return found
+
+
+def _strata(df: pd.DataFrame, seed: int) -> Dict[str, List[Any]]:
+    """
+    Candidate row labels per stratum, most important first
+
+    Every stratum is a handful of vectorized column operations over the
+    whole frame; no per-row Python work is done.
+    """
+    strata = {name: [] for name in STRATA}
+    if len(df) == 0:
+        return strata
+
+    # Outliers: per-column extremes, then the rows furthest from the mean overall
+    numeric = df.select_dtypes(include='number')
+    numeric = numeric.loc[:, numeric.notna().any()]
+    if len(numeric.columns) > 0:
+        for name in numeric.columns:
+            column = numeric[name]
+            strata['outliers'].extend(column.nsmallest(OUTLIERS_PER_COLUMN).index)
+            strata['outliers'].extend(column.nlargest(OUTLIERS_PER_COLUMN).index)
+
+        std = numeric.std(ddof=0).replace(0, np.nan)
+        scores = ((numeric - numeric.mean()) / std).abs().max(axis=1)
+        strata['outliers'].extend(scores.nlargest(MULTIVARIATE_OUTLIERS).index)
+
+    # Categories: the first row of every value of each low-cardinality column
+    times = time_columns(df)
+    for name in df.columns:
+        if name in numeric.columns or name in times:
+            continue
+        try:
+            firsts = df[name].dropna().drop_duplicates()
+        except TypeError:
+            continue  # unhashable (nested) values
+        if len(firsts) <= MAX_CATEGORIES:
+            strata['categories'].extend(firsts.index)
+
+    # Time: the first row in each equal-width bucket of every time column
+    for series in times.values():
+        valid = series.dropna()
+        if valid.empty:
+            continue
+        buckets = pd.cut(valid.astype('int64'), bins=min(TIME_BUCKETS, valid.nunique()), labels=False)
+        strata['time'].extend(valid.groupby(buckets).head(1).sort_values().index)
+
+    # Random: uniform fill for whatever budget is left
+    strata['random'].extend(df.sample(n=min(len(df), 200), random_state=seed).index)
+
+    return strata
+
+
+def stratified_sample(
+    df: pd.DataFrame,
+    max_tokens: Optional[int] = None,
+    seed: int = 0
+) -> Dict[str, Any]:
+    """
+    Pick a small, representative set of rows within a token budget
+
+    Rows are drawn round-robin from four strata (extreme values,
+    one row per category, coverage of the time range, uniform random)
+    until the budget is used, so a tight budget still shows the model a
+    bit of every kind of row. Only candidate rows are ever serialized.
+
+    Returns:
+        {
+            'rows': [dict],          # in dataset order
+            'row_count': int,        # rows in df
+            'strata': {'outliers': int, 'categories': int, 'time': int, 'random': int},
+            'approx_tokens': int
+        }
+    """
+    max_tokens = max_tokens or default_sample_tokens()
+    if not df.index.is_unique:
+        df = df.reset_index(drop=True)
+
+    candidates = _strata(df, seed)
+    labels = list(dict.fromkeys(label for name in STRATA for label in candidates[name]))
+    records = dict(zip(labels, df.loc[labels].to_dict('records')))
+    # Each row is one line of compact JSON
+    sizes = {
+        label: estimate_tokens(json.dumps(record, default=str, separators=(',', ':'))) + 1
+        for label, record in records.items()
+    }
+
+    chosen: Dict[Any, str] = {}
+    budget = max_tokens
+    used = 0
+    queues = {name: iter(candidates[name]) for name in STRATA}
+
+    while queues:
+        for name in list(queues):
+            label = next((c for c in queues[name] if c not in chosen), None)
+            if label is None:
+                del queues[name]
+                continue
+            if used + sizes[label] > budget and chosen:
+                queues.clear()
+                break
+            chosen[label] = name
+            used += sizes[label]
+
+    ordered = sorted(chosen, key=df.index.get_loc)
+    return {
+        'rows': [records[label] for label in ordered],
+        'row_count': len(df),
+        'strata': {name: sum(1 for s in chosen.values() if s == name) for name in STRATA},
+        'approx_tokens': used
+    }
+
+
+class StratifiedSampler:
+    """
+    stratified_sample() over a dataset that arrives in chunks
+
+    Each chunk keeps only its own candidate rows (its extremes, first rows
+    per category, time coverage and a random share); the final sample is
+    drawn from the union of those candidates, so global extremes and every
+    category are always among them while memory stays bounded.
+    """
+
+    def __init__(self, max_tokens: Optional[int] = None, seed: int = 0):
+        self.max_tokens = max_tokens or default_sample_tokens()
+        self.seed = seed
+        self.row_count = 0
+        self._candidates: List[pd.DataFrame] = []
+
+    def update(self, df: pd.DataFrame):
+        """Fold one chunk into the candidate pool"""
+        # Label rows by their position in the whole dataset
+        df = df.set_axis(pd.RangeIndex(self.row_count, self.row_count + len(df)))
+        self.row_count += len(df)
+
+        candidates = _strata(df, self.seed + len(self._candidates))
+        labels = list(dict.fromkeys(label for name in STRATA for label in candidates[name]))
+        self._candidates.append(df.loc[labels])
+
+    def result(self) -> Dict[str, Any]:
+        if not self._candidates:
+            return stratified_sample(pd.DataFrame(), self.max_tokens, self.seed)
+        sample = stratified_sample(pd.concat(self._candidates).sort_index(), self.max_tokens, self.seed)
+        sample['row_count'] = self.row_count
+        return sample
+
+
+def fit_sample(sample: Dict[str, Any], max_tokens: int) -> Dict[str, Any]:
+    """
+    Shrink a sample to max_tokens by keeping evenly spaced rows
+
+    For samples drawn before the prompt's remaining budget was known (the
+    chunked executor draws its sample while streaming).
+    """
+    if sample['approx_tokens'] <= max_tokens or not sample['rows']:
+        return sample
+
+    sizes = [estimate_tokens(json.dumps(row, default=str, separators=(',', ':'))) + 1 for row in sample['rows']]
+    keep = len(sizes)
+    while keep > 0:
+        positions = np.unique(np.linspace(0, len(sizes) - 1, keep).round().astype(int))
+        used = sum(sizes[i] for i in positions)
+        if used <= max_tokens:
+            break
+        keep = min(keep - 1, int(keep * max_tokens / used))
+    else:
+        positions, used = [], 0
+
+    return {**sample, 'rows': [sample['rows'][i] for i in positions], 'approx_tokens': used, 'fitted': True}
+
+
+def format_sample(sample: Dict[str, Any]) -> str:
+    """Render sampled rows as compact JSON, one row per line"""
+    return '\n'.join(
+        json.dumps(row, default=str, separators=(',', ':'))
+        for row in sample['rows']
+    )
+
+
+def describe_sample(sample: Dict[str, Any]) -> str:
+    """One-line description of how a sample was drawn, for prompt headings"""
+    if sample.get('fitted'):
+        return f"{len(sample['rows'])} of {sample['row_count']} rows: evenly thinned stratified sample"
+    parts = [f"{count} {name}" for name, count in sample['strata'].items() if count]
+    return f"{len(sample['rows'])} of {sample['row_count']} rows: {', '.join(parts) or 'none'}"
@@ -0,0 +1,815 @@
+"""
+Python Rule Sandbox
+Runs user Python rulesets in OS-confined processes forked from a warm worker pool
+"""
+
+import os
+import sys
+import json
+import mmap
+import time
+import queue
+import shlex
+import stat
+import atexit
+import ctypes
+import signal
+import socket
+import struct
+import builtins
+import platform
+import sysconfig
+import threading
+import subprocess
+from multiprocessing import reduction, shared_memory
+from multiprocessing.connection import Connection
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+# Modules user rules may import. This and SAFE_BUILTINS only keep honest rule
+# code tidy: pandas objects reach os, subprocess and everything else, so the
+# security boundary is the OS confinement below, never the Python namespace.
+ALLOWED_MODULES = {
+    'pandas', 'numpy', 'math', 'statistics', 'datetime', 'collections',
+    'itertools', 'functools', 're', 'json', 'decimal'
+}
+
+SAFE_BUILTINS = [
+    'abs', 'all', 'any', 'bool', 'dict', 'divmod', 'enumerate', 'filter',
+    'float', 'frozenset', 'int', 'isinstance', 'len', 'list', 'map', 'max',
+    'min', 'pow', 'range', 'reversed', 'round', 'set', 'slice', 'sorted',
+    'str', 'sum', 'tuple', 'zip', 'print', 'Exception', 'ValueError',
+    'KeyError', 'TypeError', 'ZeroDivisionError', 'True', 'False', 'None'
+]
+
+# PYTHON_SANDBOX_ISOLATION levels:
+#   uid      seccomp + run as PYTHON_SANDBOX_UID (needs root; the default)
+#   seccomp  seccomp only, as the server's own user; for use inside nsjail or
+#            a container (PYTHON_SANDBOX_COMMAND), where that user is already
+#            unprivileged and sees no secrets. Without one it needs Landlock
+#            to keep rules away from the server's files
+#   off      no confinement; local development only
+# Where the kernel has Landlock, rules can only read the Python install and
+# system libraries at every level but 'off'.
+ISOLATION_LEVELS = ('uid', 'seccomp', 'off')
+
+# Seconds the pool waits on a worker beyond the rule's own time limit
+_GRACE_SECONDS = 5
+
+# Largest worker status message the pool reads; rule replies are capped by
+# PYTHON_SANDBOX_MAX_RESULT_MB
+_STATUS_BYTES = 4096
+
+_REPLY_STATUSES = ('ok', 'error')
+_WORKER_OUTCOMES = ('exited', 'killed', 'timeout')
+
+
+class CpuTimeExceeded(Exception):
+    """Raised inside a rule process when it uses up its CPU-time budget"""
+
+
+# ---------------------------------------------------------------------------
+# Shared-memory DataFrame transport
+# ---------------------------------------------------------------------------
+
+def export_dataframe(df: pd.DataFrame) -> Tuple[shared_memory.SharedMemory, List[Dict[str, Any]]]:
+    """
+    Copy a DataFrame's columns into one shared memory block
+
+    Numeric, boolean and datetime columns are stored as raw arrays. Other
+    columns are factorized: int32 codes go into shared memory and only the
+    distinct values travel through the pipe.
+
+    Returns:
+        (shared memory block, column manifest)
+    """
+    manifest = []
+    arrays = []
+    offset = 0
+
+    for name in df.columns:
+        series = df[name]
+        entry = {'name': name}
+
+        if isinstance(series.dtype, np.dtype) and series.dtype.kind in 'biufcmM':
+            array = np.ascontiguousarray(series.to_numpy())
+        else:
+            codes, uniques = pd.factorize(series)
+            array = codes.astype(np.int32)
+            entry['categories'] = pd.Index(uniques)
+
+        entry.update({'dtype': array.dtype.str, 'length': len(array), 'offset': offset})
+        manifest.append(entry)
+        arrays.append(array)
+
+        # Keep every column 8-byte aligned
+        offset += (array.nbytes + 7) // 8 * 8
+
+    shm = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+    for entry, array in zip(manifest, arrays):
+        target = np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf, offset=entry['offset'])
+        target[:] = array
+
+    return shm, manifest
+
+
+def import_dataframe(buffer: Any, manifest: List[Dict[str, Any]]) -> pd.DataFrame:
+    """Rebuild a DataFrame whose numeric columns are views on buffer"""
+    columns = {}
+    for entry in manifest:
+        array = np.ndarray(
+            (entry['length'],),
+            dtype=np.dtype(entry['dtype']),
+            buffer=buffer,
+            offset=entry['offset']
+        )
+        if 'categories' in entry:
+            columns[entry['name']] = entry['categories'].take(array, allow_fill=True)
+        else:
+            columns[entry['name']] = array
+
+    return pd.DataFrame(columns, copy=False)
+
+
+def _map_dataframe(shm_name: str, manifest: List[Dict[str, Any]]) -> pd.DataFrame:
+    """
+    Map the parent's shared memory block copy-on-write
+
+    The block is opened read-only, so a rule can change its own view of the
+    data but never the parent's copy.
+    """
+    import _posixshmem
+
+    fd = _posixshmem.shm_open('/' + shm_name, os.O_RDONLY, mode=0)
+    try:
+        buffer = mmap.mmap(fd, os.fstat(fd).st_size, access=mmap.ACCESS_COPY)
+    finally:
+        os.close(fd)
+    return import_dataframe(buffer, manifest)
+
+
+# ---------------------------------------------------------------------------
+# OS confinement (seccomp-bpf, uid, rlimits)
+# ---------------------------------------------------------------------------
+
+_AUDIT_ARCH = {'x86_64': 0xC000003E, 'aarch64': 0xC00000B7}
+
+# Syscalls a rule process may not make, as (x86_64, aarch64) numbers; None
+# where the architecture lacks the call. Covers running programs, network
+# access, changing files, signalling or tracing other processes and
+# privileged kernel interfaces.
+_DENIED_SYSCALLS = {
+    'execve': (59, 221), 'execveat': (322, 281), 'fork': (57, None), 'vfork': (58, None),
+    'socket': (41, 198), 'socketpair': (53, 199), 'connect': (42, 203),
+    'ptrace': (101, 117), 'process_vm_readv': (310, 270), 'process_vm_writev': (311, 271),
+    'kill': (62, 129), 'tkill': (200, 130), 'tgkill': (234, 131),
+    'rt_sigqueueinfo': (129, 138), 'rt_tgsigqueueinfo': (297, 240),
+    'pidfd_open': (434, 434), 'pidfd_getfd': (438, 438), 'pidfd_send_signal': (424, 424),
+    'creat': (85, None), 'unlink': (87, None), 'unlinkat': (263, 35),
+    'rename': (82, None), 'renameat': (264, 38), 'renameat2': (316, 276),
+    'mkdir': (83, None), 'mkdirat': (258, 34), 'rmdir': (84, None),
+    'link': (86, None), 'linkat': (265, 37), 'symlink': (88, None), 'symlinkat': (266, 36),
+    'chmod': (90, None), 'fchmod': (91, 52), 'fchmodat': (268, 53),
+    'chown': (92, None), 'fchown': (93, 55), 'lchown': (94, None), 'fchownat': (260, 54),
+    'truncate': (76, 45), 'ftruncate': (77, 46), 'fallocate': (285, 47),
+    'mknod': (133, None), 'mknodat': (259, 33),
+    'utime': (132, None), 'utimes': (235, None), 'futimesat': (261, None), 'utimensat': (280, 88),
+    'mount': (165, 40), 'umount2': (166, 39), 'pivot_root': (155, 41), 'chroot': (161, 51),
+    'open_tree': (428, 428), 'move_mount': (429, 429), 'fsopen': (430, 430),
+    'fsconfig': (431, 431), 'fsmount': (432, 432), 'fspick': (433, 433), 'mount_setattr': (442, 442),
+    'unshare': (272, 97), 'setns': (308, 268), 'bpf': (321, 280), 'perf_event_open': (298, 241),
+    'userfaultfd': (323, 282), 'io_uring_setup': (425, 425), 'io_uring_enter': (426, 426),
+    'io_uring_register': (427, 427), 'keyctl': (250, 219), 'add_key': (248, 217),
+    'request_key': (249, 218), 'name_to_handle_at': (303, 264), 'open_by_handle_at': (304, 265),
+    'memfd_create': (319, 279), 'process_madvise': (440, 440), 'quotactl': (179, 60),
+    'setuid': (105, 146), 'setgid': (106, 144), 'setreuid': (113, 145), 'setregid': (114, 143),
+    'setresuid': (117, 147), 'setresgid': (119, 149), 'setgroups': (116, 159),
+    'personality': (135, 92), 'reboot': (169, 142), 'uselib': (134, None),
+    'init_module': (175, 105), 'finit_module': (313, 273), 'delete_module': (176, 106),
+    'kexec_load': (246, 104), 'kexec_file_load': (320, 294), 'swapon': (167, 224),
+    'swapoff': (168, 225), 'sethostname': (170, 161), 'setdomainname': (171, 162)
+}
+
+# Calls allowed only in their read-only or thread-creating forms: (x86_64,
+# aarch64) number and the argument holding the flags checked
+_OPEN = ((2, None), 1)
+_OPENAT = ((257, 56), 2)
+_CLONE = (56, 220)
+_ENOSYS_SYSCALLS = {'clone3': (435, 435), 'openat2': (437, 437)}  # callers fall back to clone/openat
+
+_OPEN_WRITE_FLAGS = os.O_WRONLY | os.O_RDWR | os.O_CREAT | os.O_TRUNC | os.O_APPEND
+_CLONE_THREAD = 0x00010000
+
+_BPF_LD_W_ABS = 0x20
+_BPF_JEQ = 0x15
+_BPF_JGE = 0x35
+_BPF_JSET = 0x45
+_BPF_RET = 0x06
+_SECCOMP_RET_KILL_PROCESS = 0x80000000
+_SECCOMP_RET_ERRNO = 0x00050000
+_SECCOMP_RET_ALLOW = 0x7fff0000
+
+# Landlock (Linux 5.13+; same syscall numbers on x86_64 and aarch64)
+_LANDLOCK_CREATE_RULESET = 444
+_LANDLOCK_ADD_RULE = 445
+_LANDLOCK_RESTRICT_SELF = 446
+_LANDLOCK_CREATE_RULESET_VERSION = 1
+_LANDLOCK_RULE_PATH_BENEATH = 1
+_LANDLOCK_ACCESS_FS_EXECUTE = 1 << 0
+_LANDLOCK_ACCESS_FS_READ_FILE = 1 << 2
+_LANDLOCK_ACCESS_FS_READ_DIR = 1 << 3
+_LANDLOCK_ACCESS_FS_ABI_1 = (1 << 13) - 1  # every filesystem right Landlock ABI 1 knows
+
+# Readable by rules besides the Python install (zoneinfo for tz-aware dates)
+_SYSTEM_READ_PATHS = ['/lib', '/lib64', '/usr/lib', '/usr/lib64', '/usr/share/zoneinfo', '/dev/null', '/dev/urandom']
+
+_PR_SET_PDEATHSIG = 1
+_PR_SET_DUMPABLE = 4
+_PR_SET_SECCOMP = 22
+_PR_SET_NO_NEW_PRIVS = 38
+_SECCOMP_MODE_FILTER = 2
+
+
+def _bpf(code: int, k: int, jt: int = 0, jf: int = 0) -> bytes:
+    return struct.pack('HBBI', code, jt, jf, k)
+
+
+def _arg(index: int) -> int:
+    # Offset of the low 32 bits of args[index] in struct seccomp_data
+    return 16 + 8 * index
+
+
+def seccomp_program(machine: str) -> bytes:
+    """
+    Build the seccomp-bpf filter for rule processes
+
+    Foreign syscall ABIs kill the process; denied calls fail with EPERM;
+    open/openat fail with EACCES unless read-only; clone only creates
+    threads; everything else (reading files, memory, writing to already
+    open pipes) is allowed.
+    """
+    index = 0 if machine == 'x86_64' else 1
+    errno = lambda code: _SECCOMP_RET_ERRNO | code
+
+    program = [
+        _bpf(_BPF_LD_W_ABS, 4),
+        _bpf(_BPF_JEQ, _AUDIT_ARCH[machine], jt=1),
+        _bpf(_BPF_RET, _SECCOMP_RET_KILL_PROCESS),
+        _bpf(_BPF_LD_W_ABS, 0)
+    ]
+    if machine == 'x86_64':
+        # x32 ABI syscall numbers
+        program += [_bpf(_BPF_JGE, 0x40000000, jf=1), _bpf(_BPF_RET, _SECCOMP_RET_KILL_PROCESS)]
+
+    for numbers in _DENIED_SYSCALLS.values():
+        if numbers[index] is not None:
+            program += [_bpf(_BPF_JEQ, numbers[index], jf=1), _bpf(_BPF_RET, errno(1))]  # EPERM
+    for numbers in _ENOSYS_SYSCALLS.values():
+        program += [_bpf(_BPF_JEQ, numbers[index], jf=1), _bpf(_BPF_RET, errno(38))]  # ENOSYS
+
+    program += [
+        _bpf(_BPF_JEQ, _CLONE[index], jf=4),
+        _bpf(_BPF_LD_W_ABS, _arg(0)),
+        _bpf(_BPF_JSET, _CLONE_THREAD, jf=1),
+        _bpf(_BPF_RET, _SECCOMP_RET_ALLOW),
+        _bpf(_BPF_RET, errno(1))
+    ]
+    for numbers, flags_arg in (_OPEN, _OPENAT):
+        if numbers[index] is not None:
+            program += [
+                _bpf(_BPF_JEQ, numbers[index], jf=4),
+                _bpf(_BPF_LD_W_ABS, _arg(flags_arg)),
+                _bpf(_BPF_JSET, _OPEN_WRITE_FLAGS, jf=1),
+                _bpf(_BPF_RET, errno(13)),  # EACCES
+                _bpf(_BPF_RET, _SECCOMP_RET_ALLOW)
+            ]
+
+    program.append(_bpf(_BPF_RET, _SECCOMP_RET_ALLOW))
+    return b''.join(program)
+
+
+def _prctl(option: int, value: Any = 0):
+    libc = ctypes.CDLL(None, use_errno=True)
+    if libc.prctl(ctypes.c_int(option), value, ctypes.c_ulong(0), ctypes.c_ulong(0), ctypes.c_ulong(0)) != 0:
+        error = ctypes.get_errno()
+        raise OSError(error, f"prctl({option}) failed: {os.strerror(error)}")
+
+
+def _install_seccomp():
+    class SockFprog(ctypes.Structure):
+        _fields_ = [('len', ctypes.c_ushort), ('filter', ctypes.c_void_p)]
+
+    program = seccomp_program(platform.machine())
+    buffer = ctypes.create_string_buffer(program, len(program))
+    fprog = SockFprog(len(program) // 8, ctypes.addressof(buffer))
+
+    libc = ctypes.CDLL(None, use_errno=True)
+    if libc.prctl(ctypes.c_int(_PR_SET_SECCOMP), ctypes.c_ulong(_SECCOMP_MODE_FILTER),
+                  ctypes.byref(fprog), ctypes.c_ulong(0), ctypes.c_ulong(0)) != 0:
+        error = ctypes.get_errno()
+        raise OSError(error, f"Installing the seccomp filter failed: {os.strerror(error)}")
+
+
+def landlock_abi() -> int:
+    """Landlock ABI version the kernel supports, 0 if it has none"""
+    if not sys.platform.startswith('linux'):
+        return 0
+    libc = ctypes.CDLL(None, use_errno=True)
+    version = libc.syscall(ctypes.c_long(_LANDLOCK_CREATE_RULESET), None, ctypes.c_size_t(0),
+                           ctypes.c_uint32(_LANDLOCK_CREATE_RULESET_VERSION))
+    return max(version, 0)
+
+
+def rule_read_paths() -> List[str]:
+    """What a rule process may read under Landlock: the Python install, pandas, numpy and system libraries"""
+    paths = {sysconfig.get_path(name) for name in ('stdlib', 'platstdlib', 'purelib', 'platlib')}
+    paths.update(os.path.dirname(module.__file__) for module in (np, pd))
+    paths.update(_SYSTEM_READ_PATHS)
+    return sorted(path for path in paths if path and os.path.exists(path))
+
+
+def _install_landlock():
+    """Allow opening files only beneath rule_read_paths(), read-only"""
+    class RulesetAttr(ctypes.Structure):
+        _fields_ = [('handled_access_fs', ctypes.c_uint64)]
+
+    class PathBeneathAttr(ctypes.Structure):
+        _pack_ = 1
+        _fields_ = [('allowed_access', ctypes.c_uint64), ('parent_fd', ctypes.c_int32)]
+
+    libc = ctypes.CDLL(None, use_errno=True)
+
+    def syscall(*args) -> int:
+        result = libc.syscall(*args)
+        if result < 0:
+            error = ctypes.get_errno()
+            raise OSError(error, f"Installing the Landlock ruleset failed: {os.strerror(error)}")
+        return result
+
+    attr = RulesetAttr(_LANDLOCK_ACCESS_FS_ABI_1)
+    ruleset = syscall(ctypes.c_long(_LANDLOCK_CREATE_RULESET), ctypes.byref(attr),
+                      ctypes.c_size_t(ctypes.sizeof(attr)), ctypes.c_uint32(0))
+    try:
+        for path in rule_read_paths():
+            allowed = _LANDLOCK_ACCESS_FS_READ_FILE | _LANDLOCK_ACCESS_FS_EXECUTE
+            if os.path.isdir(path):
+                allowed |= _LANDLOCK_ACCESS_FS_READ_DIR
+            fd = os.open(path, os.O_PATH | os.O_CLOEXEC)
+            try:
+                rule = PathBeneathAttr(allowed, fd)
+                syscall(ctypes.c_long(_LANDLOCK_ADD_RULE), ctypes.c_int(ruleset),
+                        ctypes.c_int(_LANDLOCK_RULE_PATH_BENEATH), ctypes.byref(rule), ctypes.c_uint32(0))
+            finally:
+                os.close(fd)
+        syscall(ctypes.c_long(_LANDLOCK_RESTRICT_SELF), ctypes.c_int(ruleset), ctypes.c_uint32(0))
+    finally:
+        os.close(ruleset)
+
+
+def _readable_by_others(path: str) -> bool:
+    """Whether users other than the owner can read path and reach it"""
+    path = os.path.realpath(path)
+    if not os.stat(path).st_mode & stat.S_IROTH:
+        return False
+    while True:
+        if not os.stat(path).st_mode & stat.S_IXOTH:
+            return False
+        parent = os.path.dirname(path)
+        if parent == path:
+            return True
+        path = parent
+
+
+def check_isolation(isolation: str, wrapped: bool = False):
+    """Raise if this host cannot confine rule code at the given level"""
+    if isolation not in ISOLATION_LEVELS:
+        raise ValueError(f"PYTHON_SANDBOX_ISOLATION must be one of {', '.join(ISOLATION_LEVELS)}")
+    if isolation == 'off':
+        return
+    if not sys.platform.startswith('linux') or platform.machine() not in _AUDIT_ARCH:
+        raise RuntimeError(
+            "Python rulesets need Linux on x86_64 or aarch64 to be confined; "
+            "set PYTHON_SANDBOX_ISOLATION=off only for local development"
+        )
+    if isolation == 'seccomp' and not wrapped and not landlock_abi():
+        raise RuntimeError(
+            "PYTHON_SANDBOX_ISOLATION=seccomp runs rules as the server's own user, which can read its "
+            "secrets; without Landlock (Linux 5.13+) it needs a jail or container (PYTHON_SANDBOX_COMMAND)"
+        )
+    if isolation == 'uid' and not wrapped and os.geteuid() != 0:
+        raise RuntimeError(
+            "PYTHON_SANDBOX_ISOLATION=uid runs rules as PYTHON_SANDBOX_UID and needs root; "
+            "run the workers in a jail or container (PYTHON_SANDBOX_COMMAND) with "
+            "PYTHON_SANDBOX_ISOLATION=seccomp instead"
+        )
+    if isolation == 'uid':
+        for module in (os, np, pd):
+            if not _readable_by_others(os.path.dirname(module.__file__)):
+                raise RuntimeError(
+                    f"PYTHON_SANDBOX_ISOLATION=uid: {os.path.dirname(module.__file__)} is not readable "
+                    "by other users, so rules running as PYTHON_SANDBOX_UID could not import it"
+                )
+
+
+def _confine(config: Dict[str, Any]):
+    """Apply resource limits, drop privileges and install the Landlock ruleset and seccomp filter"""
+    import resource
+
+    _prctl(_PR_SET_PDEATHSIG, ctypes.c_ulong(signal.SIGKILL))
+
+    cpu_seconds = config['cpu_seconds']
+    resource.setrlimit(resource.RLIMIT_CPU, (cpu_seconds, cpu_seconds + 1))
+    if config['memory_bytes']:
+        resource.setrlimit(resource.RLIMIT_AS, (config['memory_bytes'], config['memory_bytes']))
+    resource.setrlimit(resource.RLIMIT_FSIZE, (0, 0))
+    resource.setrlimit(resource.RLIMIT_CORE, (0, 0))
+
+    if config['isolation'] == 'off':
+        return
+
+    if config['isolation'] == 'uid':
+        os.setgroups([])
+        os.setgid(config['gid'])
+        os.setuid(config['uid'])
+
+    # Keeps other rule processes of the same user out of /proc/<pid>/mem
+    _prctl(_PR_SET_DUMPABLE, ctypes.c_ulong(0))
+    os.chdir('/')
+    _prctl(_PR_SET_NO_NEW_PRIVS, ctypes.c_ulong(1))
+    if landlock_abi():
+        _install_landlock()
+    _install_seccomp()
+
+
+# ---------------------------------------------------------------------------
+# Rule process (forked from a worker for every task)
+# ---------------------------------------------------------------------------
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, (pd.Timestamp, pd.Timedelta)):
+        return value.isoformat()
+    if isinstance(value, pd.DataFrame):
+        return value.to_dict('records')
+    if isinstance(value, (pd.Series, pd.Index)):
+        return value.tolist()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    return str(value)
+
+
+def _restricted_import(name, globals=None, locals=None, fromlist=(), level=0):
+    if name.split('.')[0] not in ALLOWED_MODULES:
+        raise ImportError(f"Import of '{name}' is not allowed in Python rulesets")
+    return __import__(name, globals, locals, fromlist, level)
+
+
+def _on_cpu_limit(signum, frame):
+    raise CpuTimeExceeded("Python ruleset exceeded its CPU-time limit")
+
+
+def _run_rule(df: pd.DataFrame, code: str, params: Dict[str, Any]) -> str:
+    """Execute one rule and return its JSON-encoded result"""
+    safe_builtins = {name: getattr(builtins, name) for name in SAFE_BUILTINS if hasattr(builtins, name)}
+    safe_builtins['__import__'] = _restricted_import
+    namespace = {'__builtins__': safe_builtins, 'params': params}
+
+    exec(compile(code, '<ruleset>', 'exec'), namespace)
+
+    rule = namespace.get('rule')
+    if not callable(rule):
+        raise ValueError("Python ruleset must define rule(df)")
+
+    return json.dumps(rule(df), default=_json_default)
+
+
+def _send_json(conn: Connection, message: Any):
+    conn.send_bytes(json.dumps(message).encode('utf-8'))
+
+
+def _recv_json(conn: Connection, max_bytes: int, allowed: Tuple[str, ...]) -> Optional[Tuple[str, str]]:
+    """
+    Read a [status, text] message written by a less trusted process
+
+    Only JSON is accepted: unpickling would run whatever the sender chose
+    in this process. Returns None for anything else, including messages
+    over max_bytes.
+    """
+    try:
+        message = json.loads(conn.recv_bytes(max_bytes))
+    except (OSError, ValueError):
+        # recv_bytes reports an oversized message as OSError("bad message length")
+        return None
+
+    if (isinstance(message, list) and len(message) == 2 and message[0] in allowed
+            and isinstance(message[1], str)):
+        return message[0], message[1]
+    return None
+
+
+def _run_task(fd: int, config: Dict[str, Any]):
+    """Body of a rule process: read the task from fd, confine, run, reply"""
+    with Connection(fd) as conn:
+        try:
+            # From the pool, which is trusted; replies are JSON (see _recv_json)
+            task = conn.recv()
+        except EOFError:
+            return
+
+        signal.signal(signal.SIGXCPU, _on_cpu_limit)
+        try:
+            df = _map_dataframe(task['shm_name'], task['manifest'])
+            _confine(config)
+            _send_json(conn, ['ok', _run_rule(df, task['code'], task['params'])])
+        except MemoryError:
+            _send_json(conn, ['error', 'MemoryError: Python ruleset exceeded its memory limit'])
+        except BaseException as e:
+            _send_json(conn, ['error', f"{type(e).__name__}: {str(e)}"])
+
+
+def _wait_task(pid: int, timeout_seconds: float) -> Tuple[str, str]:
+    """Reap a rule process, killing it at the time limit; returns how it ended"""
+    deadline = time.monotonic() + timeout_seconds
+    while True:
+        done, status = os.waitpid(pid, os.WNOHANG)
+        if done:
+            break
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            os.kill(pid, signal.SIGKILL)
+            os.waitpid(pid, 0)
+            return ('timeout', f"killed after {timeout_seconds}s")
+        signal.sigtimedwait([signal.SIGCHLD], remaining)
+
+    if os.WIFSIGNALED(status):
+        return ('killed', signal.Signals(os.WTERMSIG(status)).name)
+    return ('exited', str(os.WEXITSTATUS(status)))
+
+
+def _worker_main(config: Dict[str, Any]):
+    """
+    Worker loop: pandas/numpy stay imported, every task runs in a fork
+
+    The pool sends one socket per task over stdin. The task itself (code
+    and data) goes straight from the pool to the forked rule process, so
+    nothing a rule sees or leaves behind survives into the next task.
+    """
+    control = socket.socket(fileno=os.dup(0))
+    devnull = os.open(os.devnull, os.O_RDONLY)
+    os.dup2(devnull, 0)
+    os.close(devnull)
+    conn = Connection(os.dup(control.fileno()))
+
+    signal.pthread_sigmask(signal.SIG_BLOCK, [signal.SIGCHLD])
+    while True:
+        try:
+            fds = reduction.recvfds(control, 1)
+        except (EOFError, OSError, RuntimeError):
+            break
+
+        pid = os.fork()
+        if pid == 0:
+            try:
+                control.close()
+                conn.close()
+                signal.pthread_sigmask(signal.SIG_SETMASK, [])
+                _run_task(fds[0], config)
+            finally:
+                os._exit(0)
+
+        os.close(fds[0])
+        _send_json(conn, list(_wait_task(pid, config['timeout_seconds'])))
+
+
+# ---------------------------------------------------------------------------
+# Pool
+# ---------------------------------------------------------------------------
+
+class _Worker:
+    def __init__(self, process: subprocess.Popen, control: socket.socket):
+        self.process = process
+        self.control = control
+        self.conn = Connection(os.dup(control.fileno()))
+
+    def close(self):
+        self.conn.close()
+        self.control.close()
+
+
+class PythonSandbox:
+    """
+    Pre-started pool of worker processes for Python rulesets
+
+    Workers are separate interpreters started with a minimal environment
+    (no credentials) that import pandas and numpy once. Each rule runs in a
+    fresh fork of a worker, which before touching user code gets a CPU-time
+    and address-space limit, drops to an unprivileged uid and installs a
+    seccomp filter: no programs, no network, no file changes, no signals or
+    tracing of other processes, and with Landlock no reading files outside
+    the Python install (see PYTHON_SANDBOX_ISOLATION). The fork is
+    killed at the time limit; a worker that stops responding is replaced.
+    Everything read back from workers and rule processes is size-capped
+    JSON, never pickle.
+    """
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        cpu_seconds: Optional[int] = None,
+        memory_mb: Optional[int] = None,
+        timeout_seconds: Optional[float] = None,
+        isolation: Optional[str] = None,
+        command: Optional[List[str]] = None
+    ):
+        self.max_workers = max_workers or int(os.getenv('PYTHON_SANDBOX_WORKERS', '0')) or os.cpu_count() or 1
+        self.cpu_seconds = cpu_seconds or int(os.getenv('PYTHON_SANDBOX_CPU_SECONDS', '10'))
+        self.memory_mb = memory_mb or int(os.getenv('PYTHON_SANDBOX_MEMORY_MB', '2048'))
+        self.timeout_seconds = timeout_seconds or float(os.getenv('PYTHON_SANDBOX_TIMEOUT_SECONDS', '30'))
+        self.isolation = isolation or os.getenv('PYTHON_SANDBOX_ISOLATION', 'uid')
+        self.max_result_bytes = int(float(os.getenv('PYTHON_SANDBOX_MAX_RESULT_MB', '64')) * 1024 * 1024)
+        self.command = command if command is not None else shlex.split(os.getenv('PYTHON_SANDBOX_COMMAND', ''))
+        check_isolation(self.isolation, wrapped=bool(self.command))
+
+        self._config = {
+            'isolation': self.isolation,
+            'cpu_seconds': self.cpu_seconds,
+            'memory_bytes': self.memory_mb * 1024 * 1024,
+            'timeout_seconds': self.timeout_seconds,
+            'uid': int(os.getenv('PYTHON_SANDBOX_UID', '65534')),
+            'gid': int(os.getenv('PYTHON_SANDBOX_GID', '65534'))
+        }
+
+        self._idle: 'queue.Queue[_Worker]' = queue.Queue()
+        self._workers: List[_Worker] = []
+        self._lock = threading.Lock()
+        self._closed = False
+
+        for _ in range(self.max_workers):
+            self._idle.put(self._spawn_worker())
+
+    def _worker_env(self) -> Dict[str, str]:
+        """Environment for workers: import paths only, no credentials"""
+        return {
+            'PATH': os.defpath,
+            'PYTHONPATH': os.pathsep.join(path for path in sys.path if path and os.path.isdir(path)),
+            'PYTHONDONTWRITEBYTECODE': '1',
+            'OMP_NUM_THREADS': '1',
+            'OPENBLAS_NUM_THREADS': '1',
+            'MKL_NUM_THREADS': '1',
+            'LANG': 'C.UTF-8'
+        }
+
+    def _spawn_worker(self) -> _Worker:
+        control, worker_end = socket.socketpair()
+        try:
+            process = subprocess.Popen(
+                self.command + [sys.executable, os.path.abspath(__file__), '--worker', json.dumps(self._config)],
+                stdin=worker_end,
+                env=self._worker_env(),
+                cwd='/',
+                close_fds=True
+            )
+        finally:
+            worker_end.close()
+
+        worker = _Worker(process, control)
+        with self._lock:
+            self._workers.append(worker)
+        return worker
+
+    def _replace_worker(self, worker: _Worker):
+        worker.process.kill()
+        try:
+            worker.process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            pass
+        worker.close()
+        with self._lock:
+            self._workers.remove(worker)
+        if not self._closed:
+            self._idle.put(self._spawn_worker())
+
+    def _run_on(self, worker: _Worker, task: Dict[str, Any]) -> Optional[Tuple[str, str]]:
+        """
+        Hand task to a fork of worker; returns the rule's reply, or None if it sent none
+
+        The other end of the socket belongs to rule code, so the reply is
+        read as size-capped JSON and never unpickled.
+        """
+        task_end, rule_end = socket.socketpair()
+        try:
+            reduction.sendfds(worker.control, [rule_end.fileno()])
+        finally:
+            rule_end.close()
+
+        with Connection(task_end.detach()) as conn:
+            conn.send(task)
+            # The worker kills the fork at the time limit, which closes this
+            # end; only a stuck worker makes the poll run out
+            if not conn.poll(self.timeout_seconds + _GRACE_SECONDS):
+                raise TimeoutError("Python ruleset worker stopped responding")
+            try:
+                reply = _recv_json(conn, self.max_result_bytes, _REPLY_STATUSES)
+            except EOFError:
+                return None
+            if reply is None:
+                return ('error', f"Python ruleset result is not valid or exceeds "
+                                 f"{self.max_result_bytes // (1024 * 1024)}MB (PYTHON_SANDBOX_MAX_RESULT_MB)")
+            return reply
+
+    def run(
+        self,
+        df: pd.DataFrame,
+        code: str,
+        params: Optional[Dict[str, Any]] = None
+    ) -> Any:
+        """
+        Run a Python rule on a DataFrame in a confined process
+
+        Args:
+            df: Dataset, passed to the rule through shared memory
+            code: Source defining rule(df) -> JSON-serializable value;
+                pandas and numpy are available through import
+            params: Ruleset parameters, visible to the code as `params`
+
+        Returns:
+            The rule's return value (after a JSON round trip)
+        """
+        if self._closed:
+            raise RuntimeError("Python sandbox has been shut down")
+
+        shm, manifest = export_dataframe(df)
+        try:
+            worker = self._idle.get()
+            task = {
+                'code': code,
+                'params': params or {},
+                'shm_name': shm.name,
+                'manifest': manifest
+            }
+
+            try:
+                reply = self._run_on(worker, task)
+                if not worker.conn.poll(_GRACE_SECONDS):
+                    raise TimeoutError("Python ruleset worker stopped responding")
+                status = _recv_json(worker.conn, _STATUS_BYTES, _WORKER_OUTCOMES)
+                if status is None:
+                    raise OSError("Malformed status from Python ruleset worker")
+                outcome, detail = status
+            except (EOFError, OSError, TimeoutError):
+                self._replace_worker(worker)
+                raise RuntimeError("Python ruleset worker died during execution")
+
+            self._idle.put(worker)
+
+        finally:
+            shm.close()
+            shm.unlink()
+
+        if reply is None:
+            if outcome == 'timeout':
+                raise TimeoutError(f"Python ruleset exceeded {self.timeout_seconds}s time limit")
+            raise RuntimeError(f"Python ruleset process died during execution ({detail})")
+
+        status, payload = reply
+        if status != 'ok':
+            raise ValueError(f"Python ruleset failed: {payload}")
+
+        return json.loads(payload)
+
+    def shutdown(self):
+        """Stop all workers"""
+        self._closed = True
+        with self._lock:
+            workers = list(self._workers)
+        for worker in workers:
+            # A closed control socket ends the worker loop
+            worker.close()
+        deadline = time.time() + 5
+        for worker in workers:
+            try:
+                worker.process.wait(timeout=max(0, deadline - time.time()))
+            except subprocess.TimeoutExpired:
+                worker.process.kill()
+
+
+_sandbox: Optional[PythonSandbox] = None
+_sandbox_lock = threading.Lock()
+
+
+def get_python_sandbox() -> PythonSandbox:
+    """Get the process-wide sandbox pool, starting it on first use"""
+    global _sandbox
+    with _sandbox_lock:
+        if _sandbox is None:
+            _sandbox = PythonSandbox()
+            atexit.register(_sandbox.shutdown)
+        return _sandbox
+
+
+if __name__ == '__main__' and sys.argv[1:2] == ['--worker']:
+    _worker_main(json.loads(sys.argv[2]))
@@ -0,0 +1,124 @@
+"""
+Result Index
+Persistent memo of execution results keyed by their immutable inputs
+"""
+
+import os
+import json
+import time
+import sqlite3
+from contextlib import contextmanager
+from typing import Dict, Any, Optional, Iterator
+
+try:
+    from .local_state import state_path
+except ImportError:
+    from local_state import state_path
+
+
+class ResultIndex:
+    """
+    Map (data blob, ruleset blob, rule type, engine version) to a result blob
+
+    Walrus blobs are immutable, so a deterministic rule run on the same two
+    blobs by the same engine version always produces the same result; the
+    earlier result blob can be returned instead of recomputing and
+    re-uploading it. Entries expire no later than their result blob's
+    storage, and earlier for non-deterministic (AI) rules.
+    """
+
+    def __init__(self, db_path: Optional[str] = None):
+        self.db_path = db_path or os.getenv('RESULT_INDEX_PATH') or state_path('result-index.db')
+
+        with self._connect() as conn:
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS results (
+                    data_blob_id TEXT NOT NULL,
+                    ruleset_blob_id TEXT NOT NULL,
+                    rule_type INTEGER NOT NULL,
+                    engine_version TEXT NOT NULL,
+                    result TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    expires_at REAL,
+                    PRIMARY KEY (data_blob_id, ruleset_blob_id, rule_type, engine_version)
+                )"""
+            )
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def get(
+        self,
+        data_blob_id: str,
+        ruleset_blob_id: str,
+        rule_type: int,
+        engine_version: str
+    ) -> Optional[Dict[str, Any]]:
+        """Return the stored execution result, or None if missing or expired"""
+        with self._connect() as conn:
+            row = conn.execute(
+                """SELECT result, expires_at FROM results
+                   WHERE data_blob_id = ? AND ruleset_blob_id = ? AND rule_type = ? AND engine_version = ?""",
+                (data_blob_id, ruleset_blob_id, rule_type, engine_version)
+            ).fetchone()
+
+        if row is None:
+            return None
+
+        result, expires_at = row
+        if expires_at is not None and expires_at <= time.time():
+            return None
+
+        return json.loads(result)
+
+    def delete(
+        self,
+        data_blob_id: str,
+        ruleset_blob_id: str,
+        rule_type: int,
+        engine_version: str
+    ) -> None:
+        """Forget a stored result, e.g. one whose blob can no longer be fetched"""
+        with self._connect() as conn:
+            conn.execute(
+                """DELETE FROM results
+                   WHERE data_blob_id = ? AND ruleset_blob_id = ? AND rule_type = ? AND engine_version = ?""",
+                (data_blob_id, ruleset_blob_id, rule_type, engine_version)
+            )
+
+    def put(
+        self,
+        data_blob_id: str,
+        ruleset_blob_id: str,
+        rule_type: int,
+        engine_version: str,
+        result: Dict[str, Any],
+        ttl_seconds: Optional[float] = None,
+        blob_expires_at: Optional[float] = None
+    ) -> None:
+        """
+        Store an execution result
+
+        Args:
+            result: execute() response (result_blob_id, verification_hash, ...)
+            ttl_seconds: Expiry for non-deterministic results (None = never)
+            blob_expires_at: When the result blob's storage may end; the
+                entry never outlives it
+        """
+        now = time.time()
+        expiries = [e for e in (now + ttl_seconds if ttl_seconds else None, blob_expires_at) if e is not None]
+        expires_at = min(expiries) if expiries else None
+
+        with self._connect() as conn:
+            conn.execute(
+                """INSERT OR REPLACE INTO results
+                   (data_blob_id, ruleset_blob_id, rule_type, engine_version, result, created_at, expires_at)
+                   VALUES (?, ?, ?, ?, ?, ?, ?)""",
+                (data_blob_id, ruleset_blob_id, rule_type, engine_version, json.dumps(result), now, expires_at)
+            )
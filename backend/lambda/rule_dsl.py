@@ -0,0 +1,532 @@
+"""
+Threshold Rule DSL
+Compiles declarative threshold rulesets into vectorized pandas/NumPy operations
+"""
+
+import json
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, List, Callable, Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+
+AGGREGATIONS = {'sum', 'mean', 'min', 'max', 'count', 'nunique', 'median', 'std'}
+
+OPERATORS: Dict[str, Callable[[pd.Series, Any], pd.Series]] = {
+    '>': lambda s, v: s > v,
+    '>=': lambda s, v: s >= v,
+    '<': lambda s, v: s < v,
+    '<=': lambda s, v: s <= v,
+    '==': lambda s, v: s == v,
+    '!=': lambda s, v: s != v,
+    'in': lambda s, v: s.isin(v),
+    'not_in': lambda s, v: ~s.isin(v),
+    'between': lambda s, v: s.between(v[0], v[1]),
+    'is_null': lambda s, v: s.isna(),
+    'not_null': lambda s, v: s.notna(),
+}
+
+Condition = Callable[[pd.DataFrame], pd.Series]
+
+
+def _compile_condition(spec: Dict[str, Any], path: str = 'when') -> Condition:
+    """Compile {'all'|'any': [...]}, {'not': ...} or a comparison into a mask function"""
+    if not isinstance(spec, dict):
+        raise ValueError(f"{path}: condition must be an object")
+
+    if 'all' in spec or 'any' in spec:
+        combinator = 'all' if 'all' in spec else 'any'
+        parts = [
+            _compile_condition(part, f"{path}.{combinator}[{i}]")
+            for i, part in enumerate(spec[combinator])
+        ]
+        if not parts:
+            raise ValueError(f"{path}.{combinator}: needs at least one condition")
+
+        def combine(frame: pd.DataFrame) -> pd.Series:
+            masks = [part(frame) for part in parts]
+            if combinator == 'all':
+                return np.logical_and.reduce(masks)
+            return np.logical_or.reduce(masks)
+
+        return combine
+
+    if 'not' in spec:
+        inner = _compile_condition(spec['not'], f"{path}.not")
+        return lambda frame: ~inner(frame)
+
+    field = spec.get('field', spec.get('column'))
+    op = spec.get('op')
+    if not field:
+        raise ValueError(f"{path}: comparison needs a 'field'")
+    if op not in OPERATORS:
+        raise ValueError(f"{path}: unknown operator '{op}' (use {', '.join(OPERATORS)})")
+    if op not in ('is_null', 'not_null') and 'value' not in spec:
+        raise ValueError(f"{path}: operator '{op}' needs a 'value'")
+    if op == 'between' and (not isinstance(spec['value'], list) or len(spec['value']) != 2):
+        raise ValueError(f"{path}: 'between' needs a [low, high] value")
+
+    compare = OPERATORS[op]
+    value = spec.get('value')
+
+    def evaluate(frame: pd.DataFrame) -> pd.Series:
+        if field not in frame.columns:
+            raise ValueError(f"{path}: unknown field '{field}'")
+        return compare(frame[field], value).fillna(False).to_numpy(dtype=bool)
+
+    return evaluate
+
+
+def _to_python(value: Any) -> Any:
+    """Convert NumPy/pandas scalars to JSON-serializable Python values"""
+    if isinstance(value, list):
+        return value
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, pd.Timestamp):
+        return value.isoformat()
+    if isinstance(value, float) and not np.isfinite(value):
+        return None
+    return value
+
+
+class CompiledRuleset:
+    """
+    A validated DSL ruleset, ready to run on any number of DataFrames
+
+    Ruleset format:
+        {
+            'name': str,
+            'group_by': 'player_id',          # optional; rows are labelled when absent
+            'time_column': 'timestamp',       # required by windowed aggregations
+            'aggregations': {                 # only with group_by
+                'total_spend': {'column': 'amount', 'agg': 'sum'},
+                'max_tx_per_hour': {'agg': 'count', 'window': '1h'},
+                'repeat_999': {'agg': 'count', 'where': {'field': 'amount', 'op': '==', 'value': 999.99}}
+            },
+            'labels': [                       # first matching label wins
+                {'label': 'whale', 'when': {'any': [
+                    {'field': 'total_spend', 'op': '>', 'value': 500}, ...]}}
+            ],
+            'default_label': 'casual',
+            'flags': [                        # independent boolean flags
+                {'flag': 'rapid_velocity', 'when': {'field': 'max_tx_per_hour', 'op': '>', 'value': 5}}
+            ],
+            'max_matches': 1000               # cap on entities/rows listed in the output
+        }
+
+    A windowed aggregation is computed per (entity, time bucket) and reports
+    the maximum over buckets, e.g. "most transactions in any one hour".
+    """
+
+    def __init__(self, spec: Dict[str, Any]):
+        self.name = spec.get('name', 'Unnamed')
+        self.group_by = spec.get('group_by')
+        self.time_column = spec.get('time_column')
+        self.default_label = spec.get('default_label', 'none')
+        self.max_matches = int(spec.get('max_matches', 1000))
+
+        aggregations = spec.get('aggregations', {})
+        if aggregations and not self.group_by:
+            raise ValueError("'aggregations' require 'group_by'")
+
+        self.aggregations: List[Dict[str, Any]] = []
+        for name, agg_spec in aggregations.items():
+            agg = agg_spec.get('agg')
+            if agg not in AGGREGATIONS:
+                raise ValueError(f"aggregations.{name}: unknown agg '{agg}' (use {', '.join(sorted(AGGREGATIONS))})")
+            if agg != 'count' and not agg_spec.get('column'):
+                raise ValueError(f"aggregations.{name}: '{agg}' needs a 'column'")
+            if agg_spec.get('window') and not self.time_column:
+                raise ValueError(f"aggregations.{name}: windowed aggregations need 'time_column'")
+
+            self.aggregations.append({
+                'name': name,
+                'agg': agg,
+                'column': agg_spec.get('column'),
+                'window': agg_spec.get('window'),
+                'where': _compile_condition(agg_spec['where'], f"aggregations.{name}.where")
+                if 'where' in agg_spec else None
+            })
+
+        self.labels = [
+            (rule['label'], _compile_condition(rule['when'], f"labels[{i}].when"))
+            for i, rule in enumerate(spec.get('labels', []))
+        ]
+        self.flags = [
+            (rule['flag'], _compile_condition(rule['when'], f"flags[{i}].when"))
+            for i, rule in enumerate(spec.get('flags', []))
+        ]
+
+        if not self.labels and not self.flags:
+            raise ValueError("DSL ruleset needs at least one label or flag rule")
+
+    def _time_buckets(self, df: pd.DataFrame, window: str) -> pd.Series:
+        times = df[self.time_column]
+        if not pd.api.types.is_datetime64_any_dtype(times):
+            times = pd.to_datetime(times, errors='coerce', utc=True)
+        try:
+            return times.dt.floor(window)
+        except ValueError:
+            # Calendar windows ('M', 'W') are not fixed frequencies
+            if times.dt.tz is not None:
+                times = times.dt.tz_localize(None)
+            return times.dt.to_period(window).dt.start_time
+
+    def aggregate(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Compute one row per group with every aggregation as a column"""
+        if self.group_by not in df.columns:
+            raise ValueError(f"group_by column '{self.group_by}' not in data")
+
+        # Hash the group key once; every aggregation then groups by int codes
+        codes, uniques = pd.factorize(df[self.group_by])
+        frame = pd.DataFrame(index=pd.Index(uniques, name=self.group_by))
+        has_key = codes >= 0
+        buckets: Dict[str, np.ndarray] = {}
+
+        for agg in self.aggregations:
+            mask = has_key
+            if agg['where'] is not None:
+                mask = mask & agg['where'](df)
+
+            group_keys = [codes[mask]]
+            if agg['window']:
+                if agg['window'] not in buckets:
+                    buckets[agg['window']] = self._time_buckets(df, agg['window']).to_numpy()
+                group_keys.append(buckets[agg['window']][mask])
+
+            if agg['agg'] == 'count' and not agg['column']:
+                values = pd.Series(np.ones(len(group_keys[0]), dtype=np.int64)).groupby(group_keys).sum()
+            else:
+                column = df[agg['column']].to_numpy()[mask]
+                values = pd.Series(column).groupby(group_keys).agg(agg['agg'])
+
+            if agg['window']:
+                values = values.groupby(level=0).max()
+
+            frame[agg['name']] = _fill_missing(agg['agg'], values.reindex(np.arange(len(uniques))))
+
+        return frame
+
+    def classify(self, frame: pd.DataFrame) -> Dict[str, Any]:
+        """Apply label and flag rules to an aggregated (or row-level) frame"""
+        labels = np.full(len(frame), self.default_label, dtype=object)
+        if self.labels:
+            labels = np.select(
+                [condition(frame) for _, condition in self.labels],
+                [label for label, _ in self.labels],
+                default=self.default_label
+            )
+
+        flag_masks = {flag: condition(frame) for flag, condition in self.flags}
+
+        label_names = [label for label, _ in self.labels] + [self.default_label]
+        label_counts = pd.Series(labels).value_counts()
+
+        interesting = labels != self.default_label
+        for mask in flag_masks.values():
+            interesting = interesting | mask
+
+        positions = np.flatnonzero(interesting)
+        matches = []
+        for pos in positions[:self.max_matches]:
+            match = {
+                'label': labels[pos],
+                'flags': [flag for flag, mask in flag_masks.items() if mask[pos]]
+            }
+            if self.group_by:
+                match[self.group_by] = frame.index[pos]
+            else:
+                match['row'] = int(pos)
+            match.update(frame.iloc[pos].to_dict())
+            matches.append(match)
+
+        return {
+            'label_counts': {name: int(label_counts.get(name, 0)) for name in label_names},
+            'flag_counts': {flag: int(mask.sum()) for flag, mask in flag_masks.items()},
+            'evaluated': len(frame),
+            'match_count': len(positions),
+            'matches': [{key: _to_python(value) for key, value in match.items()} for match in matches],
+            'truncated': len(positions) > self.max_matches
+        }
+
+    def evaluate(self, df: pd.DataFrame) -> Dict[str, Any]:
+        """Run the ruleset on a DataFrame"""
+        frame = self.aggregate(df) if self.group_by else df
+        return {
+            'level': 'group' if self.group_by else 'row',
+            'group_by': self.group_by,
+            **self.classify(frame)
+        }
+
+    def evaluate_chunks(self, chunks: Iterable[pd.DataFrame]) -> Dict[str, Any]:
+        """Run the ruleset over a stream of DataFrame chunks (see ChunkedEvaluation)"""
+        evaluation = ChunkedEvaluation(self)
+        for chunk in chunks:
+            evaluation.update(chunk)
+        return evaluation.result()
+
+
+def _fill_missing(agg: str, values: pd.Series) -> np.ndarray:
+    """Fill groups with no qualifying rows: counts and sums are 0, the rest NaN"""
+    if agg in ('count', 'nunique'):
+        values = values.fillna(0).astype(np.int64)
+    elif agg == 'sum':
+        values = values.fillna(0)
+    return values.to_numpy()
+
+
+# Partial aggregate columns kept per group, and how partials from two chunks
+# combine. nunique keeps its distinct (group, value) pairs in the index.
+_PARTIAL_STATES: Dict[str, Dict[str, str]] = {
+    'sum': {'sum': 'sum'},
+    'count': {'count': 'sum'},
+    'min': {'min': 'min'},
+    'max': {'max': 'max'},
+    'mean': {'sum': 'sum', 'count': 'sum'},
+    'std': {'sum': 'sum', 'sumsq': 'sum', 'count': 'sum'},
+    'nunique': {}
+}
+
+
+def _relabel_groups(index: pd.Index, uniques: pd.Index) -> pd.Index:
+    """Replace per-chunk group codes (level 0) with the group key values"""
+    if isinstance(index, pd.MultiIndex):
+        return index.set_levels(uniques.take(index.levels[0]), level=0)
+    return pd.Index(uniques.take(index))
+
+
+class ChunkedEvaluation:
+    """
+    Evaluate a CompiledRuleset chunk by chunk with bounded memory
+
+    Group-level rulesets keep mergeable partial aggregates per group (per
+    group and time bucket for windowed aggregations): sums, non-null counts,
+    min/max, sums of squares for std, and distinct values for nunique.
+    Every chunk is reduced and folded into that state, so memory follows
+    the chunk size and the number of groups, not the number of rows.
+    'median' has no mergeable partial and is rejected.
+
+    Row-level rulesets classify each chunk on its own and add up the counts.
+    """
+
+    def __init__(self, compiled: CompiledRuleset):
+        self.compiled = compiled
+        self.rows = 0
+
+        for agg in compiled.aggregations:
+            if agg['agg'] not in _PARTIAL_STATES:
+                raise ValueError(f"aggregations.{agg['name']}: '{agg['agg']}' is not supported in chunked mode")
+
+        self._groups: Optional[pd.Index] = None
+        self._partials: Dict[str, pd.DataFrame] = {}
+        self._row_result: Optional[Dict[str, Any]] = None
+
+    def update(self, df: pd.DataFrame):
+        """Fold one chunk into the running state"""
+        if self.compiled.group_by:
+            self._update_groups(df)
+        else:
+            self._update_rows(df)
+        self.rows += len(df)
+
+    def _update_groups(self, df: pd.DataFrame):
+        compiled = self.compiled
+        if compiled.group_by not in df.columns:
+            raise ValueError(f"group_by column '{compiled.group_by}' not in data")
+
+        codes, uniques = pd.factorize(df[compiled.group_by])
+        uniques = pd.Index(uniques)
+
+        # Remember groups in first-seen order, like the in-memory aggregate()
+        if self._groups is None:
+            self._groups = uniques
+        else:
+            self._groups = self._groups.append(uniques[~uniques.isin(self._groups)])
+
+        has_key = codes >= 0
+        buckets: Dict[str, np.ndarray] = {}
+
+        for agg in compiled.aggregations:
+            mask = has_key
+            if agg['where'] is not None:
+                mask = mask & agg['where'](df)
+
+            group_keys = [codes[mask]]
+            if agg['window']:
+                if agg['window'] not in buckets:
+                    buckets[agg['window']] = compiled._time_buckets(df, agg['window']).to_numpy()
+                group_keys.append(buckets[agg['window']][mask])
+
+            if agg['column']:
+                values = pd.Series(df[agg['column']].to_numpy()[mask])
+            else:
+                values = pd.Series(np.ones(int(mask.sum()), dtype=np.int64))
+
+            partial = self._reduce(agg['agg'], values, group_keys)
+            partial.index = _relabel_groups(partial.index, uniques)
+
+            previous = self._partials.get(agg['name'])
+            if previous is not None:
+                partial = self._combine(agg['agg'], pd.concat([previous, partial]))
+            self._partials[agg['name']] = partial
+
+    @staticmethod
+    def _reduce(agg: str, values: pd.Series, group_keys: List[np.ndarray]) -> pd.DataFrame:
+        """Reduce one chunk to its partial aggregate per group"""
+        if agg == 'nunique':
+            pairs = pd.DataFrame({f"key{i}": keys for i, keys in enumerate(group_keys)})
+            pairs['value'] = values.to_numpy()
+            pairs = pairs.dropna(subset=['value']).drop_duplicates()
+            return pd.DataFrame(index=pd.MultiIndex.from_frame(pairs))
+
+        grouped = values.groupby(group_keys)
+        partial = {}
+        for state in _PARTIAL_STATES[agg]:
+            if state == 'sumsq':
+                partial[state] = (values * values).groupby(group_keys).sum()
+            else:
+                partial[state] = getattr(grouped, state)()
+        return pd.DataFrame(partial)
+
+    @staticmethod
+    def _combine(agg: str, partials: pd.DataFrame) -> pd.DataFrame:
+        """Merge partial aggregates that share a group"""
+        if agg == 'nunique':
+            return partials[~partials.index.duplicated()]
+        levels = list(range(partials.index.nlevels))
+        return partials.groupby(level=levels).agg(_PARTIAL_STATES[agg])
+
+    @staticmethod
+    def _finalize(agg: str, partial: pd.DataFrame) -> pd.Series:
+        """Turn a merged partial aggregate into the aggregation's values"""
+        if agg == 'nunique':
+            levels = list(range(partial.index.nlevels - 1))
+            return partial.groupby(level=levels).size()
+        if agg == 'mean':
+            return partial['sum'] / partial['count'].where(partial['count'] > 0)
+        if agg == 'std':
+            count = partial['count'].where(partial['count'] > 1)
+            variance = (partial['sumsq'] - partial['sum'] ** 2 / count) / (count - 1)
+            return np.sqrt(variance.clip(lower=0))
+        return partial[agg]
+
+    def _update_rows(self, df: pd.DataFrame):
+        output = self.compiled.classify(df)
+        for match in output['matches']:
+            match['row'] += self.rows
+
+        if self._row_result is None:
+            self._row_result = output
+            return
+
+        merged = self._row_result
+        for key in ('label_counts', 'flag_counts'):
+            for name, count in output[key].items():
+                merged[key][name] = merged[key].get(name, 0) + count
+        merged['evaluated'] += output['evaluated']
+        merged['match_count'] += output['match_count']
+        room = self.compiled.max_matches - len(merged['matches'])
+        merged['matches'].extend(output['matches'][:max(0, room)])
+        merged['truncated'] = merged['match_count'] > self.compiled.max_matches
+
+    def result(self) -> Dict[str, Any]:
+        """Classify the merged state; same output format as CompiledRuleset.evaluate"""
+        compiled = self.compiled
+
+        if not compiled.group_by:
+            output = self._row_result or compiled.classify(pd.DataFrame())
+            return {'level': 'row', 'group_by': None, **output}
+
+        groups = self._groups if self._groups is not None else pd.Index([])
+        frame = pd.DataFrame(index=pd.Index(groups, name=compiled.group_by))
+        for agg in compiled.aggregations:
+            partial = self._partials.get(agg['name'])
+            if partial is None:
+                values = pd.Series(dtype=float)
+            else:
+                values = self._finalize(agg['agg'], partial)
+                if agg['window']:
+                    values = values.groupby(level=0).max()
+            frame[agg['name']] = _fill_missing(agg['agg'], values.reindex(groups))
+
+        return {'level': 'group', 'group_by': compiled.group_by, **compiled.classify(frame)}
+
+
+_compiled_cache: 'OrderedDict[str, CompiledRuleset]' = OrderedDict()
+_compiled_cache_lock = threading.Lock()
+_COMPILED_CACHE_SIZE = 128
+
+
+def compile_ruleset(spec: Dict[str, Any]) -> CompiledRuleset:
+    """
+    Compile a DSL ruleset, reusing earlier compilations of the same spec
+
+    Raises:
+        ValueError: If the ruleset is malformed
+    """
+    key = json.dumps(spec, sort_keys=True, default=str)
+    with _compiled_cache_lock:
+        if key in _compiled_cache:
+            _compiled_cache.move_to_end(key)
+            return _compiled_cache[key]
+
+    compiled = CompiledRuleset(spec)
+
+    with _compiled_cache_lock:
+        _compiled_cache[key] = compiled
+        if len(_compiled_cache) > _COMPILED_CACHE_SIZE:
+            _compiled_cache.popitem(last=False)
+
+    return compiled
+
+
+# Player tier rules from BedrockAnalyzer's prompt, expressed in the DSL
+PLAYER_TIER_RULESET = {
+    'name': 'Player Tiers',
+    'group_by': 'player_id',
+    'time_column': 'timestamp',
+    'aggregations': {
+        'total_spend': {'column': 'amount', 'agg': 'sum'},
+        'avg_transaction': {'column': 'amount', 'agg': 'mean'},
+        'transaction_count': {'agg': 'count'},
+        'max_tx_per_hour': {'agg': 'count', 'window': '1h'},
+        'repeat_999_count': {'agg': 'count', 'where': {'field': 'amount', 'op': '==', 'value': 999.99}}
+    },
+    'labels': [
+        {'label': 'whale', 'when': {'any': [
+            {'field': 'total_spend', 'op': '>', 'value': 500},
+            {'field': 'avg_transaction', 'op': '>', 'value': 100}
+        ]}},
+        {'label': 'regular', 'when': {'any': [
+            {'field': 'total_spend', 'op': 'between', 'value': [100, 500]},
+            {'field': 'transaction_count', 'op': '>=', 'value': 10}
+        ]}}
+    ],
+    'default_label': 'casual',
+    'flags': [
+        {'flag': 'rapid_velocity', 'when': {'field': 'max_tx_per_hour', 'op': '>', 'value': 5}},
+        {'flag': 'repeated_999_99', 'when': {'field': 'repeat_999_count', 'op': '>=', 'value': 2}}
+    ]
+}
+
+
+# For local testing
+if __name__ == '__main__':
+    import time
+
+    rows = 1_000_000
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        'player_id': rng.integers(0, 50_000, rows).astype(str),
+        'amount': rng.choice([0.99, 4.99, 19.99, 99.99, 999.99], rows),
+        'timestamp': pd.Timestamp('2025-11-01') + pd.to_timedelta(rng.integers(0, 30 * 86400, rows), unit='s')
+    })
+
+    compiled = compile_ruleset(PLAYER_TIER_RULESET)
+    start_time = time.time()
+    result = compiled.evaluate(df)
+    print(f"Evaluated {rows} rows in {(time.time() - start_time) * 1000:.0f}ms")
+    print(json.dumps({k: v for k, v in result.items() if k != 'matches'}, indent=2))
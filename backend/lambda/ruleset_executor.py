@@ -7,11 +7,26 @@ import json
 import os
 import time
 import hashlib
+import itertools
+import threading
 import pandas as pd
-from typing import Dict, Any, List
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Dict, Any, List, Optional, Iterator, Tuple
 from io import StringIO
 from bedrock_analyzer import BedrockAnalyzer
 from walrus_uploader import WalrusUploader
+from sql_engine import SqlRuleEngine
+from python_sandbox import get_python_sandbox
+from rule_dsl import compile_ruleset, CompiledRuleset, ChunkedEvaluation
+from json_stream import iter_json_rows, iter_row_batches
+from numeric_summary import NumericSummary
+from columnar_ingest import read_wrapped_dataset
+from result_index import ResultIndex
+from dataset_profile import profile_dataframe, get_profile_store
+from prompt_sample import stratified_sample, StratifiedSampler, fit_sample, format_sample, describe_sample, default_sample_tokens
+from data_digest import DigestBuilder, digest_dataframe, format_digest, prompt_context
+from metrics import StageTimer, use_timer, stage, record_stage
+from token_budget import PromptBudget
 
 
 class RulesetExecutor:
@@ -20,16 +35,38 @@ class RulesetExecutor:
     RULE_TYPE_AI = 1
     RULE_TYPE_SQL = 2
     RULE_TYPE_PYTHON = 3
+    RULE_TYPE_DSL = 4
+
+    # Metric label for each rule type
+    RULE_TYPE_NAMES = {
+        RULE_TYPE_AI: 'AI',
+        RULE_TYPE_SQL: 'SQL',
+        RULE_TYPE_PYTHON: 'Python',
+        RULE_TYPE_DSL: 'DSL'
+    }
+
+    # Bump whenever a rule type's output format or semantics change, so
+    # memoized results from older engines are not reused
+    ENGINE_VERSION = '1'
+
+    # Rule types whose output depends only on the data and ruleset blobs
+    DETERMINISTIC_RULE_TYPES = (RULE_TYPE_SQL, RULE_TYPE_DSL)
 
     def __init__(self):
         self.bedrock = BedrockAnalyzer()
         self.walrus = WalrusUploader()
+        self.sql_engine = SqlRuleEngine()
+        self.results = ResultIndex()
+        self.profiles = get_profile_store()
+        # Rows per batch in chunked mode; peak memory scales with this
+        self.chunk_rows = int(os.getenv('EXECUTOR_CHUNK_ROWS', '100000'))
 
     def execute(
         self,
         data_blob_id: str,
         ruleset_blob_id: str,
-        rule_type: int
+        rule_type: int,
+        chunked: bool = False
     ) -> Dict[str, Any]:
         """
         Execute a ruleset on data
@@ -37,62 +74,658 @@ class RulesetExecutor:
         Args:
             data_blob_id: Walrus blob ID of the data (CSV/JSON)
             ruleset_blob_id: Walrus blob ID of the ruleset
-            rule_type: 1=AI, 2=SQL, 3=Python
+            rule_type: 1=AI, 2=SQL, 3=Python, 4=DSL
+            chunked: Stream the data in EXECUTOR_CHUNK_ROWS batches instead
+                of loading it whole (AI/SQL/DSL only, JSON row data only)
 
         Returns:
             {
                 'result_blob_id': str,
                 'verification_hash': str,
+                'encoding': str,           # result blob encoding (canonical_json)
                 'execution_time_ms': int,
                 'row_count': int,
-                'summary': Dict
+                'summary': Dict,
+                'result_expires_at': float,  # Unix time the result blob is stored until
+                'timings': {
+                    'stages': {name: {'ms': int, 'bytes': int}},  # bytes where data moves
+                    'fetch_wall_ms': int,      # unchunked fetches only
+                    'fetch_overlap_ms': int,
+                    'total_ms': int
+                }
             }
+
+        Stage timings are also added to the per-rule-type histograms served
+        at /metrics.
         """
 
         start_time = time.time()
+        timer = StageTimer()
+        fetch_timings = {}
+        status = 'error'
+
+        try:
+            with use_timer(timer):
+                # 0. Deterministic rules on the same blobs were already computed
+                response = self._lookup_result(data_blob_id, ruleset_blob_id, rule_type, None, start_time)
+
+                if not response and chunked:
+                    response = self._execute_streamed(data_blob_id, ruleset_blob_id, rule_type, start_time)
+
+                elif not response:
+                    # 1-2. Fetch ruleset and data concurrently; the ruleset is
+                    # validated while the (larger) data blob is still in flight
+                    fetched = self._fetch_inputs(data_blob_id, ruleset_blob_id, rule_type, start_time)
+                    fetch_timings = fetched['timings']
+                    response = fetched.get('cached')
+                    if not response:
+                        response = self._execute_loaded(
+                            data_blob_id, fetched['data'], fetched['ruleset'], rule_type, start_time
+                        )
+                        self._store_result(data_blob_id, ruleset_blob_id, rule_type, fetched['ruleset'], response)
+
+            status = 'cached' if response.get('cached') else 'success'
+            response['timings'] = timer.to_dict(**fetch_timings)
+            return response
+
+        except Exception as e:
+            print(f"Execution error: {str(e)}")
+            raise
+
+        finally:
+            timer.publish(self._rule_type_name(rule_type), status)
+
+    def _execute_streamed(
+        self,
+        data_blob_id: str,
+        ruleset_blob_id: str,
+        rule_type: int,
+        start_time: float
+    ) -> Dict[str, Any]:
+        """Chunked-mode execute(): the data is streamed, never held whole"""
+        ruleset = self._download_ruleset(ruleset_blob_id, rule_type)
+
+        if rule_type not in self.DETERMINISTIC_RULE_TYPES:
+            cached = self._lookup_result(data_blob_id, ruleset_blob_id, rule_type, ruleset, start_time)
+            if cached:
+                return cached
+
+        response = self._execute_chunked(data_blob_id, ruleset, rule_type, start_time)
+        self._store_result(data_blob_id, ruleset_blob_id, rule_type, ruleset, response)
+        return response
+
+    def _execute_chunked(
+        self,
+        data_blob_id: str,
+        ruleset: Dict[str, Any],
+        rule_type: int,
+        start_time: float
+    ) -> Dict[str, Any]:
+        """
+        Run a rule over the data blob in fixed-size batches
+
+        Rows are decoded from the blob stream one at a time and grouped into
+        DataFrames of chunk_rows rows. SQL loads the batches into a disk-backed
+        DuckDB table; DSL and the AI profile fold each batch into mergeable
+        partial aggregates, and AI rules build their digest and draw their
+        prompt sample batch by batch. Python rules need the whole DataFrame and are
+        rejected.
+        """
+        if rule_type == self.RULE_TYPE_PYTHON:
+            raise ValueError("Python rulesets cannot run in chunked mode")
+
+        print(f"Streaming data from Walrus in {self.chunk_rows}-row chunks: {data_blob_id}")
+        streamed = {'bytes': 0}
+
+        def count_bytes(blob_chunks: Iterator[bytes]) -> Iterator[bytes]:
+            for blob_chunk in blob_chunks:
+                streamed['bytes'] += len(blob_chunk)
+                yield blob_chunk
+
+        rows = iter_json_rows(count_bytes(self.walrus.iter_blob_chunks(data_blob_id)))
+        chunks = iter_row_batches(rows, self.chunk_rows)
 
+        # Download, decoding and evaluation are interleaved, so they are
+        # timed together as one 'stream' stage
+        with stage('stream') as streaming:
+            if rule_type == self.RULE_TYPE_SQL:
+                query_result = self.sql_engine.execute_chunks(
+                    chunks,
+                    ruleset.get('query', ''),
+                    params=ruleset.get('params'),
+                    max_rows=ruleset.get('max_rows'),
+                    timeout_seconds=ruleset.get('timeout_seconds')
+                )
+                row_count = query_result.pop('input_rows')
+
+            elif rule_type == self.RULE_TYPE_DSL:
+                compiled = compile_ruleset(ruleset)
+                evaluation = ChunkedEvaluation(compiled)
+                for chunk in chunks:
+                    evaluation.update(chunk)
+                row_count = evaluation.rows
+
+            else:
+                context = prompt_context(ruleset.get('prompt_context'))
+                sampler = StratifiedSampler(ruleset.get('sample_tokens')) if context != 'digest' else None
+                digester = DigestBuilder(
+                    ruleset.get('entity_column'), ruleset.get('measure_column')
+                ) if context != 'sample' else None
+
+                # The digest keeps a NumericSummary already; otherwise one is
+                # only needed when the profile is not stored yet. Its profile
+                # lacks column_stats, so it only feeds this prompt and is not
+                # stored for other readers of the blob
+                profile = self.profiles.get(data_blob_id)
+                summary = None
+                if profile is None:
+                    summary = digester.numeric if digester is not None else NumericSummary()
+
+                for chunk in chunks:
+                    if sampler is not None:
+                        sampler.update(chunk)
+                    if digester is not None:
+                        digester.update(chunk)
+                    elif summary is not None:
+                        summary.update(chunk)
+
+                if summary is not None:
+                    profile = summary.profile()
+                sample = sampler.result() if sampler is not None else None
+                digest = digester.result() if digester is not None else None
+                row_count = profile['row_count']
+
+            streaming.bytes = streamed['bytes']
+
+        if row_count == 0:
+            raise ValueError("Dataset is empty")
+
+        if rule_type == self.RULE_TYPE_SQL:
+            result = self._sql_result(ruleset, query_result, row_count)
+        elif rule_type == self.RULE_TYPE_DSL:
+            result = self._dsl_result(compiled, evaluation.result(), row_count)
+        else:
+            result = self._execute_ai_rule(pd.DataFrame(), ruleset, profile, sample, digest)
+
+        print(f"Processed {row_count} rows in chunks")
+        return self._upload_result(result, row_count, start_time)
+
+    def _fetch_inputs(
+        self,
+        data_blob_id: str,
+        ruleset_blob_id: str,
+        rule_type: int,
+        start_time: float
+    ) -> Dict[str, Any]:
+        """
+        Download the data blob in the background while the ruleset is
+        downloaded and validated on the calling thread
+
+        A ruleset that fails to download or validate, or an AI result that
+        is already memoized, cancels the data download.
+
+        Returns:
+            {'data', 'ruleset', 'timings'} or {'cached', 'timings'}; the
+            stages themselves go to the current StageTimer
+        """
+        cancel = threading.Event()
+        data_span = {}
+
+        def fetch_data():
+            data_span['start'] = time.perf_counter()
+            try:
+                return self.walrus.download_blob_bytes(data_blob_id, cancel=cancel)
+            finally:
+                data_span['end'] = time.perf_counter()
+
+        fetch_start = time.perf_counter()
+        pool = ThreadPoolExecutor(max_workers=1)
         try:
-            # 1. Download data from Walrus
             print(f"Downloading data from Walrus: {data_blob_id}")
-            data = self.walrus.download_blob(data_blob_id)
+            data_future = pool.submit(fetch_data)
+
+            try:
+                ruleset_start = time.perf_counter()
+                ruleset = self._download_ruleset(ruleset_blob_id, rule_type)
+                ruleset_ready = time.perf_counter()
+
+                if rule_type not in self.DETERMINISTIC_RULE_TYPES:
+                    cached = self._lookup_result(data_blob_id, ruleset_blob_id, rule_type, ruleset, start_time)
+                    if cached:
+                        cancel.set()
+                        return {'cached': cached, 'timings': {}}
+            except BaseException:
+                cancel.set()
+                raise
+
+            data = data_future.result()
+        finally:
+            # Never wait on a cancelled transfer; it stops at its next chunk
+            pool.shutdown(wait=False)
+
+        fetch_end = time.perf_counter()
+        record_stage('fetch_data', data_span['end'] - data_span['start'], len(data))
+        overlap = min(ruleset_ready, data_span['end']) - max(ruleset_start, data_span['start'])
+
+        return {
+            'data': data,
+            'ruleset': ruleset,
+            'timings': {
+                'fetch_wall_ms': int((fetch_end - fetch_start) * 1000),
+                'fetch_overlap_ms': int(max(0.0, overlap) * 1000)
+            }
+        }
+
+    def execute_many(
+        self,
+        data_blob_ids: List[str],
+        ruleset_blob_id: str,
+        rule_type: int,
+        max_workers: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Execute one ruleset on many data blobs
+
+        Returns:
+            One entry per data blob, in input order (see iter_execute_many)
+        """
+        results = {
+            item['data_blob_id']: item
+            for item in self.iter_execute_many(data_blob_ids, ruleset_blob_id, rule_type, max_workers)
+        }
+        return [results[data_blob_id] for data_blob_id in data_blob_ids]
+
+    def iter_execute_many(
+        self,
+        data_blob_ids: List[str],
+        ruleset_blob_id: str,
+        rule_type: int,
+        max_workers: Optional[int] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Execute one ruleset on many data blobs, yielding results as they finish
+
+        The ruleset is downloaded once. Data downloads, parsing and execution
+        run on a bounded thread pool with at most 2 * max_workers items in
+        flight, so memory stays bounded for any number of blobs. A failing
+        item yields an error entry and does not stop the batch; if the
+        ruleset cannot be downloaded or validated, every item that is not
+        already memoized gets an error entry with that reason.
+
+        Args:
+            data_blob_ids: Walrus blob IDs of the datasets
+            ruleset_blob_id: Walrus blob ID of the ruleset
+            rule_type: 1=AI, 2=SQL, 3=Python, 4=DSL
+            max_workers: Pool size (default EXECUTOR_BATCH_WORKERS or 8)
+
+        Yields:
+            {
+                'data_blob_id': str,
+                'success': bool,
+                'error': str,                # on failure
+                ...                          # execute() fields on success
+            }
+        """
+        max_workers = max_workers or int(os.getenv('EXECUTOR_BATCH_WORKERS', '8'))
+
+        # Shared by every item; an unusable ruleset fails only the items that need it
+        ruleset, ruleset_error = None, None
+        try:
+            ruleset = self._download_ruleset(ruleset_blob_id, rule_type)
+        except Exception as e:
+            print(f"Batch ruleset {ruleset_blob_id} failed: {str(e)}")
+            ruleset_error = f"Ruleset {ruleset_blob_id} failed: {str(e)}"
+
+        def run_item(data_blob_id: str) -> Dict[str, Any]:
+            item_start = time.time()
+            timer = StageTimer()
+            status = 'error'
+            try:
+                with use_timer(timer):
+                    result = self._lookup_result(data_blob_id, ruleset_blob_id, rule_type, ruleset, item_start)
+                    if not result and ruleset_error:
+                        return {'data_blob_id': data_blob_id, 'success': False, 'error': ruleset_error}
+                    if not result:
+                        result = self._execute_loaded(
+                            data_blob_id, self._download_data(data_blob_id), ruleset, rule_type, item_start
+                        )
+                        self._store_result(data_blob_id, ruleset_blob_id, rule_type, ruleset, result)
+                status = 'cached' if result.get('cached') else 'success'
+                return {'data_blob_id': data_blob_id, 'success': True, **result, 'timings': timer.to_dict()}
+            except Exception as e:
+                print(f"Batch item {data_blob_id} failed: {str(e)}")
+                return {'data_blob_id': data_blob_id, 'success': False, 'error': str(e)}
+            finally:
+                timer.publish(self._rule_type_name(rule_type), status)
+
+        pending_ids = iter(data_blob_ids)
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            in_flight = set()
+            for data_blob_id in itertools.islice(pending_ids, max_workers * 2):
+                in_flight.add(pool.submit(run_item, data_blob_id))
+
+            while in_flight:
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+                    next_id = next(pending_ids, None)
+                    if next_id is not None:
+                        in_flight.add(pool.submit(run_item, next_id))
+
+    def execute_rulesets(
+        self,
+        data_blob_id: str,
+        rulesets: List[Dict[str, Any]],
+        max_workers: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Execute several rulesets on one dataset
+
+        The data blob is downloaded and parsed once; the DataFrame and its
+        profile are shared read-only by every rule, which run concurrently.
+        Each rule downloads its own ruleset and uploads its own result, so
+        one failure does not affect the others. If the shared data download
+        or parse fails, every rule that needed it gets an error entry with
+        that reason. The shared fetch and parse stages appear in every
+        entry's timings.
+
+        Args:
+            data_blob_id: Walrus blob ID of the data
+            rulesets: [{'ruleset_blob_id': str, 'rule_type': int}, ...]
+            max_workers: Pool size (default EXECUTOR_BATCH_WORKERS or 8)
+
+        Returns:
+            One entry per ruleset, in input order:
+            {
+                'ruleset_blob_id': str,
+                'rule_type': int,
+                'success': bool,
+                'error': str,                # on failure
+                ...                          # execute() fields on success
+            }
+        """
+        start_time = time.time()
+        max_workers = max_workers or int(os.getenv('EXECUTOR_BATCH_WORKERS', '8'))
+        shared = StageTimer()
+
+        def lookup(i: int) -> Tuple[Optional[Dict[str, Any]], Optional[str], StageTimer]:
+            """Memoized result of one entry, or the error that fails it"""
+            spec = rulesets[i]
+            timer = StageTimer()
+            try:
+                if not isinstance(spec, dict):
+                    raise ValueError("Ruleset entry must be an object with 'ruleset_blob_id' and 'rule_type'")
+                with use_timer(timer):
+                    cached = self._lookup_result(
+                        data_blob_id, spec.get('ruleset_blob_id'), spec.get('rule_type'), None, start_time
+                    )
+                return cached, None, timer
+            except Exception as e:
+                print(f"Fan-out entry {i} failed: {str(e)}")
+                return None, str(e), timer
+
+        def run_item(i: int) -> Dict[str, Any]:
+            spec = rulesets[i] if isinstance(rulesets[i], dict) else {}
+            ruleset_blob_id = spec.get('ruleset_blob_id')
+            rule_type = spec.get('rule_type')
+            item = {'ruleset_blob_id': ruleset_blob_id, 'rule_type': rule_type}
+            result, lookup_error, lookup_timer = lookups[i]
+            timer = shared.copy()
+            timer.merge(lookup_timer)
+            status = 'error'
+            try:
+                if lookup_error:
+                    return {**item, 'success': False, 'error': lookup_error}
+                with use_timer(timer):
+                    if not result:
+                        ruleset = self._download_ruleset(ruleset_blob_id, rule_type)
+                        if rule_type not in self.DETERMINISTIC_RULE_TYPES:
+                            result = self._lookup_result(data_blob_id, ruleset_blob_id, rule_type, ruleset, start_time)
+                    if not result and data_error:
+                        return {**item, 'success': False, 'error': data_error}
+                    if not result:
+                        result = self._execute_parsed(df, ruleset, rule_type, start_time, profile)
+                        self._store_result(data_blob_id, ruleset_blob_id, rule_type, ruleset, result)
+                status = 'cached' if result.get('cached') else 'success'
+                return {**item, 'success': True, **result, 'timings': timer.to_dict()}
+            except Exception as e:
+                print(f"Ruleset {ruleset_blob_id} failed: {str(e)}")
+                return {**item, 'success': False, 'error': str(e)}
+            finally:
+                timer.publish(self._rule_type_name(rule_type), status)
+
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(rulesets)))) as pool:
+            # Deterministic rules that already ran on this dataset need no data
+            # at all; the lookups (an index read and a HEAD request each) run
+            # concurrently and a failing one only fails its own entry
+            lookups = list(pool.map(lookup, range(len(rulesets))))
+            pending = [i for i, (cached, error, _) in enumerate(lookups) if not cached and not error]
+
+            df = None
+            profile = None
+            data_error = None
+            if pending:
+                with use_timer(shared):
+                    try:
+                        df = self._parse_logged(self._download_data(data_blob_id))
+
+                        # Only AI rules use the profile; look it up once for all of them
+                        if any(rulesets[i].get('rule_type') == self.RULE_TYPE_AI for i in pending):
+                            profile = self._dataset_profile(data_blob_id, df)
+                    except Exception as e:
+                        print(f"Fan-out data {data_blob_id} failed: {str(e)}")
+                        data_error = f"Data blob {data_blob_id} failed: {str(e)}"
+
+            return list(pool.map(run_item, range(len(rulesets))))
+
+    def _memo_ttl(self, rule_type: int, ruleset: Optional[Dict[str, Any]]) -> Optional[float]:
+        """
+        Return how long a result may be reused: 0 = never, None = while its blob is stored
+
+        AI results are only reused when the ruleset opts in with
+        'memoize_ttl_seconds'; Python rules are never reused.
+        """
+        if rule_type in self.DETERMINISTIC_RULE_TYPES:
+            return None
+        if rule_type == self.RULE_TYPE_AI and isinstance(ruleset, dict):
+            return float(ruleset.get('memoize_ttl_seconds') or 0)
+        return 0
+
+    def _lookup_result(
+        self,
+        data_blob_id: str,
+        ruleset_blob_id: str,
+        rule_type: int,
+        ruleset: Optional[Dict[str, Any]],
+        start_time: float
+    ) -> Optional[Dict[str, Any]]:
+        """Return a memoized execute() response, or None"""
+        if self._memo_ttl(rule_type, ruleset) == 0:
+            return None
+
+        with stage('memo_lookup'):
+            cached = self.results.get(data_blob_id, ruleset_blob_id, rule_type, self.ENGINE_VERSION)
+            # A result blob that can no longer be fetched is useless to the caller
+            if cached is not None and not self.walrus.blob_exists(cached['result_blob_id']):
+                print(f"Memoized result {cached['result_blob_id']} is gone; recomputing")
+                self.results.delete(data_blob_id, ruleset_blob_id, rule_type, self.ENGINE_VERSION)
+                cached = None
+        if cached is None:
+            return None
+
+        # Timings describe this call, not the run that produced the result
+        cached.pop('timings', None)
+
+        print(f"Reusing memoized result {cached['result_blob_id']}")
+        return {
+            **cached,
+            'cached': True,
+            'original_execution_time_ms': cached.get('execution_time_ms'),
+            'execution_time_ms': int((time.time() - start_time) * 1000)
+        }
+
+    def _store_result(
+        self,
+        data_blob_id: str,
+        ruleset_blob_id: str,
+        rule_type: int,
+        ruleset: Dict[str, Any],
+        response: Dict[str, Any]
+    ) -> None:
+        """Memoize an execute() response if the rule type allows it, until its blob expires"""
+        ttl = self._memo_ttl(rule_type, ruleset)
+        if ttl == 0:
+            return
+        with stage('memo_store'):
+            self.results.put(
+                data_blob_id, ruleset_blob_id, rule_type, self.ENGINE_VERSION, response, ttl,
+                blob_expires_at=response.get('result_expires_at')
+            )
+
+    def _download_ruleset(self, ruleset_blob_id: str, rule_type: int) -> Dict[str, Any]:
+        """Download and validate a ruleset, timing both stages"""
+        print(f"Downloading ruleset from Walrus: {ruleset_blob_id}")
+        with stage('fetch_ruleset') as fetching:
+            raw = self.walrus.download_blob_bytes(ruleset_blob_id)
+            fetching.bytes = len(raw)
+            ruleset = json.loads(raw)
+
+        with stage('validate'):
+            self._validate_ruleset(ruleset, rule_type)
+        return ruleset
 
-            # 2. Download ruleset from Walrus
-            print(f"Downloading ruleset from Walrus: {ruleset_blob_id}")
-            ruleset = self.walrus.download_blob(ruleset_blob_id)
+    def _download_data(self, data_blob_id: str) -> bytes:
+        """Download a data blob's raw bytes, timing the transfer"""
+        print(f"Downloading data from Walrus: {data_blob_id}")
+        with stage('fetch_data') as fetching:
+            data = self.walrus.download_blob_bytes(data_blob_id)
+            fetching.bytes = len(data)
+        return data
 
-            # 3. Parse data
-            df = self._parse_data(data)
-            print(f"Parsed {len(df)} rows")
+    def _rule_type_name(self, rule_type: Any) -> str:
+        return self.RULE_TYPE_NAMES.get(rule_type, str(rule_type))
 
-            # 4. Execute based on rule type
-            if rule_type == self.RULE_TYPE_AI:
-                result = self._execute_ai_rule(df, ruleset)
-            elif rule_type == self.RULE_TYPE_SQL:
-                result = self._execute_sql_rule(df, ruleset)
+    def _validate_ruleset(self, ruleset: Dict[str, Any], rule_type: int) -> None:
+        """Reject unknown rule types and malformed rulesets before any data work"""
+        if rule_type not in (self.RULE_TYPE_AI, self.RULE_TYPE_SQL, self.RULE_TYPE_PYTHON, self.RULE_TYPE_DSL):
+            raise ValueError(f"Invalid rule type: {rule_type}")
+        if not isinstance(ruleset, dict):
+            raise ValueError("Ruleset must be a JSON object")
+        if rule_type == self.RULE_TYPE_DSL:
+            compile_ruleset(ruleset)
+
+    def _execute_loaded(
+        self,
+        data_blob_id: str,
+        data: bytes,
+        ruleset: Dict[str, Any],
+        rule_type: int,
+        start_time: float
+    ) -> Dict[str, Any]:
+        """Parse an already-downloaded data blob, run the rule and upload the result"""
+
+        # 3. Parse data
+        df = self._parse_logged(data)
+
+        profile = None
+        if rule_type == self.RULE_TYPE_AI:
+            profile = self._dataset_profile(data_blob_id, df)
+
+        return self._execute_parsed(df, ruleset, rule_type, start_time, profile)
+
+    def _parse_logged(self, data: bytes) -> pd.DataFrame:
+        """_parse_raw as a timed 'parse' stage"""
+        with stage('parse') as parsing:
+            parsing.bytes = len(data)
+            df = self._parse_raw(data)
+        print(f"Parsed {len(df)} rows")
+        return df
+
+    def _execute_parsed(
+        self,
+        df: pd.DataFrame,
+        ruleset: Dict[str, Any],
+        rule_type: int,
+        start_time: float,
+        profile: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """Run the rule on a parsed DataFrame and upload the result"""
+
+        # 4. Execute based on rule type
+        result = self._run_rule(df, ruleset, rule_type, profile)
+
+        return self._upload_result(result, len(df), start_time)
+
+    def _upload_result(
+        self,
+        result: Dict[str, Any],
+        row_count: int,
+        start_time: float
+    ) -> Dict[str, Any]:
+        """Upload a rule result and build the execute() response"""
+
+        # 5. Upload result to Walrus
+        print("Uploading result to Walrus")
+        upload_result = self.walrus.upload_blob(result)
+
+        # 6. Calculate execution time
+        execution_time_ms = int((time.time() - start_time) * 1000)
+
+        return {
+            'result_blob_id': upload_result['blob_id'],
+            'verification_hash': upload_result['content_hash'],
+            'encoding': upload_result['encoding'],
+            'execution_time_ms': execution_time_ms,
+            'row_count': row_count,
+            'summary': self._generate_summary(result),
+            'aggregator_url': upload_result['aggregator_url'],
+            'result_expires_at': upload_result['expires_at'],
+            'cached': False
+        }
+
+    def _run_rule(
+        self,
+        df: pd.DataFrame,
+        ruleset: Dict[str, Any],
+        rule_type: int,
+        profile: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """Dispatch to the executor for a rule type"""
+        if rule_type == self.RULE_TYPE_AI:
+            # Times its own profile, prompt and model stages
+            return self._execute_ai_rule(df, ruleset, profile)
+
+        with stage('evaluate'):
+            if rule_type == self.RULE_TYPE_SQL:
+                return self._execute_sql_rule(df, ruleset)
             elif rule_type == self.RULE_TYPE_PYTHON:
-                result = self._execute_python_rule(df, ruleset)
+                return self._execute_python_rule(df, ruleset)
+            elif rule_type == self.RULE_TYPE_DSL:
+                return self._execute_dsl_rule(df, ruleset)
             else:
                 raise ValueError(f"Invalid rule type: {rule_type}")
 
-            # 5. Upload result to Walrus
-            print("Uploading result to Walrus")
-            upload_result = self.walrus.upload_blob(result)
+    def _profile_data(self, df: pd.DataFrame) -> Dict[str, Any]:
+        """Compute the column list and numeric summary used by AI rules"""
+        return profile_dataframe(df)
 
-            # 6. Calculate execution time
-            execution_time_ms = int((time.time() - start_time) * 1000)
+    def _dataset_profile(self, data_blob_id: str, df: pd.DataFrame) -> Dict[str, Any]:
+        """Return the stored profile of a data blob, profiling df on the first use"""
+        with stage('profile'):
+            return self.profiles.get_or_compute(data_blob_id, lambda: self._profile_data(df))
 
-            return {
-                'result_blob_id': upload_result['blob_id'],
-                'verification_hash': upload_result['content_hash'],
-                'execution_time_ms': execution_time_ms,
-                'row_count': len(df),
-                'summary': self._generate_summary(result),
-                'aggregator_url': upload_result['aggregator_url']
-            }
+    def _parse_raw(self, raw: bytes) -> pd.DataFrame:
+        """
+        Parse a data blob from its raw bytes
 
-        except Exception as e:
-            print(f"Execution error: {str(e)}")
-            raise
+        DataUploader blobs go through the columnar decoder, which reads the
+        rows straight into typed columns using the stored schema; anything
+        else falls back to json.loads + _parse_data.
+        """
+        df = read_wrapped_dataset(raw)
+        if df is not None:
+            return df
+        return self._parse_data(json.loads(raw))
 
     def _parse_data(self, data: Dict[str, Any]) -> pd.DataFrame:
         """Parse data blob into DataFrame"""
@@ -116,34 +749,81 @@ class RulesetExecutor:
     def _execute_ai_rule(
         self,
         df: pd.DataFrame,
-        ruleset: Dict[str, Any]
+        ruleset: Dict[str, Any],
+        profile: Optional[Dict[str, Any]] = None,
+        sample: Optional[Dict[str, Any]] = None,
+        digest: Optional[Dict[str, Any]] = None
     ) -> Dict[str, Any]:
-        """Execute AI-based ruleset using Bedrock"""
+        """
+        Execute AI-based ruleset using Bedrock
+
+        The ruleset's 'prompt_context' picks what the prompt carries about
+        the data: a digest of every row (quantiles, top categories,
+        per-entity totals, time histogram, outliers), a stratified row
+        sample sized to 'sample_tokens', or both. Chunked mode passes them in.
+        Both are cut to fit AI_MAX_PROMPT_TOKENS, and a prompt that still
+        does not fit raises PromptBudgetError before Bedrock is called.
+        """
 
         prompt_template = ruleset.get('prompt', '')
         model_params = ruleset.get('model_params', {})
+        if not profile:
+            with stage('profile'):
+                profile = self._profile_data(df)
+        context = prompt_context(ruleset.get('prompt_context'))
+        if digest is None and context != 'sample':
+            with stage('digest'):
+                digest = digest_dataframe(df, ruleset.get('entity_column'), ruleset.get('measure_column'))
 
-        # Build context from data
-        data_summary = {
-            'row_count': len(df),
-            'columns': list(df.columns),
-            'sample': df.head(10).to_dict('records')
-        }
+        with stage('build_prompt') as building:
+            # Build context from data (chunked mode passes an empty df and the full row count)
+            row_count = profile.get('row_count', len(df))
+            data_summary = {
+                'row_count': row_count,
+                'columns': profile['columns']
+            }
 
-        # Build full prompt
-        full_prompt = f"""{prompt_template}
+            header = f"""{prompt_template}
 
 Data Summary:
 - Rows: {data_summary['row_count']}
-- Columns: {', '.join(data_summary['columns'])}
+- Columns: {', '.join(data_summary['columns'])}"""
+            footer = "Provide analysis in JSON format."
 
-Sample Data (first 10 rows):
-{json.dumps(data_summary['sample'], indent=2)}
+            # Dataset context gets the tokens the ruleset's own text leaves
+            budget = PromptBudget(provider='bedrock')
+            budget.spend(header, footer, '\n\n', '\n\n')
 
-Provide analysis in JSON format."""
+            data_sections = []
+            if digest is not None:
+                data_sections.append(budget.fit(f"Data Digest (all rows):\n{format_digest(digest)}"))
+
+            # Leave room for the sample's heading line
+            sample_tokens = min(ruleset.get('sample_tokens') or default_sample_tokens(), budget.available - 50)
+            if context != 'digest' and sample_tokens > 0:
+                if sample is None:
+                    with stage('sample'):
+                        sample = stratified_sample(df, sample_tokens)
+                else:
+                    sample = fit_sample(sample, sample_tokens)
+                data_sections.append(f"Representative Sample ({describe_sample(sample)}):\n{format_sample(sample)}")
+            data_context = '\n\n'.join(data_sections)
+
+            # Build full prompt
+            full_prompt = f"""{header}
+
+{data_context}
+
+{footer}"""
+            building.bytes = len(full_prompt.encode('utf-8'))
+
+        # Oversize prompts fail here rather than at the provider
+        projection = budget.check(full_prompt, self.bedrock.max_tokens)
 
         # Call Bedrock
-        response = self.bedrock._invoke_bedrock(full_prompt)
+        with stage('model_call') as calling:
+            response = self.bedrock._invoke_bedrock(full_prompt)
+            calling.bytes = len(response.encode('utf-8'))
 
         # Parse AI response
         try:
@@ -162,13 +842,18 @@ Provide analysis in JSON format."""
             }
 
         # Combine with data stats
+        data_stats = {
+            'total_rows': row_count,
+            'columns': profile['columns'],
+            'numeric_summary': profile['numeric_summary']
+        }
+        if digest is not None:
+            data_stats['digest'] = digest
+
         result = {
             'analysis': analysis,
-            'data_stats': {
-                'total_rows': len(df),
-                'columns': list(df.columns),
-                'numeric_summary': df.describe().to_dict() if len(df.select_dtypes(include='number').columns) > 0 else {}
-            },
+            'data_stats': data_stats,
+            'prompt_budget': projection,
             'ruleset_name': ruleset.get('name', 'Unnamed'),
             'rule_type': 'AI',
             'executed_at': time.time()
@@ -181,18 +866,42 @@ Provide analysis in JSON format."""
         df: pd.DataFrame,
         ruleset: Dict[str, Any]
     ) -> Dict[str, Any]:
-        """Execute SQL query on DataFrame using DuckDB (future)"""
+        """Execute SQL query on DataFrame using DuckDB
+
+        Ruleset format:
+            {
+                'name': str,
+                'query': 'SELECT ... FROM data WHERE amount > $min_amount',
+                'params': {'min_amount': 100},    # optional
+                'max_rows': int,                  # optional, capped by SQL_MAX_ROWS
+                'timeout_seconds': float          # optional, capped by SQL_TIMEOUT_SECONDS
+            }
+        """
 
-        # For MVP, use pandas filtering as SQL-like operations
         sql_query = ruleset.get('query', '')
 
-        # Simple keyword-based filtering
-        # TODO: Integrate DuckDB for real SQL execution
+        query_result = self.sql_engine.execute(
+            df,
+            sql_query,
+            params=ruleset.get('params'),
+            max_rows=ruleset.get('max_rows'),
+            timeout_seconds=ruleset.get('timeout_seconds')
+        )
+
+        return self._sql_result(ruleset, query_result, len(df))
 
+    def _sql_result(
+        self,
+        ruleset: Dict[str, Any],
+        query_result: Dict[str, Any],
+        input_rows: int
+    ) -> Dict[str, Any]:
         result = {
-            'message': 'SQL execution not yet implemented',
-            'query': sql_query,
-            'data_preview': df.head(5).to_dict('records'),
+            'query': ruleset.get('query', ''),
+            'params': ruleset.get('params', {}),
+            **query_result,
+            'input_rows': input_rows,
+            'ruleset_name': ruleset.get('name', 'Unnamed'),
             'rule_type': 'SQL',
             'executed_at': time.time()
         }
@@ -204,23 +913,68 @@ Provide analysis in JSON format."""
         df: pd.DataFrame,
         ruleset: Dict[str, Any]
     ) -> Dict[str, Any]:
-        """Execute sandboxed Python code (future)"""
+        """Execute Python code in a confined process from the warm worker pool
+
+        Ruleset format:
+            {
+                'name': str,
+                'code': 'import pandas as pd\ndef rule(df):\n    return {...}',
+                'params': {...}    # optional, available to the code as `params`
+            }
 
-        # For MVP, return placeholder
-        # TODO: Implement sandboxed Python execution with RestrictedPython
+        The code imports pandas/numpy itself; see PythonSandbox for the limits.
+        """
 
         python_code = ruleset.get('code', '')
+        if not python_code.strip():
+            raise ValueError("Python ruleset has no code")
+
+        # The pool is process-wide, so workers stay warm across execute() calls
+        output = get_python_sandbox().run(df, python_code, ruleset.get('params'))
 
         result = {
-            'message': 'Python execution not yet implemented',
-            'code_preview': python_code[:200],
-            'data_preview': df.head(5).to_dict('records'),
+            'output': output,
+            'params': ruleset.get('params', {}),
+            'input_rows': len(df),
+            'ruleset_name': ruleset.get('name', 'Unnamed'),
             'rule_type': 'Python',
             'executed_at': time.time()
         }
 
         return result
 
+    def _execute_dsl_rule(
+        self,
+        df: pd.DataFrame,
+        ruleset: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Execute declarative threshold rules as vectorized column operations
+
+        See rule_dsl.CompiledRuleset for the ruleset format. No AI call is made.
+        """
+
+        # Compilation is cached, so repeat runs of a ruleset skip validation
+        compiled = compile_ruleset(ruleset)
+        output = compiled.evaluate(df)
+
+        return self._dsl_result(compiled, output, len(df))
+
+    def _dsl_result(
+        self,
+        compiled: CompiledRuleset,
+        output: Dict[str, Any],
+        input_rows: int
+    ) -> Dict[str, Any]:
+        result = {
+            **output,
+            'input_rows': input_rows,
+            'ruleset_name': compiled.name,
+            'rule_type': 'DSL',
+            'executed_at': time.time()
+        }
+
+        return result
+
     def _generate_summary(self, result: Dict[str, Any]) -> Dict[str, str]:
         """Generate human-readable summary"""
 
@@ -232,6 +986,26 @@ Provide analysis in JSON format."""
                 'insights_count': len(analysis.keys()),
                 'preview': str(analysis)[:200] + '...'
             }
+        elif result.get('rule_type') == 'SQL':
+            return {
+                'type': 'SQL Query',
+                'status': 'completed',
+                'result_rows': result.get('row_count', 0),
+                'truncated': result.get('truncated', False)
+            }
+        elif result.get('rule_type') == 'DSL':
+            return {
+                'type': 'Threshold Rules',
+                'status': 'completed',
+                'label_counts': result.get('label_counts', {}),
+                'flag_counts': result.get('flag_counts', {})
+            }
+        elif result.get('rule_type') == 'Python':
+            return {
+                'type': 'Python Rule',
+                'status': 'completed',
+                'preview': str(result.get('output'))[:200]
+            }
         else:
             return {
                 'type': result.get('rule_type', 'Unknown'),
@@ -248,7 +1022,27 @@ def lambda_handler(event, context):
         "action": "execute",
         "data_blob_id": "...",
         "ruleset_blob_id": "...",
-        "rule_type": 1
+        "rule_type": 1,
+        "chunked": false          # optional; stream large datasets in batches
+    }
+
+    Event format (batch):
+    {
+        "action": "execute_batch",
+        "data_blob_ids": ["...", "..."],
+        "ruleset_blob_id": "...",
+        "rule_type": 2,
+        "max_workers": 8
+    }
+
+    Event format (several rulesets on one dataset):
+    {
+        "action": "execute_fanout",
+        "data_blob_id": "...",
+        "rulesets": [
+            {"ruleset_blob_id": "...", "rule_type": 2},
+            {"ruleset_blob_id": "...", "rule_type": 4}
+        ]
     }
     """
 
@@ -266,7 +1060,8 @@ def lambda_handler(event, context):
             result = executor.execute(
                 data_blob_id=body['data_blob_id'],
                 ruleset_blob_id=body['ruleset_blob_id'],
-                rule_type=body['rule_type']
+                rule_type=body['rule_type'],
+                chunked=bool(body.get('chunked', False))
             )
 
             return {
@@ -278,6 +1073,67 @@ def lambda_handler(event, context):
                 'body': json.dumps(result)
             }
 
+        elif action == 'execute_batch':
+            data_blob_ids = body.get('data_blob_ids')
+            if not isinstance(data_blob_ids, list) or not data_blob_ids:
+                return {
+                    'statusCode': 400,
+                    'body': json.dumps({'error': 'data_blob_ids must be a non-empty list'})
+                }
+
+            executor = RulesetExecutor()
+
+            results = executor.execute_many(
+                data_blob_ids=data_blob_ids,
+                ruleset_blob_id=body['ruleset_blob_id'],
+                rule_type=body['rule_type'],
+                max_workers=body.get('max_workers')
+            )
+            succeeded = sum(1 for item in results if item['success'])
+
+            return {
+                'statusCode': 200,
+                'headers': {
+                    'Content-Type': 'application/json',
+                    'Access-Control-Allow-Origin': '*'
+                },
+                'body': json.dumps({
+                    'results': results,
+                    'succeeded': succeeded,
+                    'failed': len(results) - succeeded
+                })
+            }
+
+        elif action == 'execute_fanout':
+            rulesets = body.get('rulesets')
+            if not isinstance(rulesets, list) or not rulesets:
+                return {
+                    'statusCode': 400,
+                    'body': json.dumps({'error': 'rulesets must be a non-empty list'})
+                }
+
+            executor = RulesetExecutor()
+
+            results = executor.execute_rulesets(
+                data_blob_id=body['data_blob_id'],
+                rulesets=rulesets,
+                max_workers=body.get('max_workers')
+            )
+            succeeded = sum(1 for item in results if item['success'])
+
+            return {
+                'statusCode': 200,
+                'headers': {
+                    'Content-Type': 'application/json',
+                    'Access-Control-Allow-Origin': '*'
+                },
+                'body': json.dumps({
+                    'results': results,
+                    'succeeded': succeeded,
+                    'failed': len(results) - succeeded
+                })
+            }
+
         else:
             return {
                 'statusCode': 400,
@@ -0,0 +1,267 @@
+"""
+SQL Rule Engine
+Runs SQL rulesets against a parsed dataset with embedded DuckDB
+"""
+
+import os
+import tempfile
+import threading
+import datetime
+from decimal import Decimal
+from typing import Dict, Any, Iterable, Optional
+
+import pandas as pd
+
+
+class SqlRuleEngine:
+    """
+    Execute a single SQL query over a DataFrame exposed as table `data`
+
+    DuckDB scans the DataFrame in place (no copy into the database), and the
+    connection has file and network access disabled so queries can only see
+    the dataset they were given.
+    """
+
+    TABLE_NAME = 'data'
+
+    # Numeric types in widening order, used when chunks disagree on a column
+    NUMERIC_TYPES = ['BOOLEAN', 'TINYINT', 'SMALLINT', 'INTEGER', 'BIGINT', 'HUGEINT', 'FLOAT', 'DOUBLE']
+
+    def __init__(
+        self,
+        max_rows: Optional[int] = None,
+        timeout_seconds: Optional[float] = None,
+        memory_limit: Optional[str] = None
+    ):
+        self.max_rows = max_rows or int(os.getenv('SQL_MAX_ROWS', '10000'))
+        self.timeout_seconds = timeout_seconds or float(os.getenv('SQL_TIMEOUT_SECONDS', '30'))
+        self.memory_limit = memory_limit or os.getenv('SQL_MEMORY_LIMIT', '1GB')
+
+    def _connect(self, database: str = ':memory:', temp_directory: Optional[str] = None):
+        duckdb = _import_duckdb()
+        config = {
+            'enable_external_access': False,
+            'memory_limit': self.memory_limit
+        }
+        if temp_directory:
+            config['temp_directory'] = temp_directory
+
+        return duckdb.connect(database, config=config)
+
+    def execute(
+        self,
+        df: pd.DataFrame,
+        query: str,
+        params: Optional[Dict[str, Any]] = None,
+        max_rows: Optional[int] = None,
+        timeout_seconds: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """
+        Run a SQL query on a DataFrame
+
+        Args:
+            df: Dataset, queryable as table `data`
+            query: A single SELECT statement; use $name for parameters
+            params: Named query parameters from the ruleset
+            max_rows: Row limit (capped at the engine's max_rows)
+            timeout_seconds: Time limit (capped at the engine's timeout)
+
+        Returns:
+            {
+                'columns': [{'name': str, 'type': str}],
+                'rows': list[list],
+                'row_count': int,
+                'truncated': bool
+            }
+        """
+        query = self._check_query(query)
+
+        conn = self._connect()
+        try:
+            conn.register(self.TABLE_NAME, df)
+            return self._run_query(conn, query, params, max_rows, timeout_seconds)
+        finally:
+            conn.close()
+
+    def execute_chunks(
+        self,
+        chunks: Iterable[pd.DataFrame],
+        query: str,
+        params: Optional[Dict[str, Any]] = None,
+        max_rows: Optional[int] = None,
+        timeout_seconds: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """
+        Run a SQL query on a dataset that arrives as DataFrame chunks
+
+        Chunks are appended to table `data` in a temporary on-disk DuckDB
+        database, so only one chunk is held in Python at a time. DuckDB's
+        aggregations, joins and sorts then run within SQL_MEMORY_LIMIT and
+        spill to disk beyond it. Columns whose type differs between chunks
+        are widened (e.g. BIGINT to DOUBLE, anything mixed to VARCHAR).
+
+        Returns:
+            Same as execute(), plus 'input_rows'
+        """
+        query = self._check_query(query)
+
+        with tempfile.TemporaryDirectory(prefix='sql-chunks-', dir=os.getenv('SQL_SPILL_DIR') or None) as tmp_dir:
+            conn = self._connect(os.path.join(tmp_dir, 'data.duckdb'), temp_directory=tmp_dir)
+            try:
+                input_rows = self._load_chunks(conn, chunks)
+                if input_rows == 0:
+                    raise ValueError("Dataset is empty")
+
+                result = self._run_query(conn, query, params, max_rows, timeout_seconds)
+                result['input_rows'] = input_rows
+                return result
+            finally:
+                conn.close()
+
+    def _load_chunks(self, conn, chunks: Iterable[pd.DataFrame]) -> int:
+        """Append chunks to table `data`, widening column types as needed"""
+        table = self.TABLE_NAME
+        column_types: Dict[str, str] = {}
+        # Columns that have only held nulls so far and take the next real type
+        untyped = set()
+        input_rows = 0
+
+        for chunk in chunks:
+            if len(chunk) == 0:
+                continue
+
+            conn.register('chunk', chunk)
+            chunk_types = {row[0]: row[1] for row in conn.execute("DESCRIBE chunk").fetchall()}
+            all_null = {name for name in chunk.columns if chunk[name].isna().all()}
+
+            if not column_types:
+                conn.execute(f"CREATE TABLE {table} AS SELECT * FROM chunk")
+                column_types = dict(chunk_types)
+                untyped = set(all_null)
+            else:
+                for name, chunk_type in chunk_types.items():
+                    if name not in column_types:
+                        conn.execute(f'ALTER TABLE {table} ADD COLUMN {_quote(name)} {chunk_type}')
+                        column_types[name] = chunk_type
+                        if name in all_null:
+                            untyped.add(name)
+                        continue
+                    if name in all_null:
+                        continue
+
+                    if name in untyped:
+                        target = chunk_type
+                        untyped.discard(name)
+                    else:
+                        target = self._common_type(column_types[name], chunk_type)
+                    if target != column_types[name]:
+                        conn.execute(f'ALTER TABLE {table} ALTER COLUMN {_quote(name)} SET DATA TYPE {target}')
+                        column_types[name] = target
+
+                conn.execute(f"INSERT INTO {table} BY NAME SELECT * FROM chunk")
+
+            conn.unregister('chunk')
+            input_rows += len(chunk)
+
+        return input_rows
+
+    def _common_type(self, current: str, incoming: str) -> str:
+        if current == incoming:
+            return current
+        if current in self.NUMERIC_TYPES and incoming in self.NUMERIC_TYPES:
+            return max(current, incoming, key=self.NUMERIC_TYPES.index)
+        return 'VARCHAR'
+
+    def _check_query(self, query: str) -> str:
+        query = (query or '').strip().rstrip(';').strip()
+        if not query:
+            raise ValueError("SQL ruleset has no query")
+
+        # Count statements with DuckDB's own parser: ';' may also appear in
+        # string literals, identifiers and comments
+        duckdb = _import_duckdb()
+        try:
+            statements = duckdb.extract_statements(query)
+        except duckdb.Error as e:
+            raise ValueError(f"SQL error: {str(e)}")
+        if len(statements) != 1:
+            raise ValueError("SQL ruleset must contain a single statement")
+        return query
+
+    def _run_query(
+        self,
+        conn,
+        query: str,
+        params: Optional[Dict[str, Any]],
+        max_rows: Optional[int],
+        timeout_seconds: Optional[float]
+    ) -> Dict[str, Any]:
+        """Run a checked query against table `data` on an open connection"""
+        row_limit = min(max_rows or self.max_rows, self.max_rows)
+        time_limit = min(timeout_seconds or self.timeout_seconds, self.timeout_seconds)
+
+        # Wrapping in a subquery also rejects anything that is not a query
+        # (DDL, COPY, PRAGMA, ...) and lets DuckDB stop at the row limit; the
+        # newline ends a trailing -- comment in the query
+        wrapped_query = f"SELECT * FROM ({query}\n) AS rule_result LIMIT {row_limit + 1}"
+
+        timer = threading.Timer(time_limit, conn.interrupt)
+        timer.start()
+        try:
+            cursor = conn.execute(wrapped_query, params or {})
+            rows = cursor.fetchall()
+        except Exception as e:
+            if type(e).__name__ == 'InterruptException':
+                raise TimeoutError(f"SQL query exceeded {time_limit}s time limit")
+            raise ValueError(f"SQL error: {str(e)}")
+        finally:
+            timer.cancel()
+
+        columns = [
+            {'name': column[0], 'type': str(column[1])}
+            for column in cursor.description
+        ]
+
+        truncated = len(rows) > row_limit
+        rows = rows[:row_limit]
+
+        return {
+            'columns': columns,
+            'rows': [[_to_json_value(value) for value in row] for row in rows],
+            'row_count': len(rows),
+            'truncated': truncated
+        }
+
+
+def _import_duckdb():
+    try:
+        import duckdb
+    except ImportError:
+        raise RuntimeError("SQL rulesets require duckdb (pip install duckdb)")
+    return duckdb
+
+
+def _quote(identifier: str) -> str:
+    return '"' + str(identifier).replace('"', '""') + '"'
+
+
+def _to_json_value(value: Any) -> Any:
+    """Convert DuckDB result values into JSON-serializable values"""
+    if value is None or isinstance(value, (bool, int, str)):
+        return value
+    if isinstance(value, float):
+        # NaN/inf are not valid JSON
+        return value if value == value and value not in (float('inf'), float('-inf')) else None
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, datetime.timedelta):
+        return value.total_seconds()
+    if isinstance(value, (list, tuple)):
+        return [_to_json_value(v) for v in value]
+    if isinstance(value, dict):
+        return {str(k): _to_json_value(v) for k, v in value.items()}
+    if isinstance(value, bytes):
+        return value.hex()
+    return str(value)
@@ -0,0 +1,154 @@
+"""
+Token Budget
+Local token estimates, prompt budgets and projected cost for AI calls
+"""
+
+import os
+import re
+from typing import Dict, Any, Optional
+
+
+# USD per million tokens (input, output) for the model each provider uses by default
+PRICING = {
+    'anthropic': (0.25, 1.25),   # Claude 3 Haiku
+    'bedrock': (3.0, 15.0),      # Claude 3.5 Sonnet
+    'mock': (3.0, 15.0)
+}
+
+# Completion length AIClient.analyze and the Bedrock analyzer ask for
+DEFAULT_MAX_OUTPUT_TOKENS = 2000
+
+_LETTERS = re.compile(r'[A-Za-z]+')
+_DIGITS = re.compile(r'[0-9]+')
+_SYMBOLS = re.compile(r'[^A-Za-z0-9\s\x80-\U0010ffff]+')
+_NEWLINES = re.compile(r'\n+')
+_INDENT = re.compile(r'[ \t]{2,}')
+_NON_ASCII = re.compile(r'[\x80-\U0010ffff]')
+
+
+class PromptBudgetError(ValueError):
+    """A prompt does not fit the token budget; raised before any provider call"""
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimate Claude's token count for text without a round trip
+
+    Counts the pieces a BPE tokenizer splits text into: letter runs (about
+    5 letters per token), digit runs (about 3 digits per token), symbol runs
+    (about 3 characters per token, e.g. '":' or '},{'), line breaks,
+    indentation and non-ASCII characters (1 token each). On English prose
+    and the compact JSON rows prompts carry, this tends to over-count
+    slightly, which is the safe side for budgets.
+    """
+    if not text:
+        return 0
+    return (
+        sum((len(run) + 4) // 5 for run in _LETTERS.findall(text))
+        + sum((len(run) + 2) // 3 for run in _DIGITS.findall(text))
+        + sum((len(run) + 2) // 3 for run in _SYMBOLS.findall(text))
+        + len(_NEWLINES.findall(text))
+        + sum((len(run) + 2) // 4 for run in _INDENT.findall(text))
+        + len(_NON_ASCII.findall(text))
+    )
+
+
+def token_cost(provider: Optional[str], input_tokens: int, output_tokens: int) -> float:
+    """USD cost of a call from its token counts"""
+    input_price, output_price = PRICING.get(provider or 'bedrock', PRICING['bedrock'])
+    return (input_tokens * input_price + output_tokens * output_price) / 1_000_000
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """
+    Longest prefix of text within max_tokens
+
+    Multi-line text is cut after its last whole line (nothing, if the first
+    line does not fit); a single line is cut where the budget ends.
+    """
+    if max_tokens <= 0:
+        return ''
+    if estimate_tokens(text) <= max_tokens:
+        return text
+
+    # Binary search on the prefix length; estimates grow with the prefix
+    low, high = 0, len(text)
+    while low < high:
+        middle = (low + high + 1) // 2
+        if estimate_tokens(text[:middle]) <= max_tokens:
+            low = middle
+        else:
+            high = middle - 1
+
+    cut = text.rfind('\n', 0, low)
+    if cut >= 0 or '\n' in text:
+        return text[:max(cut, 0)]
+    return text[:low]
+
+
+class PromptBudget:
+    """
+    Token budget for one prompt
+
+    Prompt builders spend() their fixed text (instructions, template
+    config) first, then size dataset context to what is still available:
+    fit() truncates a section to it, and samples are drawn with at most
+    that many tokens. check() on the finished prompt reports the projected
+    cost and raises PromptBudgetError when the prompt is still too large,
+    so an oversize prompt never reaches the provider.
+    """
+
+    def __init__(self, max_prompt_tokens: Optional[int] = None, provider: Optional[str] = None):
+        self.max_prompt_tokens = max_prompt_tokens or int(os.getenv('AI_MAX_PROMPT_TOKENS', '12000'))
+        self.provider = provider
+        self.used = 0
+
+    @property
+    def available(self) -> int:
+        """Tokens not yet spent"""
+        return max(0, self.max_prompt_tokens - self.used)
+
+    def spend(self, *texts: str) -> int:
+        """Count texts as part of the prompt; returns their tokens"""
+        tokens = sum(estimate_tokens(text) for text in texts)
+        self.used += tokens
+        return tokens
+
+    def fit(self, text: str, max_tokens: Optional[int] = None) -> str:
+        """Spend text, truncated to what is available (and to max_tokens)"""
+        limit = self.available if max_tokens is None else min(max_tokens, self.available)
+        text = truncate_to_tokens(text, limit)
+        self.spend(text)
+        return text
+
+    def project(self, prompt: str, max_output_tokens: int = DEFAULT_MAX_OUTPUT_TOKENS) -> Dict[str, Any]:
+        """
+        Projected size and cost of sending prompt
+
+        Returns:
+            {
+                'input_tokens': int,         # estimate
+                'max_output_tokens': int,
+                'max_prompt_tokens': int,    # the budget
+                'input_cost': float,         # USD
+                'max_cost': float            # USD, if the completion uses max_output_tokens
+            }
+        """
+        input_tokens = estimate_tokens(prompt)
+        return {
+            'input_tokens': input_tokens,
+            'max_output_tokens': max_output_tokens,
+            'max_prompt_tokens': self.max_prompt_tokens,
+            'input_cost': token_cost(self.provider, input_tokens, 0),
+            'max_cost': token_cost(self.provider, input_tokens, max_output_tokens)
+        }
+
+    def check(self, prompt: str, max_output_tokens: int = DEFAULT_MAX_OUTPUT_TOKENS) -> Dict[str, Any]:
+        """project(), raising PromptBudgetError when the prompt is over budget"""
+        projection = self.project(prompt, max_output_tokens)
+        if projection['input_tokens'] > self.max_prompt_tokens:
+            raise PromptBudgetError(
+                f"Prompt is ~{projection['input_tokens']} tokens, over the "
+                f"{self.max_prompt_tokens}-token budget (AI_MAX_PROMPT_TOKENS)"
+            )
+        return projection
@@ -9,7 +9,19 @@ import tempfile
 import subprocess
 import re
 import requests
-from typing import Dict, Any, Optional
+import pandas as pd
+from typing import Dict, Any, Optional, List, Iterator
+
+try:
+    from .blob_cache import BlobCache, get_blob_cache, iter_cached_blob, stored_epochs
+    from .http_session import get_http_session, http_timeout
+    from .csv_stream import CsvStream
+    from .dataset_profile import DatasetProfileStore, get_profile_store, profile_csv_rows, profile_dataframe
+except ImportError:
+    from blob_cache import BlobCache, get_blob_cache, iter_cached_blob, stored_epochs
+    from http_session import get_http_session, http_timeout
+    from csv_stream import CsvStream
+    from dataset_profile import DatasetProfileStore, get_profile_store, profile_csv_rows, profile_dataframe
 
 
 class WalrusService:
@@ -19,11 +31,17 @@ class WalrusService:
         self,
         publisher_url: str,
         aggregator_url: str,
-        walrus_cli_path: str = "/Users/noname/.local/bin/walrus"
+        walrus_cli_path: str = "/Users/noname/.local/bin/walrus",
+        cache: Optional[BlobCache] = None,
+        session: Optional[requests.Session] = None,
+        profiles: Optional[DatasetProfileStore] = None
     ):
         self.publisher_url = publisher_url
         self.aggregator_url = aggregator_url
         self.walrus_cli_path = walrus_cli_path
+        self.cache = cache or get_blob_cache()
+        self.session = session or get_http_session()
+        self.profiles = profiles or get_profile_store()
 
     def upload_blob(
         self,
@@ -53,11 +71,11 @@ class WalrusService:
             # Upload via Walrus Publisher HTTP API (PUT request)
             url = f"{self.publisher_url}/v1/store?epochs={epochs}"
 
-            response = requests.put(
+            response = self.session.put(
                 url,
                 data=file_content,
                 headers={'Content-Type': 'application/octet-stream'},
-                timeout=120
+                timeout=http_timeout(120)
             )
 
             if response.status_code not in [200, 201]:
@@ -80,6 +98,9 @@ class WalrusService:
                 if not blob_id:
                     raise Exception(f"Could not extract blob_id from response: {result}")
 
+            # Blob IDs are content-addressed, so the uploaded bytes are the blob
+            self.cache.put(blob_id, file_content, stored_epochs(result))
+
             return {
                 'blob_id': blob_id,
                 'size_bytes': len(file_content),
@@ -115,13 +136,8 @@ class WalrusService:
         # Get metadata (optional, not critical)
         metadata = {}
 
-        # Read blob content via HTTP
-        try:
-            response = requests.get(f"{self.aggregator_url}/v1/{blob_id}")
-            response.raise_for_status()
-            content = response.content
-        except requests.RequestException as e:
-            raise Exception(f"Failed to read blob from Walrus: {str(e)}")
+        # Read blob content (local cache first, then HTTP)
+        content = self._fetch_blob(blob_id)
 
         # Parse based on format
         if format_type == 'json':
@@ -180,12 +196,26 @@ class WalrusService:
             except UnicodeDecodeError:
                 raise ValueError("Content is not valid UTF-8 text. Try format=binary")
 
-    def read_blob_as_csv(self, blob_id: str) -> Dict[str, Any]:
+    def read_blob_as_csv(
+        self,
+        blob_id: str,
+        offset: int = 0,
+        limit: Optional[int] = None,
+        columns: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
         """
-        Read blob and parse as CSV
+        Read one page of a CSV blob
+
+        The blob is streamed and parsed incrementally, so memory use depends
+        on the page size rather than the blob size. Totals and column
+        statistics come from the blob's stored profile; a page that covers
+        the whole blob profiles it for later requests.
 
         Args:
             blob_id: Walrus blob ID
+            offset: Number of data rows to skip
+            limit: Maximum number of rows to return (None = all)
+            columns: Columns to include (None = all)
 
         Returns:
             {
@@ -195,43 +225,126 @@ class WalrusService:
                 'headers': list,
                 'row_count': int,
                 'column_count': int,
-                'data': list[dict]
+                'offset': int,
+                'limit': int | None,
+                'has_more': bool,
+                'data': list[dict],
+                'total_rows': int,          # when the blob has a profile
+                'column_stats': dict        # when the blob has a profile
             }
         """
-        # Read blob content via HTTP
-        try:
-            response = requests.get(f"{self.aggregator_url}/v1/{blob_id}")
-            response.raise_for_status()
-            content = response.content
-        except requests.RequestException as e:
-            raise Exception(f"Failed to read blob from Walrus: {str(e)}")
-
-        text_content = content.decode('utf-8')
-
-        # Parse CSV
-        lines = text_content.strip().split('\n')
-        if len(lines) < 2:
+        # Read one row past the page to know whether another page exists
+        stream = self.open_csv(
+            blob_id,
+            offset=offset,
+            limit=None if limit is None else limit + 1,
+            columns=columns
+        )
+        rows = list(stream)
+
+        has_more = limit is not None and len(rows) > limit
+        if has_more:
+            rows = rows[:limit]
+
+        if offset == 0 and not rows:
             raise ValueError("CSV must have at least header + 1 data row")
 
-        headers = [h.strip() for h in lines[0].split(',')]
-
-        rows = []
-        for line in lines[1:]:
-            if line.strip():
-                values = [v.strip() for v in line.split(',')]
-                row = dict(zip(headers, values))
-                rows.append(row)
-
-        return {
+        result = {
             'success': True,
             'blob_id': blob_id,
             'format': 'csv',
-            'headers': headers,
+            'headers': stream.columns,
             'row_count': len(rows),
-            'column_count': len(headers),
+            'column_count': len(stream.columns),
+            'offset': offset,
+            'limit': limit,
+            'has_more': has_more,
             'data': rows
         }
 
+        profile = self.profiles.get(blob_id)
+        if profile is None and offset == 0 and not has_more and stream.columns == stream.headers:
+            # These rows are the whole blob, so profiling costs no extra read
+            profile = profile_csv_rows(rows)
+            self.profiles.put(blob_id, profile)
+
+        if profile is not None:
+            result['total_rows'] = profile['row_count']
+            result['column_stats'] = {
+                name: stats
+                for name, stats in profile.get('column_stats', {}).items()
+                if name in stream.columns
+            }
+
+        return result
+
+    def get_profile(self, blob_id: str, df: Optional[pd.DataFrame] = None) -> Optional[Dict[str, Any]]:
+        """
+        Return a blob's stored profile, profiling `df` on a miss
+
+        Args:
+            blob_id: Walrus blob ID
+            df: The blob's rows, if the caller has already parsed them;
+                without them a missing profile is not computed
+
+        Returns:
+            The profile (see dataset_profile.profile_dataframe), or None
+        """
+        profile = self.profiles.get(blob_id)
+        if profile is None and df is not None:
+            profile = profile_dataframe(df)
+            self.profiles.put(blob_id, profile)
+        return profile
+
+    def open_csv(
+        self,
+        blob_id: str,
+        offset: int = 0,
+        limit: Optional[int] = None,
+        columns: Optional[List[str]] = None
+    ) -> CsvStream:
+        """
+        Open a CSV blob for row-by-row iteration
+
+        Headers are parsed immediately (so bad blob IDs and unknown columns
+        fail before a streaming response starts); rows are parsed lazily.
+        """
+        return CsvStream(
+            self.iter_blob_chunks(blob_id),
+            columns=columns,
+            offset=offset,
+            limit=limit
+        )
+
+    def iter_blob_chunks(self, blob_id: str, chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+        """
+        Yield blob content in chunks without buffering the whole blob
+
+        Serves from the local cache when possible. Otherwise streams from the
+        aggregator while writing a copy to the cache, which is only committed
+        once the blob has been read to the end.
+        """
+        try:
+            yield from iter_cached_blob(self.cache, self.session, f"{self.aggregator_url}/v1/{blob_id}", blob_id, chunk_size)
+        except requests.RequestException as e:
+            raise Exception(f"Failed to read blob from Walrus: {str(e)}")
+
+    def _fetch_blob(self, blob_id: str) -> bytes:
+        """Return blob bytes from the local cache, downloading on a miss"""
+
+        def fetch() -> bytes:
+            try:
+                response = self.session.get(
+                    f"{self.aggregator_url}/v1/{blob_id}",
+                    timeout=http_timeout()
+                )
+                response.raise_for_status()
+                return response.content
+            except requests.RequestException as e:
+                raise Exception(f"Failed to read blob from Walrus: {str(e)}")
+
+        return self.cache.get_or_fetch(blob_id, fetch)
+
     def get_blob_metadata(self, blob_id: str) -> Dict[str, Any]:
         """
         Get blob metadata only (no content download)
@@ -6,15 +6,36 @@ Upload AI analysis results to Walrus as verifiable blobs
 import json
 import os
 import hashlib
+import threading
 import requests
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
+try:
+    from .blob_cache import BlobCache, get_blob_cache, iter_cached_blob, stored_epochs
+    from .http_session import get_http_session, http_timeout
+    from .metrics import stage
+    from .canonical_json import ENCODING_CANONICAL, ENCODING_LEGACY, dumps_canonical, dumps_legacy
+except ImportError:
+    from blob_cache import BlobCache, get_blob_cache, iter_cached_blob, stored_epochs
+    from http_session import get_http_session, http_timeout
+    from metrics import stage
+    from canonical_json import ENCODING_CANONICAL, ENCODING_LEGACY, dumps_canonical, dumps_legacy
+
+
+class DownloadCancelled(Exception):
+    """Raised when a download is abandoned through its cancel event"""
+
 
 class WalrusUploader:
     """Upload and retrieve data from Walrus Storage"""
 
-    def __init__(self):
+    def __init__(
+        self,
+        cache: Optional[BlobCache] = None,
+        session: Optional[requests.Session] = None
+    ):
         self.publisher_url = os.getenv(
             'WALRUS_PUBLISHER_URL',
             'https://publisher.walrus-testnet.mystenlabs.com'
@@ -24,30 +45,37 @@ class WalrusUploader:
             'https://aggregator.walrus-testnet.mystenlabs.com'
         )
         self.epochs = int(os.getenv('WALRUS_EPOCHS', '1'))  # Storage duration
+        self.cache = cache or get_blob_cache()
+        self.session = session or get_http_session()
 
     def upload_blob(self, data: Dict[str, Any]) -> Dict[str, str]:
         """
         Upload data to Walrus Storage
 
         Args:
-            data: Dictionary to store (will be JSON serialized)
+            data: Dictionary to store (serialized as canonical JSON, see
+                canonical_json.dumps_canonical)
 
         Returns:
             {
                 'blob_id': str,
-                'content_hash': str,
+                'content_hash': str,     # SHA-256 of the uploaded bytes
+                'encoding': str,         # canonical_json.ENCODING_CANONICAL
                 'size_bytes': int,
                 'uploaded_at': str,
-                'aggregator_url': str
+                'aggregator_url': str,
+                'expires_at': float      # Unix time until which the blob is sure
+                                         # to be stored (BlobCache.expires_at)
             }
         """
 
-        # Serialize data
-        json_data = json.dumps(data, indent=2, sort_keys=True)
-        data_bytes = json_data.encode('utf-8')
+        # Serialize data (timed into the caller's StageTimer, if any)
+        with stage('serialize') as serializing:
+            data_bytes = dumps_canonical(data)
 
-        # Calculate content hash
-        content_hash = hashlib.sha256(data_bytes).hexdigest()
+            # Hash exactly the bytes that are uploaded
+            content_hash = hashlib.sha256(data_bytes).hexdigest()
+            serializing.bytes = len(data_bytes)
 
         # Upload to Walrus
         upload_url = f"{self.publisher_url}/v1/store"
@@ -55,20 +83,22 @@ class WalrusUploader:
         try:
             print(f"Uploading {len(data_bytes)} bytes to Walrus...")
 
-            response = requests.put(
-                upload_url,
-                data=data_bytes,
-                headers={
-                    'Content-Type': 'application/json'
-                },
-                params={
-                    'epochs': self.epochs
-                },
-                timeout=30
-            )
-
-            response.raise_for_status()
-            result = response.json()
+            with stage('upload') as uploading:
+                uploading.bytes = len(data_bytes)
+                response = self.session.put(
+                    upload_url,
+                    data=data_bytes,
+                    headers={
+                        'Content-Type': 'application/json'
+                    },
+                    params={
+                        'epochs': self.epochs
+                    },
+                    timeout=http_timeout()
+                )
+
+                response.raise_for_status()
+                result = response.json()
 
             # Extract blob ID from response
             # Walrus response format: {"newlyCreated": {"blobObject": {"id": "...", ...}}}
@@ -90,11 +120,13 @@ class WalrusUploader:
             upload_result = {
                 'blob_id': blob_id,
                 'content_hash': content_hash,
+                'encoding': ENCODING_CANONICAL,
                 'size_bytes': len(data_bytes),
                 'uploaded_at': datetime.utcnow().isoformat(),
                 'aggregator_url': blob_url,
                 'status': status,
-                'epochs': self.epochs
+                'epochs': self.epochs,
+                'expires_at': self.cache.expires_at(stored_epochs(result))
             }
 
             print(f"✅ Upload successful: {blob_id}")
@@ -106,74 +138,198 @@ class WalrusUploader:
                 print(f"Response: {e.response.text}")
             raise
 
-    def download_blob(self, blob_id: str) -> Dict[str, Any]:
+    def download_blob(
+        self,
+        blob_id: str,
+        cancel: Optional[threading.Event] = None
+    ) -> Dict[str, Any]:
         """
         Download blob from Walrus Storage
 
         Args:
             blob_id: Walrus blob identifier
+            cancel: Optional event; once set, the transfer stops at the next
+                chunk and DownloadCancelled is raised
 
         Returns:
             Parsed JSON data from blob
         """
 
+        content = self.download_blob_bytes(blob_id, cancel=cancel)
+
+        try:
+            return json.loads(content)
+        except json.JSONDecodeError as e:
+            print(f"JSON parse error: {str(e)}")
+            raise
+
+    def download_blob_bytes(
+        self,
+        blob_id: str,
+        cancel: Optional[threading.Event] = None
+    ) -> bytes:
+        """
+        Download a blob's raw bytes (for decoders that skip json.loads)
+
+        Args:
+            blob_id: Walrus blob identifier
+            cancel: See download_blob
+        """
+
         download_url = f"{self.aggregator_url}/v1/{blob_id}"
 
         try:
-            print(f"Downloading blob {blob_id}...")
+            content = self.cache.get(blob_id)
 
-            response = requests.get(download_url, timeout=30)
-            response.raise_for_status()
+            if content is not None:
+                print(f"✅ Cache hit for blob {blob_id}: {len(content)} bytes")
+                return content
 
-            # Parse JSON
-            data = response.json()
+            print(f"Downloading blob {blob_id}...")
+
+            with self.session.get(download_url, timeout=http_timeout(), stream=True) as response:
+                response.raise_for_status()
+                chunks = []
+                for chunk in response.iter_content(chunk_size=64 * 1024):
+                    if cancel is not None and cancel.is_set():
+                        raise DownloadCancelled(f"Download of blob {blob_id} was cancelled")
+                    chunks.append(chunk)
+            content = b''.join(chunks)
+            self.cache.put(blob_id, content)
 
-            print(f"✅ Download successful: {len(response.content)} bytes")
-            return data
+            print(f"✅ Download successful: {len(content)} bytes")
+            return content
 
         except requests.exceptions.RequestException as e:
             print(f"Walrus download error: {str(e)}")
             raise
-        except json.JSONDecodeError as e:
-            print(f"JSON parse error: {str(e)}")
-            raise
 
-    def verify_blob(self, blob_id: str, expected_hash: str) -> bool:
+    def blob_exists(self, blob_id: str) -> bool:
+        """Whether a blob is cached or still served by the aggregator"""
+        if self.cache.path(blob_id) is not None:
+            return True
+        try:
+            response = self.session.head(f"{self.aggregator_url}/v1/{blob_id}", timeout=http_timeout())
+            return response.ok
+        except requests.exceptions.RequestException as e:
+            print(f"Walrus availability check failed for {blob_id}: {str(e)}")
+            return False
+
+    def iter_blob_chunks(self, blob_id: str, chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+        """
+        Yield blob content in chunks without buffering the whole blob
+
+        Reads the cached copy when there is one; otherwise streams from the
+        aggregator and caches the blob once it has been read to the end.
+        """
+        yield from iter_cached_blob(self.cache, self.session, f"{self.aggregator_url}/v1/{blob_id}", blob_id, chunk_size)
+
+    def hash_blob(self, blob_id: str) -> Tuple[str, int]:
+        """
+        SHA-256 of a blob's stored bytes, hashed chunk by chunk as they stream in
+
+        Returns:
+            (hex digest, size in bytes)
+        """
+        digest = hashlib.sha256()
+        size = 0
+        for chunk in self.iter_blob_chunks(blob_id):
+            digest.update(chunk)
+            size += len(chunk)
+        return digest.hexdigest(), size
+
+    def _check_blob(self, blob_id: str, expected_hash: str, encoding: Optional[str]) -> Dict[str, Any]:
+        """Hash a blob and compare; raises on download errors"""
+        actual_hash, size = self.hash_blob(blob_id)
+
+        if actual_hash != expected_hash and encoding in (None, ENCODING_LEGACY):
+            # Only a mismatch pays for parsing: pre-json-c1 hashes may be of the re-serialized content
+            actual_hash = hashlib.sha256(dumps_legacy(self.download_blob(blob_id))).hexdigest()
+
+        return {
+            'blob_id': blob_id,
+            'valid': actual_hash == expected_hash,
+            'actual_hash': actual_hash,
+            'size_bytes': size
+        }
+
+    def verify_blob(self, blob_id: str, expected_hash: str, encoding: Optional[str] = None) -> bool:
         """
         Verify blob integrity by comparing content hash
 
+        The raw response body is streamed into an incremental SHA-256, so
+        the blob is never held in memory or parsed.
+
         Args:
             blob_id: Walrus blob identifier
             expected_hash: Expected SHA-256 hash
+            encoding: The 'encoding' recorded at upload, if any. Hashes are
+                over the stored bytes, so every encoding verifies the same
+                way; for legacy (or unknown) encodings a hash of the
+                re-serialized content is accepted too, as it was before
+                json-c1.
 
         Returns:
             True if hash matches, False otherwise
         """
 
         try:
-            # Download blob
-            data = self.download_blob(blob_id)
-
-            # Recalculate hash
-            json_data = json.dumps(data, indent=2, sort_keys=True)
-            actual_hash = hashlib.sha256(json_data.encode()).hexdigest()
+            check = self._check_blob(blob_id, expected_hash, encoding)
 
-            # Compare
-            is_valid = actual_hash == expected_hash
-
-            if is_valid:
+            if check['valid']:
                 print(f"✅ Blob verification passed")
             else:
                 print(f"❌ Blob verification failed")
                 print(f"Expected: {expected_hash}")
-                print(f"Actual: {actual_hash}")
+                print(f"Actual: {check['actual_hash']}")
 
-            return is_valid
+            return check['valid']
 
         except Exception as e:
             print(f"Verification error: {str(e)}")
             return False
 
+    def verify_many(
+        self,
+        blobs: List[Tuple[str, ...]],
+        max_workers: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Verify many blobs concurrently
+
+        Args:
+            blobs: (blob_id, expected_hash) or (blob_id, expected_hash, encoding) tuples
+            max_workers: Concurrent downloads (default WALRUS_VERIFY_WORKERS or 8)
+
+        Returns:
+            One entry per blob, in input order:
+            {
+                'blob_id': str,
+                'valid': bool,
+                'actual_hash': str,      # unless the download failed
+                'size_bytes': int,
+                'error': str             # when the download failed
+            }
+        """
+        max_workers = max_workers or int(os.getenv('WALRUS_VERIFY_WORKERS', '8'))
+
+        def check(blob: Tuple[str, ...]) -> Dict[str, Any]:
+            blob_id, expected_hash = blob[0], blob[1]
+            encoding = blob[2] if len(blob) > 2 else None
+            try:
+                return self._check_blob(blob_id, expected_hash, encoding)
+            except Exception as e:
+                return {'blob_id': blob_id, 'valid': False, 'error': str(e)}
+
+        if not blobs:
+            return []
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(blobs)))) as pool:
+            results = list(pool.map(check, blobs))
+
+        valid = sum(1 for result in results if result['valid'])
+        print(f"Verified {len(results)} blobs: {valid} valid, {len(results) - valid} invalid")
+        return results
+
 
 def lambda_handler(event, context):
     """
@@ -195,7 +351,15 @@ def lambda_handler(event, context):
     {
         "action": "verify",
         "blob_id": "...",
-        "expected_hash": "..."
+        "expected_hash": "...",
+        "encoding": "json-c1"     # optional, from the upload result
+    }
+
+    Event format (verify_many):
+    {
+        "action": "verify_many",
+        "blobs": [{"blob_id": "...", "expected_hash": "...", "encoding": "..."}, ...],
+        "max_workers": 8          # optional
     }
     """
 
@@ -256,7 +420,7 @@ def lambda_handler(event, context):
                     'body': json.dumps({'error': 'Missing blob_id or expected_hash'})
                 }
 
-            is_valid = uploader.verify_blob(blob_id, expected_hash)
+            is_valid = uploader.verify_blob(blob_id, expected_hash, body.get('encoding'))
 
             return {
                 'statusCode': 200,
@@ -267,11 +431,38 @@ def lambda_handler(event, context):
                 'body': json.dumps({'valid': is_valid})
             }
 
+        elif action == 'verify_many':
+            blobs = body.get('blobs')
+            if not isinstance(blobs, list) or not all(
+                isinstance(blob, dict) and blob.get('blob_id') and blob.get('expected_hash') for blob in blobs
+            ):
+                return {
+                    'statusCode': 400,
+                    'body': json.dumps({'error': 'blobs must be a list of {blob_id, expected_hash} objects'})
+                }
+
+            results = uploader.verify_many(
+                [(blob['blob_id'], blob['expected_hash'], blob.get('encoding')) for blob in blobs],
+                max_workers=body.get('max_workers')
+            )
+
+            return {
+                'statusCode': 200,
+                'headers': {
+                    'Content-Type': 'application/json',
+                    'Access-Control-Allow-Origin': '*'
+                },
+                'body': json.dumps({
+                    'valid': all(result['valid'] for result in results),
+                    'results': results
+                })
+            }
+
         else:
             return {
                 'statusCode': 400,
                 'body': json.dumps({
-                    'error': f'Invalid action: {action}. Must be upload/download/verify'
+                    'error': f'Invalid action: {action}. Must be upload/download/verify/verify_many'
                 })
             }
 
@@ -301,11 +492,12 @@ if __name__ == '__main__':
 
     blob_id = upload_result['blob_id']
     expected_hash = upload_result['content_hash']
+    encoding = upload_result['encoding']
 
     print("\n=== Testing Download ===")
     downloaded_data = uploader.download_blob(blob_id)
     print(json.dumps(downloaded_data, indent=2))
 
     print("\n=== Testing Verification ===")
-    is_valid = uploader.verify_blob(blob_id, expected_hash)
+    is_valid = uploader.verify_blob(blob_id, expected_hash, encoding)
     print(f"Verification result: {is_valid}")
@@ -0,0 +1,25 @@
+"""
+Shared test setup
+
+The Lambda modules live in backend/lambda, a package whose name is a Python
+keyword, so tests load them the way api_server does:
+importlib.import_module('lambda.<module>'). Handler modules that only use
+Lambda-root imports (ruleset_executor, data_uploader) are imported by their
+plain name, as the Lambda runtime does.
+"""
+
+import os
+import sys
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.append(os.path.join(BACKEND_DIR, 'lambda'))
+
+
+@pytest.fixture(autouse=True)
+def state_dir(tmp_path, monkeypatch):
+    """Keep caches and indexes of each test in its own directory"""
+    monkeypatch.setenv('WALRUS_STATE_DIR', str(tmp_path / 'state'))
+    return tmp_path / 'state'
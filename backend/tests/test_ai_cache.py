@@ -0,0 +1,143 @@
+import importlib
+
+import pytest
+
+ai_cache = importlib.import_module('lambda.ai_cache')
+ai_client = importlib.import_module('lambda.ai_client')
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(ai_cache, 'time', clock)
+    return clock
+
+
+def _cache(tmp_path, **kwargs):
+    return ai_cache.AIResponseCache(db_path=str(tmp_path / 'ai-cache.db'), **kwargs)
+
+
+def _response(text, cost=0.01):
+    return {'text': text, 'usage': {'input_tokens': 100, 'output_tokens': 20}, 'cost': cost}
+
+
+def test_responses_expire_after_their_ttl(tmp_path, clock):
+    cache = _cache(tmp_path, default_ttl=60)
+    cache.put('short', _response('a'), ttl=10)
+    cache.put('default', _response('b'))
+
+    clock.now += 30
+
+    assert cache.get('short') is None
+    assert cache.get('default')['text'] == 'b'
+    assert cache.stats()['entries'] == 1  # the expired row is deleted on lookup
+
+
+def test_zero_ttl_is_not_stored(tmp_path, clock):
+    cache = _cache(tmp_path)
+
+    cache.put('fresh', _response('a'), ttl=0)
+
+    assert cache.get('fresh') is None
+    assert cache.stats()['entries'] == 0
+    assert cache.stats()['memory_entries'] == 0
+
+
+def test_memory_level_is_bounded_and_disk_backs_it(tmp_path, clock):
+    cache = _cache(tmp_path, memory_entries=2)
+    for key in ('k1', 'k2', 'k3'):
+        cache.put(key, _response(key))
+
+    assert cache.stats()['memory_entries'] == 2
+    assert cache.get('k1')['text'] == 'k1'  # evicted from memory, still on disk
+    assert cache.get('k1')['text'] == 'k1'
+
+    stats = cache.stats()
+    assert stats['hits'] == 2
+    assert stats['memory_hits'] == 1
+    assert stats['saved_cost'] == pytest.approx(0.02)
+    assert stats['saved_input_tokens'] == 200
+
+
+def test_store_is_trimmed_to_the_most_recently_used(tmp_path, clock):
+    cache = _cache(tmp_path, memory_entries=1, max_entries=3)
+    for key in ('k0', 'k1', 'k2'):
+        clock.now += 1
+        cache.put(key, _response(key))
+
+    clock.now += 1
+    assert cache.get('k0') is not None  # a disk hit refreshes last_access
+    clock.now += 1
+    cache.put('k3', _response('k3'))
+
+    reopened = _cache(tmp_path)
+    assert reopened.stats()['entries'] == 3
+    assert reopened.get('k1') is None
+    assert [reopened.get(key)['text'] for key in ('k0', 'k2', 'k3')] == ['k0', 'k2', 'k3']
+
+
+def test_disabled_cache_stores_nothing(tmp_path, clock, monkeypatch):
+    monkeypatch.setenv('AI_CACHE_ENABLED', '0')
+    cache = _cache(tmp_path)
+
+    cache.put('key', _response('a'))
+
+    assert cache.get('key') is None
+    assert cache.stats()['entries'] == 0
+
+
+class CountingProvider:
+    def __init__(self):
+        self.calls = 0
+
+    def analyze(self, prompt, max_tokens, temperature):
+        self.calls += 1
+        return _response(f"answer {self.calls}")
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    for name in ('ANTHROPIC_API_KEY', 'AWS_ACCESS_KEY_ID', 'AI_MOCK_PROVIDERS'):
+        monkeypatch.delenv(name, raising=False)
+    client = ai_client.AIClient(cache=_cache(tmp_path))
+    client.client = CountingProvider()
+    return client
+
+
+def test_client_answers_repeats_from_the_cache(client):
+    first = client.analyze('Summarize spending')
+    second = client.analyze('Summarize spending')
+
+    assert client.client.calls == 1
+    assert first['cached'] is False
+    assert second['cached'] is True
+    assert second['text'] == 'answer 1'
+    assert second['cost'] == 0.0
+    assert second['saved_cost'] == pytest.approx(0.01)
+
+
+def test_bypass_calls_the_provider_and_replaces_the_entry(client):
+    client.analyze('Summarize spending')
+
+    fresh = client.analyze('Summarize spending', bypass_cache=True)
+    again = client.analyze('Summarize spending')
+
+    assert client.client.calls == 2
+    assert fresh['cached'] is False and fresh['text'] == 'answer 2'
+    assert again['cached'] is True and again['text'] == 'answer 2'
+    assert client.cache.stats()['bypassed'] == 1
+
+
+def test_client_cache_ttl_zero_always_calls_the_provider(client):
+    client.analyze('Live numbers', cache_ttl=0)
+    client.analyze('Live numbers', cache_ttl=0)
+
+    assert client.client.calls == 2
@@ -0,0 +1,134 @@
+import asyncio
+import importlib
+
+import pytest
+
+ai_rate_limit = importlib.import_module('lambda.ai_rate_limit')
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class ProviderError(Exception):
+    def __init__(self, status_code, headers=None):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+        self.response = type('Response', (), {'headers': headers or {}})()
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(ai_rate_limit.time, 'monotonic', clock)
+    return clock
+
+
+def test_bucket_reserve_returns_the_wait_for_the_debt(clock):
+    bucket = ai_rate_limit.TokenBucket(60)  # one per second
+
+    assert bucket.reserve(60) == 0.0
+    assert bucket.reserve(3) == pytest.approx(3.0)
+    assert bucket.reserve(1) == pytest.approx(4.0)  # queued behind the earlier debt
+
+    clock.now += 4
+    assert bucket.reserve(0) == 0.0
+
+
+def test_bucket_refill_is_capped_at_capacity(clock):
+    bucket = ai_rate_limit.TokenBucket(60, capacity=10)
+    bucket.reserve(10)
+
+    clock.now += 3600
+
+    assert bucket.reserve(10) == 0.0
+    assert bucket.reserve(1) == pytest.approx(1.0)
+
+
+def test_bucket_adjust_settles_reservations(clock):
+    bucket = ai_rate_limit.TokenBucket(60)
+    bucket.reserve(60)
+
+    bucket.adjust(30)  # used less than reserved
+    assert bucket.reserve(30) == 0.0
+
+    bucket.adjust(-6)  # used more than reserved
+    assert bucket.reserve(0) == pytest.approx(6.0)
+
+
+def test_disabled_bucket_never_waits():
+    bucket = ai_rate_limit.TokenBucket(0)
+
+    assert not bucket.enabled
+    assert bucket.reserve(10 ** 9) == 0.0
+
+
+def test_retry_classification():
+    assert ai_rate_limit.is_retryable(ProviderError(429))
+    assert ai_rate_limit.is_retryable(ProviderError(529))
+    assert not ai_rate_limit.is_retryable(ProviderError(400))
+
+    throttled = Exception('Bedrock call failed')
+    throttled.__cause__ = Exception()
+    throttled.__cause__.response = {'Error': {'Code': 'ThrottlingException'}}
+    assert ai_rate_limit.is_retryable(throttled)
+
+    assert ai_rate_limit.retry_hint(ProviderError(429, {'Retry-After-Ms': '1500'})) == 1.5
+    assert ai_rate_limit.retry_hint(ProviderError(429, {'Retry-After': '2'})) == 2.0
+    assert ai_rate_limit.retry_hint(ProviderError(429)) is None
+
+
+@pytest.fixture
+def limiter(monkeypatch):
+    monkeypatch.setenv('AI_RETRY_BASE_DELAY', '0')
+    return ai_rate_limit.AIRateLimiter(
+        max_concurrency=2, requests_per_minute=0, tokens_per_minute=6000, max_retries=2
+    )
+
+
+def test_submit_retries_retryable_failures(limiter):
+    calls = []
+
+    def call():
+        calls.append(1)
+        if len(calls) < 3:
+            raise ProviderError(503)
+        return 'ok'
+
+    assert asyncio.run(limiter.submit(call)) == 'ok'
+    assert len(calls) == 3
+
+
+def test_submit_gives_up_on_other_failures(limiter):
+    calls = []
+
+    def call():
+        calls.append(1)
+        raise ProviderError(400)
+
+    with pytest.raises(ProviderError):
+        asyncio.run(limiter.submit(call))
+    assert len(calls) == 1
+
+
+def test_submit_refunds_tokens_of_failed_calls(limiter):
+    def call():
+        raise ProviderError(400)
+
+    with pytest.raises(ProviderError):
+        asyncio.run(limiter.submit(call, estimated_tokens=4000))
+
+    assert limiter.tokens.reserve(6000) == 0.0
+
+
+def test_submit_settles_the_estimate_with_reported_usage(limiter):
+    result = {'usage': {'input_tokens': 1000, 'output_tokens': 200}}
+
+    asyncio.run(limiter.submit(lambda: result, estimated_tokens=5000, usage=lambda r: r['usage']))
+
+    assert limiter.tokens.reserve(4800) == 0.0
+    assert limiter.estimate_tokens('x' * 40, max_tokens=4096) < 4096  # learnt the typical completion
@@ -0,0 +1,144 @@
+import importlib
+import time
+
+import pytest
+
+ai_router = importlib.import_module('lambda.ai_router')
+mock_ai_client = importlib.import_module('lambda.mock_ai_client')
+
+PROMPT = 'Summarize player spending'
+
+
+class FakeBucket:
+    def __init__(self, wait=0.0):
+        self.wait = wait
+        self.level = 0
+
+    def reserve(self, amount):
+        self.level -= amount
+        return self.wait
+
+    def adjust(self, amount):
+        self.level += amount
+
+
+class FakeLimiter:
+    """Stand-in for AIRateLimiter recording what hedges take from the budget"""
+
+    def __init__(self, wait=0.0):
+        self.requests = FakeBucket(wait)
+        self.tokens = FakeBucket(wait)
+
+    def estimate_tokens(self, prompt, max_tokens):
+        return 1000
+
+
+def _router(*providers, hedge=False, limiter=None):
+    router = ai_router.ProviderRouter(
+        [(name, mock_ai_client.MockAIClient(delay, failure_rate)) for name, delay, failure_rate in providers],
+        hedge=hedge,
+        limiter=limiter or FakeLimiter()
+    )
+    router.hedge_min_delay = 0.05
+    return router
+
+
+def test_fails_over_to_the_next_provider():
+    router = _router(('primary', 0, 1.0), ('secondary', 0, 0.0))
+
+    result = router.analyze(PROMPT)
+
+    assert result['provider'] == 'secondary'
+    stats = router.provider_stats()['providers']
+    assert stats['primary']['error_rate'] == 1.0
+    assert stats['secondary']['calls'] == 1
+
+
+def test_unhealthy_provider_is_tried_last():
+    router = _router(('primary', 0, 1.0), ('secondary', 0, 0.0))
+    for _ in range(router.stats['primary'].max_failures):
+        router.analyze(PROMPT)
+
+    assert [name for name, _ in router._order()] == ['secondary', 'primary']
+    assert router.analyze(PROMPT)['provider'] == 'secondary'
+    assert router.stats['primary'].snapshot()['calls'] == router.stats['primary'].max_failures
+
+
+def test_raises_when_every_provider_fails():
+    router = _router(('primary', 0, 1.0), ('secondary', 0, 1.0))
+
+    with pytest.raises(Exception, match='simulated'):
+        router.analyze(PROMPT)
+
+
+def test_hedge_races_a_slow_provider_and_charges_the_limiter():
+    limiter = FakeLimiter()
+    router = _router(('primary', 1.0, 0.0), ('secondary', 0, 0.0), hedge=True, limiter=limiter)
+
+    start = time.perf_counter()
+    result = router.analyze(PROMPT)
+
+    assert time.perf_counter() - start < 0.8
+    assert result['provider'] == 'secondary'
+    assert result['hedge']['winner'] == 'secondary'
+    assert result['hedge']['providers'] == ['secondary', 'primary']
+    assert result['cost'] > 0
+    assert limiter.requests.level == -1
+    # The reservation is settled with the duplicate's actual usage
+    usage = result['usage']
+    assert limiter.tokens.level == -(usage['input_tokens'] + usage['output_tokens'])
+
+
+def test_hedge_is_skipped_when_the_budget_is_exhausted():
+    limiter = FakeLimiter(wait=3.0)
+    router = _router(('primary', 0.2, 0.0), ('secondary', 0, 0.0), hedge=True, limiter=limiter)
+
+    result = router.analyze(PROMPT)
+
+    assert result['provider'] == 'primary'
+    assert 'hedge' not in result
+    assert limiter.requests.level == 0
+    assert limiter.tokens.level == 0
+
+
+def test_failed_duplicate_gives_its_tokens_back():
+    limiter = FakeLimiter()
+    router = _router(('primary', 0.2, 0.0), ('secondary', 0, 1.0), hedge=True, limiter=limiter)
+
+    result = router.analyze(PROMPT)
+
+    assert result['provider'] == 'primary'
+    assert limiter.requests.level == -1
+    assert limiter.tokens.level == 0
+
+
+def test_fast_provider_is_not_hedged():
+    limiter = FakeLimiter()
+    router = _router(('primary', 0, 0.0), ('secondary', 0, 0.0), hedge=True, limiter=limiter)
+
+    result = router.analyze(PROMPT)
+
+    assert result['provider'] == 'primary'
+    assert 'hedge' not in result
+    assert limiter.requests.level == 0
+
+
+def test_stream_fails_over_before_the_first_chunk():
+    router = _router(('primary', 0, 1.0), ('secondary', 0, 0.0))
+
+    events = list(router.stream(PROMPT))
+
+    assert events[-1]['type'] == 'result'
+    assert events[-1]['result']['provider'] == 'secondary'
+    assert ''.join(e['text'] for e in events if e['type'] == 'delta') == events[-1]['result']['text']
+
+
+def test_router_is_opt_in(monkeypatch):
+    ai_client = importlib.import_module('lambda.ai_client')
+    monkeypatch.delenv('AI_ROUTER', raising=False)
+    monkeypatch.setenv('AI_MOCK_PROVIDERS', 'primary:0,secondary:0')
+
+    assert ai_client.AIClient().client_type == 'primary'
+
+    monkeypatch.setenv('AI_ROUTER', '1')
+    assert ai_client.AIClient().client_type == 'primary+secondary'
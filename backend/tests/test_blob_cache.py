@@ -0,0 +1,71 @@
+import importlib
+
+import pytest
+
+blob_cache = importlib.import_module('lambda.blob_cache')
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return blob_cache.BlobCache(
+        cache_dir=str(tmp_path / 'blobs'),
+        max_bytes=1000,
+        epoch_seconds=100,
+        unknown_ttl_seconds=10
+    )
+
+
+def test_put_and_get_round_trip(cache):
+    cache.put('blob-a', b'hello')
+    assert cache.get('blob-a') == b'hello'
+    assert cache.get('blob-b') is None
+    assert cache.stats()['hits'] == 1
+    assert cache.stats()['misses'] == 1
+
+
+def test_known_epochs_keep_whole_epochs_only(cache):
+    assert cache.expires_at(5, now=0) == 400
+    # The current epoch may end any moment, so one epoch guarantees nothing
+    assert cache.expires_at(1, now=0) == 10
+
+
+def test_unknown_lifetime_uses_conservative_ttl(cache, monkeypatch):
+    now = blob_cache.time.time()
+    cache.put('downloaded', b'data')
+
+    monkeypatch.setattr(blob_cache.time, 'time', lambda: now + 5)
+    assert cache.get('downloaded') == b'data'
+    monkeypatch.setattr(blob_cache.time, 'time', lambda: now + 11)
+    assert cache.get('downloaded') is None
+    assert cache.stats()['expirations'] == 1
+
+
+def test_commit_file_honours_epochs(cache, monkeypatch):
+    now = blob_cache.time.time()
+    tmp = cache.temp_file_for('uploaded')
+    with open(tmp, 'wb') as f:
+        f.write(b'data')
+    cache.commit_file('uploaded', tmp, epochs=3)
+
+    monkeypatch.setattr(blob_cache.time, 'time', lambda: now + 150)
+    assert cache.get('uploaded') == b'data'
+    monkeypatch.setattr(blob_cache.time, 'time', lambda: now + 250)
+    assert cache.get('uploaded') is None
+
+
+def test_lru_eviction_over_max_bytes(cache):
+    cache.put('a', b'x' * 400)
+    cache.put('b', b'x' * 400)
+    cache.get('a')
+    cache.put('c', b'x' * 400)
+
+    assert cache.get('b') is None
+    assert cache.get('a') is not None
+    assert cache.stats()['evictions'] == 1
+
+
+def test_stored_epochs_from_store_response():
+    created = {'newlyCreated': {'blobObject': {'storage': {'startEpoch': 40, 'endEpoch': 45}}}}
+    assert blob_cache.stored_epochs(created) == 5
+    assert blob_cache.stored_epochs({'alreadyCertified': {'blobId': 'x', 'endEpoch': 45}}) is None
+    assert blob_cache.stored_epochs({}) is None
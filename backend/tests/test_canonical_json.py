@@ -0,0 +1,78 @@
+import importlib
+
+import numpy as np
+import pytest
+
+canonical_json = importlib.import_module('lambda.canonical_json')
+
+ENCODERS = [pytest.param(canonical_json.dumps_fallback, id='stdlib')]
+if canonical_json.orjson is not None:
+    ENCODERS.append(pytest.param(canonical_json.dumps_canonical, id='orjson'))
+
+DATA = {
+    'floats': [1e16, 1e15, 1e-7, 1e-5, 0.0001, 100.0, -0.0, 0.1, 1.5e300, 5e-324, 123456789012345678.0],
+    'nonfinite': [float('nan'), float('inf'), float('-inf')],
+    'ints': [0, -1, 2**63 - 1, -2**63],
+    'text': 'é😀 "quoted" \\ \x00\x1f\b\t\n ',
+    'numpy': [np.float64(0.5), np.float32(0.1), np.int64(7), np.bool_(True), np.arange(3)],
+    'nested': {'b': [True, False, None], 'a': ()},
+    3: 'int key',
+    10: 'sorted as a string',
+    1.5: 'float key',
+    None: 'null key',
+    True: 'bool key'
+}
+
+GOLDEN = (
+    '{"1.5":"float key","10":"sorted as a string","3":"int key",'
+    '"floats":[1e16,1000000000000000.0,1e-7,0.00001,0.0001,100.0,-0.0,0.1,1.5e300,5e-324,1.2345678901234568e17],'
+    '"ints":[0,-1,9223372036854775807,-9223372036854775808],'
+    '"nested":{"a":[],"b":[true,false,null]},'
+    '"nonfinite":[null,null,null],'
+    '"null":"null key",'
+    '"numpy":[0.5,0.10000000149011612,7,true,[0,1,2]],'
+    '"text":"é😀 \\"quoted\\" \\\\ \\u0000\\u001f\\b\\t\\n ",'
+    '"true":"bool key"}'
+).encode('utf-8')
+
+
+@pytest.mark.parametrize('dumps', ENCODERS)
+def test_golden_bytes(dumps):
+    assert dumps(DATA) == GOLDEN
+
+
+def test_integers_beyond_64_bits_keep_the_float_format():
+    data = {'big': 2**70, 'x': 1e16}
+
+    assert canonical_json.dumps_canonical(data) == b'{"big":1180591620717411303424,"x":1e16}'
+
+
+@pytest.mark.parametrize('dumps', ENCODERS)
+def test_unsupported_values_raise(dumps):
+    with pytest.raises(TypeError):
+        dumps({'value': object()})
+
+
+def test_format_float_round_trips():
+    rng = np.random.default_rng(0)
+    values = np.concatenate([
+        rng.standard_normal(2000) * 10.0 ** rng.integers(-30, 30, 2000),
+        rng.integers(0, 2**63, 2000, dtype=np.uint64).view(np.float64)
+    ])
+
+    for value in values.tolist():
+        text = canonical_json.format_float(value)
+        if np.isfinite(value):
+            assert float(text) == value
+            assert '+' not in text
+        else:
+            assert text == 'null'
+
+
+@pytest.mark.skipif(canonical_json.orjson is None, reason='orjson not installed')
+def test_fallback_matches_orjson_on_random_floats():
+    rng = np.random.default_rng(1)
+    values = rng.integers(0, 2**63, 5000, dtype=np.uint64).view(np.float64).tolist()
+    values += (rng.standard_normal(5000) * 10.0 ** rng.integers(-8, 20, 5000)).tolist()
+
+    assert canonical_json.dumps_fallback(values) == canonical_json.dumps_canonical(values)
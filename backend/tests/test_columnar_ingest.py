@@ -0,0 +1,98 @@
+import importlib
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip('duckdb')
+
+columnar_ingest = importlib.import_module('lambda.columnar_ingest')
+canonical_json = importlib.import_module('lambda.canonical_json')
+dataset_profile = importlib.import_module('lambda.dataset_profile')
+
+
+def _blob(df, dumps=canonical_json.dumps_canonical):
+    """A data blob laid out the way DataUploader uploads it"""
+    return dumps({
+        'data': df.to_dict('records'),
+        'metadata': {},
+        'schema': {'columns': dataset_profile.profile_dataframe(df)['column_stats'], 'row_count': len(df)},
+        'row_count': len(df),
+        'validation': {}
+    })
+
+
+def _plain(raw):
+    return pd.DataFrame(json.loads(raw)['data'])
+
+
+def _strings_as_object(df):
+    # What DataUploader records for string columns on pandas < 2
+    return df.astype({name: object for name in df.columns if not pd.api.types.is_numeric_dtype(df[name])})
+
+
+@pytest.fixture
+def df():
+    return pd.DataFrame({
+        'player': ['p1', 'p2', 'p3', 'p4'],
+        'item': ['sword', None, 'shield', 'é "quoted"'],
+        'amount': [1.5, np.nan, 3.0, 4.25],
+        'count': [1, 2, 3, 4],
+        'active': [True, False, True, True]
+    })
+
+
+@pytest.mark.parametrize('dumps', [canonical_json.dumps_canonical, canonical_json.dumps_legacy])
+@pytest.mark.parametrize('prepare', [lambda df: df, _strings_as_object], ids=['native', 'object'])
+def test_matches_the_plain_path(df, dumps, prepare):
+    raw = _blob(prepare(df), dumps)
+
+    result = columnar_ingest.read_wrapped_dataset(raw)
+
+    assert result is not None
+    pd.testing.assert_frame_equal(result, _plain(raw), check_dtype=False)
+
+
+def test_string_object_columns_are_not_decoded_per_value(df, monkeypatch):
+    def decode(*args):
+        raise AssertionError('string column decoded in Python')
+    monkeypatch.setattr(columnar_ingest, '_merge_json_values', decode)
+    raw = _blob(_strings_as_object(df))
+
+    result = columnar_ingest.read_wrapped_dataset(raw)
+
+    assert result['player'].tolist() == ['p1', 'p2', 'p3', 'p4']
+    assert result['item'].dropna().tolist() == ['sword', 'shield', 'é "quoted"']
+    assert result['item'].isna().tolist() == [False, True, False, False]
+
+
+def test_mixed_object_columns_keep_their_values():
+    df = pd.DataFrame({
+        'value': ['text', 7, None, [1, 2], {'k': 'v'}, 2.5, True],
+        'label': ['a', 'b', 'c', 'd', 'e', 'f', 'g']
+    })
+    raw = _blob(df)
+
+    result = columnar_ingest.read_wrapped_dataset(raw)
+
+    assert result['value'].tolist() == ['text', 7, None, [1, 2], {'k': 'v'}, 2.5, True]
+    assert result['label'].tolist() == list('abcdefg')
+
+
+def test_missing_values_in_legacy_object_columns():
+    # json.dumps wrote pandas < 2 missing strings as a bare NaN token
+    df = pd.DataFrame({'item': ['sword', np.nan, 'shield']}, dtype=object)
+    raw = _blob(df, canonical_json.dumps_legacy)
+
+    result = columnar_ingest.read_wrapped_dataset(raw)
+
+    assert result['item'].iloc[0] == 'sword'
+    assert pd.isna(result['item'].iloc[1])
+    assert result['item'].iloc[2] == 'shield'
+
+
+def test_blobs_without_a_schema_fall_back():
+    raw = canonical_json.dumps_canonical({'data': [{'a': 1}], 'row_count': 1})
+
+    assert columnar_ingest.read_wrapped_dataset(raw) is None
@@ -0,0 +1,81 @@
+import importlib
+
+import pytest
+
+csv_stream = importlib.import_module('lambda.csv_stream')
+blob_cache = importlib.import_module('lambda.blob_cache')
+dataset_profile = importlib.import_module('lambda.dataset_profile')
+walrus_service = importlib.import_module('lambda.walrus_service')
+
+CSV = (
+    '\ufeffplayer_id, name ,score\r\n'
+    'p1,"Smith, Jo",10\r\n'
+    '\r\n'
+    'p2,"multi\nline ""quoted""",20\r\n'
+    'p3,Lee,30\r\n'
+).encode('utf-8')
+
+
+def chunked(data: bytes, size: int):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+@pytest.mark.parametrize('size', [1, 2, 7, 1024])
+def test_rows_survive_any_chunk_boundary(size):
+    rows = list(csv_stream.CsvStream(chunked(CSV, size)))
+
+    assert rows == [
+        {'player_id': 'p1', 'name': 'Smith, Jo', 'score': '10'},
+        {'player_id': 'p2', 'name': 'multi\nline "quoted"', 'score': '20'},
+        {'player_id': 'p3', 'name': 'Lee', 'score': '30'},
+    ]
+
+
+def test_multibyte_characters_split_across_chunks():
+    data = 'id,city\n1,Zürich\n2,서울\n'.encode('utf-8')
+    rows = list(csv_stream.CsvStream(chunked(data, 1)))
+    assert [row['city'] for row in rows] == ['Zürich', '서울']
+
+
+def test_offset_limit_and_projection():
+    stream = csv_stream.CsvStream([CSV], columns=['score', 'player_id'], offset=1, limit=1)
+
+    assert stream.headers == ['player_id', 'name', 'score']
+    assert list(stream) == [{'score': '20', 'player_id': 'p2'}]
+
+
+def test_unknown_columns_and_empty_csv_fail_up_front():
+    with pytest.raises(ValueError, match='Unknown columns: nope'):
+        csv_stream.CsvStream([CSV], columns=['nope'])
+    with pytest.raises(ValueError):
+        csv_stream.CsvStream([b'\n\n'])
+
+
+def test_stream_closes_its_source():
+    class Source(list):
+        closed = False
+
+        def close(self):
+            self.closed = True
+
+    source = Source([CSV])
+    list(csv_stream.CsvStream(source, limit=1))
+    assert source.closed
+
+
+def test_read_blob_as_csv_pages_from_cache(tmp_path):
+    cache = blob_cache.BlobCache(cache_dir=str(tmp_path / 'blobs'))
+    cache.put('blob', CSV)
+    service = walrus_service.WalrusService(
+        'http://publisher.invalid', 'http://aggregator.invalid',
+        cache=cache,
+        profiles=dataset_profile.DatasetProfileStore(str(tmp_path / 'profiles.db'))
+    )
+
+    first = service.read_blob_as_csv('blob', offset=0, limit=2)
+    assert [row['player_id'] for row in first['data']] == ['p1', 'p2']
+    assert first['has_more'] is True
+
+    last = service.read_blob_as_csv('blob', offset=2, limit=2)
+    assert [row['player_id'] for row in last['data']] == ['p3']
+    assert last['has_more'] is False
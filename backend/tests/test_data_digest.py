@@ -0,0 +1,35 @@
+import importlib
+
+import pandas as pd
+
+data_digest = importlib.import_module('lambda.data_digest')
+
+
+def test_time_digest_counts_events_per_bucket():
+    df = pd.DataFrame({
+        'timestamp': ['2024-01-01T00:10:00', '2024-01-01T00:50:00', '2024-01-01T05:00:00', '2024-01-02T23:59:00'],
+        'amount': [1.0, 2.0, 3.0, 4.0]
+    })
+
+    stats = data_digest.digest_dataframe(df)['time']['timestamp']
+
+    assert stats['start'] == '2024-01-01T00:00:00+00:00'
+    assert stats['end'] == '2024-01-03T00:00:00+00:00'
+    assert stats['bucket_seconds'] == 4 * 3600
+    assert stats['counts'] == [2, 1] + [0] * 9 + [1]
+    assert stats['max_per_hour'] == 2
+    assert stats['busiest_hours'][0] == [0, 2]
+
+
+def test_time_digest_handles_any_index_resolution():
+    # pandas 1.x indexes are always ns; 2+ may hand back s or us
+    index = pd.DatetimeIndex(['2024-03-01 10:00', '2024-03-01 12:00', '2024-03-01 10:00']).unique()
+    hours = pd.Series([5, 1], index=index)
+    if hasattr(index, 'as_unit'):
+        hours.index = index.as_unit('s')
+
+    stats = data_digest.DigestBuilder._time_digest(hours)
+
+    assert stats['start'] == '2024-03-01T10:00:00'
+    assert stats['bucket_seconds'] == 3600
+    assert stats['counts'] == [5, 0, 1]
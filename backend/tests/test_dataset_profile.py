@@ -0,0 +1,79 @@
+import importlib
+
+import numpy as np
+import pandas as pd
+
+dataset_profile = importlib.import_module('lambda.dataset_profile')
+
+
+def test_profile_layout():
+    df = pd.DataFrame({
+        'player_id': ['a', 'b', 'a', None],
+        'amount': [10.0, 20.0, np.nan, 30.0],
+        'count': [1, 2, 3, 4],
+        'items': [['x'], ['y'], ['x'], None]
+    })
+
+    profile = dataset_profile.profile_dataframe(df)
+
+    assert profile['row_count'] == 4
+    assert profile['column_count'] == 4
+    assert profile['columns'] == ['player_id', 'amount', 'count', 'items']
+    stats = profile['column_stats']
+    assert stats['player_id']['null_count'] == 1
+    assert stats['player_id']['unique_count'] == 2
+    assert 'mean' not in stats['player_id']
+    assert stats['amount'] == {'type': 'float64', 'null_count': 1, 'unique_count': 3,
+                               'min': 10.0, 'max': 30.0, 'mean': 20.0}
+    assert stats['items']['unique_count'] == 2  # unhashable values counted by their JSON
+    assert set(profile['numeric_summary']) == {'amount', 'count'}
+
+
+def test_csv_rows_are_typed_before_profiling():
+    rows = [{'id': '1', 'score': '2.5', 'tag': 'a'}, {'id': '2', 'score': '', 'tag': '3'}]
+
+    stats = dataset_profile.profile_csv_rows(rows)['column_stats']
+
+    assert stats['id']['type'] == 'int64'
+    assert stats['score'] == {'type': 'float64', 'null_count': 1, 'unique_count': 1,
+                              'min': 2.5, 'max': 2.5, 'mean': 2.5}
+    assert stats['tag']['type'] != 'int64'
+
+
+def test_store_round_trip_and_compute_once(tmp_path):
+    store = dataset_profile.DatasetProfileStore(str(tmp_path / 'profiles.db'))
+    profile = dataset_profile.profile_dataframe(pd.DataFrame({'amount': [1.0, 2.0]}))
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return profile
+
+    assert store.get('blob') is None
+    assert store.get_or_compute('blob', compute) == profile
+    assert store.get_or_compute('blob', compute) == profile
+    assert len(calls) == 1
+
+    # Another process sharing the file sees it too
+    assert dataset_profile.DatasetProfileStore(str(tmp_path / 'profiles.db')).get('blob') == profile
+
+
+def test_profiles_of_another_layout_version_are_ignored(tmp_path, monkeypatch):
+    store = dataset_profile.DatasetProfileStore(str(tmp_path / 'profiles.db'))
+    store.put('blob', {'row_count': 1, 'columns': ['a']})
+
+    monkeypatch.setattr(dataset_profile, 'PROFILE_VERSION', dataset_profile.PROFILE_VERSION + '-next')
+
+    assert store.get('blob') is None
+
+
+def test_format_profile_lists_every_column():
+    profile = dataset_profile.profile_dataframe(pd.DataFrame({'amount': [1.0, 3.0], 'tag': ['a', 'b']}))
+
+    text = dataset_profile.format_profile(profile)
+
+    assert text.splitlines() == [
+        '- Rows: 2',
+        '- amount (float64): 0 nulls, 2 unique, min 1, max 3, mean 2',
+        f"- tag ({profile['column_stats']['tag']['type']}): 0 nulls, 2 unique"
+    ]
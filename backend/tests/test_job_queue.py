@@ -0,0 +1,143 @@
+import importlib
+import sqlite3
+import threading
+import time
+
+import pytest
+
+job_queue = importlib.import_module('lambda.job_queue')
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / 'jobs.db')
+
+
+def _wait_for(queue, job_id, timeout=5):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = queue.get(job_id)
+        if job['status'] in (job_queue.STATUS_SUCCEEDED, job_queue.STATUS_FAILED):
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"job {job_id} did not finish")
+
+
+def _wait_until(condition, timeout=5):
+    deadline = time.time() + timeout
+    while not condition():
+        assert time.time() < deadline, 'condition not met in time'
+        time.sleep(0.01)
+
+
+def test_jobs_run_and_record_results(db_path):
+    queue = job_queue.JobQueue(db_path, workers=2)
+    queue.register('double', lambda payload: {'value': payload['value'] * 2})
+    queue.register('broken', lambda payload: 1 / 0)
+    queue.start()
+    try:
+        ok = queue.submit('double', {'value': 21})
+        failed = queue.submit('broken', {})
+
+        assert _wait_for(queue, ok['job_id'])['result'] == {'value': 42}
+        job = _wait_for(queue, failed['job_id'])
+        assert job['status'] == job_queue.STATUS_FAILED
+        assert 'division by zero' in job['error']
+        assert job['attempts'] == 1
+    finally:
+        queue.stop(5)
+
+
+def test_worker_survives_a_database_error_recording_a_job(db_path, monkeypatch):
+    queue = job_queue.JobQueue(db_path, workers=1)
+    queue.register('double', lambda payload: {'value': payload['value'] * 2})
+    finish = queue._finish
+    failures = []
+
+    def flaky_finish(job_id, result, error):
+        if not failures:
+            failures.append(job_id)
+            raise sqlite3.OperationalError('database is locked')
+        finish(job_id, result, error)
+
+    monkeypatch.setattr(queue, '_finish', flaky_finish)
+    queue.start()
+    try:
+        lost = queue.submit('double', {'value': 1})['job_id']
+        _wait_until(lambda: failures)
+        later = queue.submit('double', {'value': 21})['job_id']
+
+        assert _wait_for(queue, later)['result'] == {'value': 42}
+        assert all(thread.is_alive() for thread in queue._threads)
+        assert queue.get(lost)['status'] == job_queue.STATUS_RUNNING  # requeued on the next start
+    finally:
+        queue.stop(5)
+
+
+def test_unknown_kind_is_rejected(db_path):
+    queue = job_queue.JobQueue(db_path, workers=1)
+
+    with pytest.raises(ValueError, match='Unknown job kind'):
+        queue.submit('missing', {})
+
+
+def test_claims_are_oldest_first_and_never_shared(db_path):
+    queue = job_queue.JobQueue(db_path, workers=1)
+    queue.register('noop', lambda payload: {})
+    submitted = [queue.submit('noop', {'n': n})['job_id'] for n in range(30)]
+
+    assert queue.get(submitted[3])['queue_position'] == 3
+
+    claimed = []
+    lock = threading.Lock()
+
+    def claim_all():
+        while True:
+            job = queue._claim()
+            if job is None:
+                return
+            with lock:
+                claimed.append(job['job_id'])
+
+    threads = [threading.Thread(target=claim_all) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(claimed) == sorted(submitted)
+    assert len(set(claimed)) == len(claimed)
+    assert queue.stats()['running'] == 30
+
+
+def test_interrupted_job_is_requeued_on_start(db_path):
+    queue = job_queue.JobQueue(db_path, workers=1)
+    queue.register('noop', lambda payload: {'done': True})
+    job_id = queue.submit('noop', {})['job_id']
+    queue._claim()  # the process "dies" while running it
+
+    restarted = job_queue.JobQueue(db_path, workers=1)
+    restarted.register('noop', lambda payload: {'done': True})
+    restarted.start()
+    try:
+        job = _wait_for(restarted, job_id)
+        assert job['status'] == job_queue.STATUS_SUCCEEDED
+        assert job['attempts'] == 2
+    finally:
+        restarted.stop(5)
+
+
+def test_job_interrupted_too_often_is_failed(db_path):
+    queue = job_queue.JobQueue(db_path, workers=1, max_attempts=2)
+    queue.register('crash', lambda payload: {})
+    job_id = queue.submit('crash', {})['job_id']
+
+    for _ in range(2):
+        assert queue._claim()['job_id'] == job_id
+        # Restart: the first interruption is requeued, the second is not
+        job_queue.JobQueue(db_path, workers=1, max_attempts=2)._recover()
+
+    job = queue.get(job_id)
+    assert job['status'] == job_queue.STATUS_FAILED
+    assert job['attempts'] == 2
+    assert 'JOB_MAX_ATTEMPTS' in job['error']
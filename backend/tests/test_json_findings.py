@@ -0,0 +1,72 @@
+import importlib
+import json
+
+import pytest
+
+json_findings = importlib.import_module('lambda.json_findings')
+
+FINDINGS = [
+    {'title': 'Whale spending', 'detail': 'p1 spent 999.99 "twice" [flagged] {x}', 'players': ['p1']},
+    {'title': 'Escapes \\ and é', 'nested': {'counts': [1, [2, 3]], 'ok': True}},
+    {'title': 'Empty', 'players': []}
+]
+
+RESPONSE = (
+    '```json\n{\n  "summary": "Three patterns",\n  "findings": [\n'
+    + ',\n'.join('    ' + json.dumps(finding, ensure_ascii=False) for finding in FINDINGS)
+    + '\n  ],\n  "recommendations": ["Watch p1"]\n}\n```'
+)
+
+
+def _feed(extractor, text, size):
+    items = []
+    for start in range(0, len(text), size):
+        items.extend(extractor.feed(text[start:start + size]))
+    return items
+
+
+@pytest.mark.parametrize('size', [1, 3, 17, len(RESPONSE)])
+def test_elements_are_emitted_whatever_the_chunking(size):
+    extractor = json_findings.FindingsExtractor()
+
+    assert _feed(extractor, RESPONSE, size) == FINDINGS
+    assert extractor.done
+    assert extractor.count == 3
+
+
+def test_elements_are_emitted_as_soon_as_they_close():
+    extractor = json_findings.FindingsExtractor()
+    first = json.dumps(FINDINGS[0])
+
+    assert extractor.feed('{"findings": [' + first[:-1]) == []
+    assert extractor.feed(first[-1:] + ', {"title": ') == [FINDINGS[0]]
+    assert not extractor.done
+
+
+def test_nothing_is_emitted_after_the_array_closes():
+    extractor = json_findings.FindingsExtractor()
+
+    assert extractor.feed('{"findings": [1, "two", null]') == [1, 'two', None]
+    assert extractor.feed(', "other": [{"a": 1}]}') == []
+
+
+def test_invalid_elements_are_dropped():
+    extractor = json_findings.FindingsExtractor()
+
+    items = extractor.feed('{"findings": [{"a": 1}, nonsense, {"b": 2}]}')
+
+    assert items == [{'a': 1}, {'b': 2}]
+    assert extractor.count == 2
+
+
+def test_other_keys_can_be_extracted():
+    extractor = json_findings.FindingsExtractor('recommendations')
+
+    assert _feed(extractor, RESPONSE, 5) == ['Watch p1']
+
+
+def test_a_response_without_the_array_yields_nothing():
+    extractor = json_findings.FindingsExtractor()
+
+    assert _feed(extractor, '{"summary": "no findings here", "items": []}' * 10, 7) == []
+    assert not extractor.done
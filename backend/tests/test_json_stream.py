@@ -0,0 +1,102 @@
+import importlib
+import json
+import os
+
+import pytest
+
+json_stream = importlib.import_module('lambda.json_stream')
+blob_cache = importlib.import_module('lambda.blob_cache')
+
+ROWS = [{'id': i, 'name': f"ü-{i}", 'amount': i * 1.5, 'tags': ['a', {'b': None}]} for i in range(20)]
+
+
+def _chunks(raw: bytes, size: int):
+    return [raw[i:i + size] for i in range(0, len(raw), size)]
+
+
+@pytest.mark.parametrize('size', [1, 2, 7, 64, 1 << 20])
+@pytest.mark.parametrize('layout', [
+    lambda rows: rows,
+    lambda rows: {'schema': {'id': 'int'}, 'data': rows, 'row_count': len(rows)},
+])
+def test_rows_survive_any_chunking(layout, size):
+    raw = json.dumps(layout(ROWS), indent=1, ensure_ascii=False).encode('utf-8')
+
+    assert list(json_stream.iter_json_rows(_chunks(raw, size))) == ROWS
+
+
+def test_object_without_data_is_one_row():
+    raw = b'{"id": 1, "amount": 2.5}'
+
+    assert list(json_stream.iter_json_rows(_chunks(raw, 3))) == [{'id': 1, 'amount': 2.5}]
+
+
+def test_empty_array():
+    assert list(json_stream.iter_json_rows([b' [ ', b'] '])) == []
+
+
+@pytest.mark.parametrize('raw', [b'[{"id": 1}, {"id": ', b'[{"id": 1} {"id": 2}]', b'"a,b\\n1,2"'])
+def test_malformed_or_non_row_data(raw):
+    with pytest.raises(ValueError):
+        list(json_stream.iter_json_rows(_chunks(raw, 4)))
+
+
+def test_row_batches():
+    batches = list(json_stream.iter_row_batches(iter(ROWS), 8))
+
+    assert [len(batch) for batch in batches] == [8, 8, 4]
+    assert batches[2]['id'].tolist() == [16, 17, 18, 19]
+
+
+class FakeResponse:
+    def __init__(self, chunks, fail_after=None):
+        self.chunks = chunks
+        self.fail_after = fail_after
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def raise_for_status(self):
+        pass
+
+    def iter_content(self, chunk_size):
+        for index, chunk in enumerate(self.chunks):
+            if index == self.fail_after:
+                raise IOError('connection reset')
+            yield chunk
+
+
+class FakeSession:
+    def __init__(self, chunks, fail_after=None):
+        self.chunks = chunks
+        self.fail_after = fail_after
+        self.requests = 0
+
+    def get(self, url, **kwargs):
+        self.requests += 1
+        return FakeResponse(self.chunks, self.fail_after)
+
+
+def test_cached_blob_streams_once_then_reads_the_cache(tmp_path):
+    cache = blob_cache.BlobCache(cache_dir=str(tmp_path))
+    session = FakeSession([b'[1,', b'2]'])
+
+    first = b''.join(blob_cache.iter_cached_blob(cache, session, 'http://aggregator/v1/b', 'b'))
+    second = b''.join(blob_cache.iter_cached_blob(cache, session, 'http://aggregator/v1/b', 'b'))
+
+    assert first == second == b'[1,2]'
+    assert session.requests == 1
+
+
+def test_partly_read_blob_is_not_cached(tmp_path):
+    cache = blob_cache.BlobCache(cache_dir=str(tmp_path))
+    session = FakeSession([b'[1,', b'2]'], fail_after=1)
+
+    with pytest.raises(IOError):
+        list(blob_cache.iter_cached_blob(cache, session, 'http://aggregator/v1/b', 'b'))
+
+    assert cache.path('b') is None
+    assert not [name for name in os.listdir(tmp_path) if name.endswith('.tmp')]
@@ -0,0 +1,83 @@
+import importlib
+
+import numpy as np
+import pandas as pd
+import pytest
+
+prompt_sample = importlib.import_module('lambda.prompt_sample')
+
+
+@pytest.fixture
+def df():
+    rng = np.random.default_rng(3)
+    rows = 5000
+    df = pd.DataFrame({
+        'player_id': [f"p{i}" for i in rng.integers(0, 1000, rows)],
+        'item': rng.choice(['sword', 'gem', 'skin', 'pass'], rows),
+        'amount': np.round(rng.exponential(20, rows), 2),
+        'created_at': (pd.Timestamp('2024-05-01') + pd.to_timedelta(rng.integers(0, 30 * 86400, rows), unit='s')).astype(str)
+    })
+    df.loc[1234, 'amount'] = 99999.0
+    df.loc[4321, 'item'] = 'legendary'
+    return df
+
+
+def test_sample_keeps_extremes_and_every_category(df):
+    sample = prompt_sample.stratified_sample(df, max_tokens=800)
+
+    amounts = [row['amount'] for row in sample['rows']]
+    items = {row['item'] for row in sample['rows']}
+    assert 99999.0 in amounts
+    assert df['amount'].min() in amounts
+    assert items == {'sword', 'gem', 'skin', 'pass', 'legendary'}
+    assert all(sample['strata'][name] > 0 for name in prompt_sample.STRATA)
+    assert sample['row_count'] == 5000
+
+
+def test_sample_stays_within_its_budget(df):
+    for budget in (50, 300, 2000):
+        sample = prompt_sample.stratified_sample(df, max_tokens=budget)
+        assert 0 < sample['approx_tokens'] <= budget
+        assert len(sample['rows']) < len(df)
+
+
+def test_sample_is_deterministic_and_in_dataset_order(df):
+    first = prompt_sample.stratified_sample(df, max_tokens=600)
+    second = prompt_sample.stratified_sample(df, max_tokens=600)
+
+    assert first == second
+    positions = [df.index[(df['player_id'] == row['player_id']) & (df['amount'] == row['amount'])][0]
+                 for row in first['rows']]
+    assert positions == sorted(positions)
+
+
+def test_chunked_sampler_keeps_global_extremes(df):
+    sampler = prompt_sample.StratifiedSampler(max_tokens=800)
+    for start in range(0, len(df), 700):
+        sampler.update(df.iloc[start:start + 700])
+
+    sample = sampler.result()
+
+    assert sample['row_count'] == 5000
+    assert 99999.0 in [row['amount'] for row in sample['rows']]
+    assert 'legendary' in {row['item'] for row in sample['rows']}
+    assert sample['approx_tokens'] <= 800
+
+
+def test_fit_sample_thins_evenly(df):
+    sample = prompt_sample.stratified_sample(df, max_tokens=2000)
+
+    fitted = prompt_sample.fit_sample(sample, 400)
+
+    assert fitted['fitted'] is True
+    assert fitted['approx_tokens'] <= 400
+    assert fitted['rows'][0] == sample['rows'][0]
+    assert 'evenly thinned' in prompt_sample.describe_sample(fitted)
+    assert prompt_sample.fit_sample(sample, 10 ** 6) is sample
+
+
+def test_empty_frame_gives_an_empty_sample():
+    sample = prompt_sample.stratified_sample(pd.DataFrame({'a': []}), max_tokens=100)
+
+    assert sample['rows'] == []
+    assert sample['row_count'] == 0
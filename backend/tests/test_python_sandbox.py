@@ -0,0 +1,209 @@
+import importlib
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+python_sandbox = importlib.import_module('lambda.python_sandbox')
+
+pytestmark = pytest.mark.skipif(not sys.platform.startswith('linux'), reason='rule confinement needs Linux')
+
+
+def _level(isolation):
+    try:
+        python_sandbox.check_isolation(isolation)
+    except RuntimeError as e:
+        return pytest.param((isolation, None), marks=pytest.mark.skip(reason=str(e)), id=isolation)
+    return pytest.param((isolation, None), id=isolation)
+
+
+def _wrapped_seccomp():
+    # Without Landlock, seccomp mode needs a jail; `env` stands in for one so
+    # the seccomp filter itself is still exercised on such hosts
+    if python_sandbox.landlock_abi():
+        return pytest.param(('seccomp', ['env']), marks=pytest.mark.skip(reason='covered by seccomp'), id='seccomp-wrapped')
+    return pytest.param(('seccomp', ['env']), id='seccomp-wrapped')
+
+
+@pytest.fixture(scope='module', params=[_level('uid'), _level('seccomp'), _wrapped_seccomp()])
+def sandbox(request):
+    isolation, command = request.param
+    sandbox = python_sandbox.PythonSandbox(
+        max_workers=1, cpu_seconds=2, memory_mb=1024, timeout_seconds=5, isolation=isolation, command=command
+    )
+    yield sandbox
+    sandbox.shutdown()
+
+
+@pytest.fixture
+def df():
+    return pd.DataFrame({'amount': [1.5, 2.5, 3.0], 'name': ['a', 'b', 'c']})
+
+
+def test_rule_runs_with_params(sandbox, df):
+    code = (
+        "import pandas as pd\n"
+        "def rule(df):\n"
+        "    return {'total': df['amount'].sum(), 'over': int((df['amount'] > params['min']).sum())}\n"
+    )
+
+    assert sandbox.run(df, code, {'min': 2}) == {'total': 7.0, 'over': 2}
+
+
+def test_rule_changes_do_not_reach_the_caller(sandbox, df):
+    code = "def rule(df):\n    df.loc[:, 'amount'] = 0\n    return float(df['amount'].sum())\n"
+
+    assert sandbox.run(df, code) == 0.0
+    assert df['amount'].tolist() == [1.5, 2.5, 3.0]
+
+
+def test_pandas_and_numpy_are_not_preloaded(sandbox, df):
+    with pytest.raises(ValueError, match="NameError"):
+        sandbox.run(df, "def rule(df):\n    return pd.__version__\n")
+
+
+@pytest.mark.parametrize('code', [
+    # Reaching os through a pandas module is easy; running anything with it must not be
+    "import pandas as pd\ndef rule(df):\n    return pd.io.common.os.popen('id').read()\n",
+    "import pandas as pd\ndef rule(df):\n    return pd.io.common.os.system('touch /tmp/sandbox-escape')\n",
+    "import pandas as pd\ndef rule(df):\n    return pd.io.common.os.fork()\n",
+])
+def test_rule_cannot_run_programs(sandbox, df, code):
+    try:
+        result = sandbox.run(df, code)
+    except ValueError:
+        result = None
+
+    # os.system reports the failed spawn as exit status 127
+    assert not result or result == 127 << 8
+    assert not os.path.exists('/tmp/sandbox-escape')
+
+
+def test_rule_cannot_open_sockets(sandbox, df):
+    code = (
+        "import pandas as pd\n"
+        "def rule(df):\n"
+        "    return pd.io.common.os.sys.modules['socket'].socket().fileno()\n"
+    )
+
+    with pytest.raises(ValueError, match='Operation not permitted|KeyError'):
+        sandbox.run(df, code)
+
+
+def test_rule_cannot_write_files(sandbox, df, tmp_path):
+    target = tmp_path / 'written'
+    code = (
+        "import pandas as pd\n"
+        "def rule(df):\n"
+        f"    df.to_csv({str(target)!r})\n"
+    )
+
+    with pytest.raises(ValueError):
+        sandbox.run(df, code)
+    assert not target.exists()
+
+
+def test_rule_cannot_signal_the_server(sandbox, df):
+    code = (
+        "import pandas as pd\n"
+        "def rule(df):\n"
+        f"    pd.io.common.os.kill({os.getpid()}, 9)\n"
+    )
+
+    with pytest.raises(ValueError, match='Operation not permitted'):
+        sandbox.run(df, code)
+
+
+@pytest.mark.parametrize('path', ['/proc/{pid}/environ', '{secret}', '/etc/hostname'])
+def test_rule_cannot_read_server_files(sandbox, df, tmp_path, path):
+    if not python_sandbox.landlock_abi():
+        pytest.skip('reading files is left to the jail without Landlock')
+    secret = tmp_path / '.env'
+    secret.write_text('SUI_PRIVATE_KEY=suiprivkey1secret\n')
+    code = (
+        "import pandas as pd\n"
+        "def rule(df):\n"
+        "    os = pd.io.common.os\n"
+        f"    return os.read(os.open({path.format(pid=os.getpid(), secret=secret)!r}, os.O_RDONLY), 4096).decode()\n"
+    )
+
+    with pytest.raises(ValueError, match='Permission denied'):
+        sandbox.run(df, code)
+
+
+def test_rule_sees_no_server_environment(sandbox, df):
+    code = "import pandas as pd\ndef rule(df):\n    return sorted(pd.io.common.os.environ)\n"
+
+    names = sandbox.run(df, code)
+
+    assert 'WALRUS_STATE_DIR' not in names
+    assert not any('KEY' in name or 'SECRET' in name or 'TOKEN' in name for name in names)
+
+
+def test_cpu_limit(sandbox, df):
+    with pytest.raises(ValueError, match='CpuTimeExceeded'):
+        sandbox.run(df, "def rule(df):\n    while True:\n        pass\n")
+
+
+def test_memory_limit(sandbox, df):
+    with pytest.raises(ValueError, match='MemoryError'):
+        sandbox.run(df, "import numpy as np\ndef rule(df):\n    return int(np.ones(512 * 1024 ** 2).sum())\n")
+
+
+def test_wall_clock_limit_keeps_the_worker(sandbox, df):
+    code = "import pandas as pd\ndef rule(df):\n    pd.io.common.os.sys.modules['time'].sleep(60)\n"
+
+    with pytest.raises(TimeoutError):
+        sandbox.run(df, code)
+    assert sandbox.run(df, "def rule(df):\n    return len(df)\n") == 3
+
+
+def test_rule_process_exit(sandbox, df):
+    code = "import pandas as pd\ndef rule(df):\n    pd.io.common.os._exit(3)\n"
+
+    with pytest.raises(RuntimeError, match=r'died during execution \(3\)'):
+        sandbox.run(df, code)
+
+
+@pytest.mark.parametrize('machine', ['x86_64', 'aarch64'])
+def test_seccomp_program_fits_the_kernel_limits(machine):
+    program = python_sandbox.seccomp_program(machine)
+
+    assert len(program) % 8 == 0
+    assert len(program) // 8 <= 4096
+
+
+def test_unknown_isolation_level():
+    with pytest.raises(ValueError, match='PYTHON_SANDBOX_ISOLATION'):
+        python_sandbox.check_isolation('container')
+
+
+def test_rule_cannot_send_the_pool_a_pickle(sandbox, df, tmp_path):
+    # Unpickling this in the pool would run os.system there
+    marker = tmp_path / 'pwned_by_rule'
+    code = (
+        "import pandas as pd\n"
+        "def rule(df):\n"
+        "    os = pd.io.common.os\n"
+        f"    payload = b\"cos\\nsystem\\n(S'touch {marker}'\\ntR.\"\n"
+        "    for fd in range(3, 64):\n"
+        "        try:\n"
+        "            os.write(fd, len(payload).to_bytes(4, 'big') + payload)\n"
+        "        except Exception:\n"
+        "            pass\n"
+        "    os._exit(0)\n"
+    )
+
+    with pytest.raises(ValueError, match='not valid'):
+        sandbox.run(df, code)
+    assert not marker.exists()
+    assert sandbox.run(df, "def rule(df):\n    return len(df)\n") == 3
+
+
+def test_oversized_results_are_rejected(sandbox, df, monkeypatch):
+    monkeypatch.setattr(sandbox, 'max_result_bytes', 1024)
+
+    with pytest.raises(ValueError, match='PYTHON_SANDBOX_MAX_RESULT_MB'):
+        sandbox.run(df, "def rule(df):\n    return 'x' * 4096\n")
+    assert sandbox.run(df, "def rule(df):\n    return len(df)\n") == 3
@@ -0,0 +1,114 @@
+import importlib
+import time
+
+import pytest
+
+result_index = importlib.import_module('lambda.result_index')
+walrus_uploader = importlib.import_module('lambda.walrus_uploader')
+blob_cache = importlib.import_module('lambda.blob_cache')
+
+KEY = ('data-blob', 'ruleset-blob', 4, 'v1')
+
+
+@pytest.fixture
+def index(tmp_path):
+    return result_index.ResultIndex(str(tmp_path / 'results.db'))
+
+
+def _expires_at(index):
+    with index._connect() as conn:
+        return conn.execute("SELECT expires_at FROM results").fetchone()[0]
+
+
+def test_deterministic_entry_ends_with_its_blob(index):
+    blob_end = time.time() + 3600
+
+    index.put(*KEY, {'result_blob_id': 'r'}, None, blob_expires_at=blob_end)
+
+    assert _expires_at(index) == blob_end
+    assert index.get(*KEY) == {'result_blob_id': 'r'}
+
+
+def test_ttl_shorter_than_blob_lifetime_wins(index):
+    before = time.time()
+
+    index.put(*KEY, {'result_blob_id': 'r'}, 60, blob_expires_at=before + 3600)
+
+    assert before + 60 <= _expires_at(index) <= time.time() + 60
+
+
+def test_entry_for_expired_blob_is_not_returned(index):
+    index.put(*KEY, {'result_blob_id': 'r'}, None, blob_expires_at=time.time() - 1)
+
+    assert index.get(*KEY) is None
+
+
+def test_delete(index):
+    index.put(*KEY, {'result_blob_id': 'r'})
+
+    index.delete(*KEY)
+
+    assert index.get(*KEY) is None
+
+
+class FakeResponse:
+    def __init__(self, payload=None, ok=True):
+        self.payload = payload
+        self.ok = ok
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.payload
+
+
+class FakeSession:
+    def __init__(self, store_response=None, head_ok=True):
+        self.store_response = store_response
+        self.head_ok = head_ok
+
+    def put(self, url, **kwargs):
+        return FakeResponse(self.store_response)
+
+    def head(self, url, **kwargs):
+        return FakeResponse(ok=self.head_ok)
+
+
+def test_upload_reports_storage_end(tmp_path):
+    cache = blob_cache.BlobCache(cache_dir=str(tmp_path / 'blobs'), epoch_seconds=100)
+    store_response = {'newlyCreated': {'blobObject': {'id': 'blob', 'storage': {'startEpoch': 4, 'endEpoch': 9}}}}
+    uploader = walrus_uploader.WalrusUploader(cache=cache, session=FakeSession(store_response))
+
+    before = time.time()
+    result = uploader.upload_blob({'a': 1})
+
+    # Five epochs stored, the current one partly over
+    assert before + 400 <= result['expires_at'] <= time.time() + 400
+
+
+def test_memo_hit_on_missing_blob_is_a_miss(index):
+    ruleset_executor = importlib.import_module('ruleset_executor')
+    executor = ruleset_executor.RulesetExecutor()
+    executor.results = index
+    executor.walrus = walrus_uploader.WalrusUploader(session=FakeSession(head_ok=False))
+    rule_type = executor.RULE_TYPE_DSL
+    key = ('data-blob', 'ruleset-blob', rule_type, executor.ENGINE_VERSION)
+    index.put(*key, {'result_blob_id': 'gone', 'execution_time_ms': 5})
+
+    assert executor._lookup_result('data-blob', 'ruleset-blob', rule_type, None, time.time()) is None
+    assert index.get(*key) is None
+
+
+def test_memo_hit_on_available_blob(index):
+    ruleset_executor = importlib.import_module('ruleset_executor')
+    executor = ruleset_executor.RulesetExecutor()
+    executor.results = index
+    executor.walrus = walrus_uploader.WalrusUploader(session=FakeSession(head_ok=True))
+    rule_type = executor.RULE_TYPE_DSL
+    index.put('data-blob', 'ruleset-blob', rule_type, executor.ENGINE_VERSION, {'result_blob_id': 'r'})
+
+    cached = executor._lookup_result('data-blob', 'ruleset-blob', rule_type, None, time.time())
+
+    assert cached['cached'] is True
+    assert cached['result_blob_id'] == 'r'
@@ -0,0 +1,190 @@
+import importlib
+
+import numpy as np
+import pandas as pd
+import pytest
+
+rule_dsl = importlib.import_module('lambda.rule_dsl')
+
+
+@pytest.fixture
+def transactions():
+    rng = np.random.default_rng(7)
+    rows = 500
+    return pd.DataFrame({
+        'player_id': rng.choice([f"p{i}" for i in range(40)], rows),
+        'amount': np.round(rng.exponential(40, rows), 2),
+        'item': rng.choice(['sword', 'gem', 'skin', 'pass'], rows),
+        'timestamp': pd.Timestamp('2024-05-01', tz='UTC') + pd.to_timedelta(rng.integers(0, 72 * 3600, rows), unit='s')
+    })
+
+
+GROUP_SPEC = {
+    'name': 'spenders',
+    'group_by': 'player_id',
+    'time_column': 'timestamp',
+    'aggregations': {
+        'total': {'column': 'amount', 'agg': 'sum'},
+        'average': {'column': 'amount', 'agg': 'mean'},
+        'spread': {'column': 'amount', 'agg': 'std'},
+        'smallest': {'column': 'amount', 'agg': 'min'},
+        'largest': {'column': 'amount', 'agg': 'max'},
+        'items': {'column': 'item', 'agg': 'nunique'},
+        'big_buys': {'agg': 'count', 'where': {'field': 'amount', 'op': '>', 'value': 80}},
+        'max_per_hour': {'agg': 'count', 'window': '1h'},
+        'max_hourly_spend': {'column': 'amount', 'agg': 'sum', 'window': '1h'}
+    },
+    'labels': [
+        {'label': 'whale', 'when': {'field': 'total', 'op': '>', 'value': 600}},
+        {'label': 'regular', 'when': {'field': 'total', 'op': '>', 'value': 300}}
+    ],
+    'default_label': 'casual',
+    'flags': [
+        {'flag': 'burst', 'when': {'field': 'max_per_hour', 'op': '>=', 'value': 2}},
+        {'flag': 'volatile', 'when': {'field': 'spread', 'op': '>', 'value': 50}}
+    ]
+}
+
+
+def _chunks(df, size):
+    return [df.iloc[start:start + size].reset_index(drop=True) for start in range(0, len(df), size)]
+
+
+def _assert_same(chunked, whole):
+    assert chunked['label_counts'] == whole['label_counts']
+    assert chunked['flag_counts'] == whole['flag_counts']
+    assert chunked['match_count'] == whole['match_count']
+    assert len(chunked['matches']) == len(whole['matches'])
+    for got, expected in zip(chunked['matches'], whole['matches']):
+        assert got.keys() == expected.keys()
+        for key, value in expected.items():
+            if isinstance(value, float):
+                assert got[key] == pytest.approx(value, nan_ok=True)
+            else:
+                assert got[key] == value
+
+
+@pytest.mark.parametrize('chunk_rows', [7, 37, 500])
+def test_chunked_partials_merge_to_the_whole_result(transactions, chunk_rows):
+    compiled = rule_dsl.compile_ruleset(GROUP_SPEC)
+
+    whole = compiled.evaluate(transactions)
+    chunked = compiled.evaluate_chunks(_chunks(transactions, chunk_rows))
+
+    _assert_same(chunked, whole)
+    assert chunked['evaluated'] == whole['evaluated'] == 40
+
+
+def test_chunked_row_level_rules_keep_global_row_numbers(transactions):
+    spec = {
+        'flags': [{'flag': 'big', 'when': {'field': 'amount', 'op': '>', 'value': 150}}],
+        'max_matches': 5
+    }
+    compiled = rule_dsl.compile_ruleset(spec)
+
+    whole = compiled.evaluate(transactions)
+    chunked = compiled.evaluate_chunks(_chunks(transactions, 64))
+
+    assert chunked['match_count'] == whole['match_count']
+    assert [m['row'] for m in chunked['matches']] == [m['row'] for m in whole['matches']]
+    assert chunked['truncated'] == whole['truncated']
+
+
+def test_median_is_rejected_in_chunked_mode(transactions):
+    spec = {**GROUP_SPEC, 'aggregations': {'total': {'column': 'amount', 'agg': 'median'}}}
+    compiled = rule_dsl.compile_ruleset(spec)
+
+    with pytest.raises(ValueError, match='chunked mode'):
+        compiled.evaluate_chunks(_chunks(transactions, 100))
+
+
+@pytest.fixture
+def purchases():
+    return pd.DataFrame({
+        'player_id': ['a', 'a', 'a', 'b', 'b', 'c', None],
+        'amount': [999.99, 999.99, 20.0, 50.0, 60.0, 5.0, 1000.0],
+        'timestamp': pd.to_datetime([
+            '2024-05-01 10:00', '2024-05-01 10:20', '2024-05-01 10:40',
+            '2024-05-01 10:00', '2024-05-01 12:00', '2024-05-02 09:00', '2024-05-02 09:00'
+        ], utc=True)
+    })
+
+
+@pytest.mark.parametrize('spec, message', [
+    ({}, 'at least one label or flag'),
+    ({'aggregations': {'total': {'column': 'amount', 'agg': 'sum'}}, 'flags': []}, "require 'group_by'"),
+    ({'group_by': 'player_id', 'aggregations': {'total': {'column': 'amount', 'agg': 'mode'}}}, "unknown agg 'mode'"),
+    ({'group_by': 'player_id', 'aggregations': {'total': {'agg': 'sum'}}}, "'sum' needs a 'column'"),
+    ({'group_by': 'player_id', 'aggregations': {'hourly': {'agg': 'count', 'window': '1h'}}}, "need 'time_column'"),
+    ({'flags': [{'flag': 'x', 'when': {'field': 'amount', 'op': '~', 'value': 1}}]}, r"flags\[0\].when: unknown operator"),
+    ({'flags': [{'flag': 'x', 'when': {'field': 'amount', 'op': '>'}}]}, "needs a 'value'"),
+    ({'flags': [{'flag': 'x', 'when': {'field': 'amount', 'op': 'between', 'value': 3}}]}, r"\[low, high\]"),
+    ({'flags': [{'flag': 'x', 'when': {'any': []}}]}, 'needs at least one condition'),
+    ({'labels': [{'label': 'x', 'when': {'op': '>', 'value': 1}}]}, r"labels\[0\].when: comparison needs a 'field'"),
+])
+def test_malformed_rulesets_are_rejected(spec, message):
+    with pytest.raises(ValueError, match=message):
+        rule_dsl.compile_ruleset(spec)
+
+
+def test_group_labels_flags_and_where(purchases):
+    compiled = rule_dsl.compile_ruleset(rule_dsl.PLAYER_TIER_RULESET)
+
+    result = compiled.evaluate(purchases)
+
+    assert result['level'] == 'group'
+    assert result['evaluated'] == 3  # rows without a player are not grouped
+    assert result['label_counts'] == {'whale': 1, 'regular': 1, 'casual': 1}
+    assert result['flag_counts'] == {'rapid_velocity': 0, 'repeated_999_99': 1}
+
+    matches = {match['player_id']: match for match in result['matches']}
+    assert set(matches) == {'a', 'b'}
+    assert matches['a']['label'] == 'whale'
+    assert matches['a']['flags'] == ['repeated_999_99']
+    assert matches['a']['transaction_count'] == 3
+    assert matches['a']['max_tx_per_hour'] == 3
+    assert matches['a']['repeat_999_count'] == 2
+    assert matches['b']['label'] == 'regular'
+    assert matches['b']['total_spend'] == pytest.approx(110.0)
+    assert matches['b']['max_tx_per_hour'] == 1
+
+
+def test_row_level_conditions(purchases):
+    spec = {
+        'labels': [{'label': 'suspicious', 'when': {'all': [
+            {'field': 'amount', 'op': '>=', 'value': 999},
+            {'not': {'field': 'player_id', 'op': 'is_null'}}
+        ]}}],
+        'flags': [{'flag': 'anonymous', 'when': {'field': 'player_id', 'op': 'is_null'}}]
+    }
+
+    result = rule_dsl.compile_ruleset(spec).evaluate(purchases)
+
+    assert result['level'] == 'row'
+    assert result['label_counts'] == {'suspicious': 2, 'none': 5}
+    assert [(m['row'], m['label'], m['flags']) for m in result['matches']] == [
+        (0, 'suspicious', []), (1, 'suspicious', []), (6, 'none', ['anonymous'])
+    ]
+
+
+def test_max_matches_truncates_the_listing(purchases):
+    spec = {'flags': [{'flag': 'any', 'when': {'field': 'amount', 'op': '>', 'value': 0}}], 'max_matches': 2}
+
+    result = rule_dsl.compile_ruleset(spec).evaluate(purchases)
+
+    assert result['match_count'] == 7
+    assert [m['row'] for m in result['matches']] == [0, 1]
+    assert result['truncated'] is True
+
+
+def test_unknown_fields_are_reported_at_evaluation(purchases):
+    spec = {'flags': [{'flag': 'x', 'when': {'field': 'price', 'op': '>', 'value': 1}}]}
+
+    with pytest.raises(ValueError, match="unknown field 'price'"):
+        rule_dsl.compile_ruleset(spec).evaluate(purchases)
+
+
+def test_compiled_rulesets_are_reused():
+    spec = {'flags': [{'flag': 'x', 'when': {'field': 'amount', 'op': '>', 'value': 1}}]}
+
+    assert rule_dsl.compile_ruleset(spec) is rule_dsl.compile_ruleset(dict(spec))
@@ -0,0 +1,215 @@
+import importlib
+import json
+import threading
+import time
+
+import pytest
+
+ruleset_executor = importlib.import_module('ruleset_executor')
+
+DSL_RULESET = {
+    'name': 'big spenders',
+    'group_by': 'player_id',
+    'aggregations': {'total': {'column': 'amount', 'agg': 'sum'}},
+    'labels': [{'label': 'whale', 'when': {'field': 'total', 'op': '>', 'value': 100}}],
+    'default_label': 'casual'
+}
+
+ROWS = [
+    {'player_id': 'a', 'amount': 90.0},
+    {'player_id': 'a', 'amount': 30.0},
+    {'player_id': 'b', 'amount': 5.0}
+]
+
+
+class FakeWalrus:
+    """In-memory stand-in for WalrusUploader"""
+
+    def __init__(self, blobs):
+        self.blobs = {blob_id: json.dumps(content).encode() for blob_id, content in blobs.items()}
+        self.uploads = 0
+
+    def download_blob_bytes(self, blob_id, cancel=None):
+        if blob_id not in self.blobs:
+            raise Exception(f"404 Not Found: {blob_id}")
+        return self.blobs[blob_id]
+
+    def upload_blob(self, data):
+        self.uploads += 1
+        blob_id = f"result-{self.uploads}"
+        self.blobs[blob_id] = json.dumps(data).encode()
+        return {
+            'blob_id': blob_id,
+            'content_hash': 'hash',
+            'encoding': 'json-c1',
+            'aggregator_url': f"http://aggregator/v1/{blob_id}",
+            'expires_at': time.time() + 3600
+        }
+
+    def blob_exists(self, blob_id):
+        return blob_id in self.blobs
+
+    def iter_blob_chunks(self, blob_id, chunk_size=64 * 1024):
+        content = self.download_blob_bytes(blob_id)
+        for start in range(0, len(content), chunk_size):
+            yield content[start:start + chunk_size]
+
+
+class FakeBedrock:
+    max_tokens = 1024
+
+    def __init__(self):
+        self.prompts = []
+
+    def _invoke_bedrock(self, prompt):
+        self.prompts.append(prompt)
+        return '{"findings": []}'
+
+
+@pytest.fixture
+def executor():
+    executor = ruleset_executor.RulesetExecutor()
+    executor.walrus = FakeWalrus({'data': ROWS, 'other-data': ROWS, 'dsl': DSL_RULESET})
+    return executor
+
+
+DSL = ruleset_executor.RulesetExecutor.RULE_TYPE_DSL
+AI = ruleset_executor.RulesetExecutor.RULE_TYPE_AI
+
+AI_RULESET = {'name': 'spending review', 'prompt': 'Review player spending', 'prompt_context': 'sample'}
+
+
+def test_fanout_runs_every_ruleset(executor):
+    results = executor.execute_rulesets('data', [{'ruleset_blob_id': 'dsl', 'rule_type': DSL}] * 2)
+
+    assert [item['success'] for item in results] == [True, True]
+    assert results[0]['summary'] is not None
+
+
+def test_fanout_reports_a_failed_data_fetch_per_ruleset(executor):
+    executor.execute_rulesets('data', [{'ruleset_blob_id': 'dsl', 'rule_type': DSL}])
+
+    results = executor.execute_rulesets('missing', [
+        {'ruleset_blob_id': 'dsl', 'rule_type': DSL},
+        {'ruleset_blob_id': 'missing-ruleset', 'rule_type': DSL}
+    ])
+
+    assert [item['success'] for item in results] == [False, False]
+    assert 'Data blob missing failed' in results[0]['error']
+    assert '404' in results[1]['error']
+
+
+def test_fanout_serves_memoized_results_without_the_data(executor):
+    executor.execute_rulesets('data', [{'ruleset_blob_id': 'dsl', 'rule_type': DSL}])
+    del executor.walrus.blobs['data']
+
+    results = executor.execute_rulesets('data', [{'ruleset_blob_id': 'dsl', 'rule_type': DSL}])
+
+    assert results[0]['success'] is True
+    assert results[0]['cached'] is True
+
+
+def test_batch_reports_an_unusable_ruleset_per_item(executor):
+    executor.execute_many(['data'], 'dsl', DSL)
+    del executor.walrus.blobs['dsl']
+
+    results = executor.execute_many(['data', 'other-data'], 'dsl', DSL)
+
+    assert results[0]['success'] is True and results[0]['cached'] is True
+    assert results[1]['success'] is False
+    assert 'Ruleset dsl failed' in results[1]['error']
+
+
+def test_batch_isolates_failing_items(executor):
+    results = executor.execute_many(['data', 'missing', 'other-data'], 'dsl', DSL)
+
+    assert [item['data_blob_id'] for item in results] == ['data', 'missing', 'other-data']
+    assert [item['success'] for item in results] == [True, False, True]
+
+
+def test_fanout_reports_malformed_entries_per_item(executor):
+    results = executor.execute_rulesets('data', ['dsl', {'ruleset_blob_id': 'dsl', 'rule_type': DSL}])
+
+    assert [item['success'] for item in results] == [False, True]
+    assert 'must be an object' in results[0]['error']
+
+
+def test_fanout_isolates_a_failing_memo_lookup(executor):
+    executor.execute_rulesets('data', [{'ruleset_blob_id': 'dsl', 'rule_type': DSL}])
+
+    def blob_exists(blob_id):
+        raise ConnectionError('aggregator unreachable')
+    executor.walrus.blob_exists = blob_exists
+    executor.walrus.blobs['dsl-2'] = executor.walrus.blobs['dsl']
+
+    results = executor.execute_rulesets('data', [
+        {'ruleset_blob_id': 'dsl', 'rule_type': DSL},
+        {'ruleset_blob_id': 'dsl-2', 'rule_type': DSL}
+    ])
+
+    assert results[0]['success'] is False
+    assert 'aggregator unreachable' in results[0]['error']
+    assert results[1]['success'] is True
+    assert 'memo_lookup' in results[1]['timings']['stages']
+
+
+def test_chunked_ai_run_keeps_its_summary_out_of_the_profile_store(executor):
+    executor.bedrock = FakeBedrock()
+    executor.walrus.blobs['ai'] = json.dumps(AI_RULESET).encode()
+
+    result = executor.execute('data', 'ai', AI, chunked=True)
+
+    assert result['row_count'] == 3
+    assert len(executor.bedrock.prompts) == 1
+    assert executor.profiles.get('data') is None
+
+
+def test_chunked_run_rejects_an_empty_dataset_before_the_model_call(executor):
+    executor.bedrock = FakeBedrock()
+    executor.walrus.blobs['ai'] = json.dumps(AI_RULESET).encode()
+    executor.walrus.blobs['empty'] = b'[]'
+
+    with pytest.raises(ValueError, match='empty'):
+        executor.execute('empty', 'ai', AI, chunked=True)
+    assert executor.bedrock.prompts == []
+
+
+class SlowDataWalrus(FakeWalrus):
+    """Data downloads take `delay` seconds unless they are cancelled first"""
+
+    def __init__(self, blobs, delay, ruleset_delay=0.0):
+        super().__init__(blobs)
+        self.delay = delay
+        self.ruleset_delay = ruleset_delay
+        self.cancelled = threading.Event()
+
+    def download_blob_bytes(self, blob_id, cancel=None):
+        if cancel is None:
+            time.sleep(self.ruleset_delay)
+        elif cancel.wait(self.delay):
+            self.cancelled.set()
+            raise Exception(f"Download of blob {blob_id} was cancelled")
+        return super().download_blob_bytes(blob_id)
+
+
+@pytest.mark.parametrize('ruleset_blob_id', ['missing-ruleset', 'invalid-dsl'])
+def test_unusable_ruleset_cancels_the_data_download(executor, ruleset_blob_id):
+    executor.walrus = SlowDataWalrus({'data': ROWS, 'invalid-dsl': {'name': 'no rules'}}, delay=30)
+
+    started = time.monotonic()
+    with pytest.raises(Exception):
+        executor.execute('data', ruleset_blob_id, DSL)
+
+    assert executor.walrus.cancelled.wait(5)
+    assert time.monotonic() - started < 5
+
+
+def test_ruleset_download_overlaps_the_data_download(executor):
+    executor.walrus = SlowDataWalrus({'data': ROWS, 'dsl': DSL_RULESET}, delay=0.3, ruleset_delay=0.2)
+
+    result = executor.execute('data', 'dsl', DSL)
+
+    assert result['row_count'] == 3
+    assert result['timings']['fetch_overlap_ms'] >= 150
+    assert result['timings']['fetch_wall_ms'] < 450
+    assert not executor.walrus.cancelled.is_set()
@@ -0,0 +1,104 @@
+import importlib
+
+import pandas as pd
+import pytest
+
+pytest.importorskip('duckdb')
+
+sql_engine = importlib.import_module('lambda.sql_engine')
+
+
+@pytest.fixture
+def engine():
+    return sql_engine.SqlRuleEngine(max_rows=3, timeout_seconds=1, memory_limit='256MB')
+
+
+@pytest.fixture
+def df():
+    return pd.DataFrame({
+        'player_id': ['p1', 'p2', 'p3', 'p1', 'p2'],
+        'amount': [10.0, 250.0, 5.5, 999.99, 40.0],
+        'note': ['a;b', 'plain', None, 'a;b', 'x']
+    })
+
+
+def test_parameters_are_bound(engine, df):
+    result = engine.execute(
+        df,
+        "SELECT player_id, sum(amount) AS total FROM data WHERE amount > $min GROUP BY player_id ORDER BY total DESC",
+        params={'min': 20}
+    )
+
+    assert [c['name'] for c in result['columns']] == ['player_id', 'total']
+    assert result['rows'] == [['p1', 999.99], ['p2', 290.0]]
+    assert result['truncated'] is False
+
+
+@pytest.mark.parametrize('query', [
+    "SELECT count(*) FROM data WHERE note = 'a;b';",
+    "SELECT count(*) FROM data WHERE note = 'a;b' -- counts 'a;b' notes",
+])
+def test_semicolons_inside_a_single_statement_are_allowed(engine, df, query):
+    assert engine.execute(df, query)['rows'] == [[2]]
+
+
+def test_row_cap(engine, df):
+    result = engine.execute(df, "SELECT * FROM data ORDER BY amount", max_rows=100)
+
+    assert result['row_count'] == 3
+    assert result['truncated'] is True
+
+
+def test_timeout(engine, df):
+    query = "SELECT sum(a.range * b.range) FROM range(100000) a, range(100000) b"
+
+    with pytest.raises(TimeoutError):
+        engine.execute(df, query, timeout_seconds=0.2)
+
+
+@pytest.mark.parametrize('query', [
+    "CREATE TABLE stolen AS SELECT * FROM data",
+    "COPY data TO '/tmp/sql-engine-copy.csv'",
+    "PRAGMA database_list",
+    "DROP TABLE data",
+])
+def test_statements_other_than_queries_are_rejected(engine, df, query):
+    with pytest.raises(ValueError, match='SQL error'):
+        engine.execute(df, query)
+
+
+def test_multiple_statements_are_rejected(engine, df):
+    with pytest.raises(ValueError, match='single statement'):
+        engine.execute(df, "SELECT 1; DROP TABLE data")
+
+
+@pytest.mark.parametrize('query, message', [
+    ("SELECT * FROM read_csv('/etc/passwd')", 'disabled by configuration'),
+    ("SELECT * FROM read_text('/etc/hostname')", 'disabled by configuration'),
+    ("SELECT * FROM '/etc/passwd'", 'does not exist'),
+])
+def test_files_outside_the_dataset_are_unreachable(engine, df, query, message):
+    with pytest.raises(ValueError, match=message):
+        engine.execute(df, query)
+
+
+def test_chunks_are_combined_with_widened_types(engine):
+    chunks = [
+        pd.DataFrame({'player_id': ['p1', 'p2'], 'amount': [1, 2], 'tag': [None, None]}),
+        pd.DataFrame(columns=['player_id', 'amount']),
+        pd.DataFrame({'player_id': ['p1'], 'amount': [2.5], 'tag': ['vip'], 'level': [7]}),
+    ]
+
+    result = engine.execute_chunks(
+        chunks,
+        "SELECT player_id, sum(amount) AS total, max(tag) AS tag, max(level) AS level "
+        "FROM data GROUP BY player_id ORDER BY player_id"
+    )
+
+    assert result['input_rows'] == 3
+    assert result['rows'] == [['p1', 3.5, 'vip', 7], ['p2', 2.0, None, None]]
+
+
+def test_empty_chunked_dataset_is_rejected(engine):
+    with pytest.raises(ValueError, match='empty'):
+        engine.execute_chunks([pd.DataFrame({'a': []})], "SELECT * FROM data")
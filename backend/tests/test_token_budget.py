@@ -0,0 +1,90 @@
+import importlib
+import json
+
+import pytest
+
+token_budget = importlib.import_module('lambda.token_budget')
+
+ROWS = '\n'.join(json.dumps({'player_id': f"p{i}", 'item': 'sword', 'amount': i * 1.5}) for i in range(40))
+
+
+def test_estimate_counts_letter_digit_and_symbol_runs():
+    assert token_budget.estimate_tokens('') == 0
+    assert token_budget.estimate_tokens('hello') == 1
+    assert token_budget.estimate_tokens('spending') == 2
+    assert token_budget.estimate_tokens('123456') == 2
+    assert token_budget.estimate_tokens('"},{') == 2
+    assert token_budget.estimate_tokens('a\n\nb') == 3
+    assert token_budget.estimate_tokens('café') == 2
+
+
+def test_estimate_errs_on_the_high_side_for_json_rows():
+    # Claude's tokenizer averages about 3.5 characters per token on rows like these
+    assert token_budget.estimate_tokens(ROWS) >= len(ROWS) / 3.5
+
+
+def test_truncate_keeps_whole_lines():
+    limit = token_budget.estimate_tokens(ROWS) // 2
+
+    text = token_budget.truncate_to_tokens(ROWS, limit)
+
+    assert 0 < token_budget.estimate_tokens(text) <= limit
+    assert ROWS.startswith(text + '\n')
+    assert token_budget.truncate_to_tokens(ROWS, 10 ** 6) == ROWS
+    assert token_budget.truncate_to_tokens(ROWS, 0) == ''
+    assert token_budget.truncate_to_tokens('a very long first line\nsecond', 2) == ''
+
+
+def test_truncate_cuts_a_single_line_where_the_budget_ends():
+    text = token_budget.truncate_to_tokens('word ' * 100, 10)
+
+    assert token_budget.estimate_tokens(text) == 10
+    assert text == 'word ' * 10  # trailing whitespace is free
+
+
+def test_token_cost_uses_the_provider_price():
+    assert token_budget.token_cost('anthropic', 1_000_000, 0) == pytest.approx(0.25)
+    assert token_budget.token_cost('bedrock', 1000, 2000) == pytest.approx(0.003 + 0.03)
+    assert token_budget.token_cost(None, 1000, 2000) == token_budget.token_cost('bedrock', 1000, 2000)
+    assert token_budget.token_cost('unknown', 10, 10) == token_budget.token_cost('bedrock', 10, 10)
+
+
+def test_budget_spend_and_fit():
+    budget = token_budget.PromptBudget(max_prompt_tokens=100)
+
+    assert budget.spend('Review player spending', 'Return JSON') == 9
+    assert budget.available == 91
+
+    fitted = budget.fit(ROWS)
+    assert ROWS.startswith(fitted)
+    assert budget.used <= 100
+    assert budget.fit(ROWS) == ''
+
+    capped = token_budget.PromptBudget(max_prompt_tokens=100)
+    assert token_budget.estimate_tokens(capped.fit(ROWS, max_tokens=20)) <= 20
+    assert capped.available >= 80
+
+
+def test_budget_defaults_to_the_environment(monkeypatch):
+    monkeypatch.setenv('AI_MAX_PROMPT_TOKENS', '500')
+
+    assert token_budget.PromptBudget().max_prompt_tokens == 500
+    assert token_budget.PromptBudget(max_prompt_tokens=50).max_prompt_tokens == 50
+
+
+def test_check_projects_cost_and_rejects_oversize_prompts():
+    budget = token_budget.PromptBudget(max_prompt_tokens=1000, provider='anthropic')
+    prompt = ROWS[:400]
+    tokens = token_budget.estimate_tokens(prompt)
+
+    projection = budget.check(prompt, max_output_tokens=500)
+
+    assert projection == {
+        'input_tokens': tokens,
+        'max_output_tokens': 500,
+        'max_prompt_tokens': 1000,
+        'input_cost': pytest.approx(tokens * 0.25 / 1_000_000),
+        'max_cost': pytest.approx((tokens * 0.25 + 500 * 1.25) / 1_000_000)
+    }
+    with pytest.raises(token_budget.PromptBudgetError, match='AI_MAX_PROMPT_TOKENS'):
+        token_budget.PromptBudget(max_prompt_tokens=tokens - 1).check(prompt)
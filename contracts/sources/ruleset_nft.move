@@ -20,6 +20,7 @@ module walrus_insight::ruleset_nft {
     const RULE_TYPE_AI: u8 = 1;
     const RULE_TYPE_SQL: u8 = 2;
     const RULE_TYPE_PYTHON: u8 = 3;
+    const RULE_TYPE_DSL: u8 = 4;
 
     /// Categories
     const CATEGORY_GAMING: u8 = 1;
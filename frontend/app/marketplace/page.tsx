@@ -16,6 +16,26 @@ interface Ruleset {
   rating: number;
 }
 
+// Analyses run as backend jobs; poll until the job finishes
+async function waitForJob(jobId: string, intervalMs = 1000) {
+  while (true) {
+    const response = await fetch(`http://localhost:8000/api/jobs/${jobId}`);
+    const result = await response.json();
+
+    if (!result.success) {
+      throw new Error(result.error || 'Job lookup failed');
+    }
+    if (result.job.status === 'succeeded') {
+      return result.job.result;
+    }
+    if (result.job.status === 'failed') {
+      throw new Error(result.job.error || 'Analysis failed');
+    }
+
+    await new Promise((resolve) => setTimeout(resolve, intervalMs));
+  }
+}
+
 export default function MarketplacePage() {
   const account = useCurrentAccount();
   const [selectedRuleset, setSelectedRuleset] = useState<Ruleset | null>(null);
@@ -516,8 +536,11 @@ export default function MarketplacePage() {
                       throw new Error(result.error || 'Analysis failed');
                     }
 
+                    // The analysis is queued; wait for the worker to finish it
+                    const jobResult = await waitForJob(result.job_id);
+
                     // Display results
-                    const analysis = result.analysis;
+                    const analysis = jobResult.analysis;
                     const resultText = `
 ✅ Analysis Complete!
 